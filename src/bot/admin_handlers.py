@@ -7,9 +7,13 @@ from telegram.error import TelegramError
 from telegram.ext import CallbackContext, CommandHandler, Application, ContextTypes
 
 from src.bot.handlers import APP_START_TIME
+from src.bot.utils import StreamingReply, iterate_in_thread
 from src.config.config import app_settings
 from src.config.logging_config import LOG_DIR
-from src.services.utils import get_today_logs, create_zip_archive, summarize_text
+from src.services.extractive import get_compression_stats
+from src.services.llm_cache import get_llm_cache
+from src.services.providers import get_providers_stats
+from src.services.utils import get_today_logs, create_zip_archive, stream_summary
 
 logger = getLogger(__name__)
 
@@ -31,6 +35,27 @@ async def health_check(update: Update, context: CallbackContext):
         f"⏱ Uptime: {uptime}\n"
         f"📂 Logs directory: {'Exists' if os.path.exists('logs') else 'Missing'}"
     )
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        stats = llm_cache.stats()
+        health_message += (
+            f"\n🗄 LLM cache: {stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MB, "
+            f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})"
+        )
+    stats = get_compression_stats()
+    if stats["calls"]:
+        health_message += (
+            f"\n✂️ Extractive compression: {stats['calls']} texts, "
+            f"{stats['saved_tokens']} tokens saved (ratio {stats['ratio']:.2f})"
+        )
+    for stats in get_providers_stats():
+        health_message += (
+            f"\n🤖 LLM provider {stats['name']}: circuit {stats['state']}, "
+            f"{stats['requests']} requests, {stats['error_rate']:.0%} recent errors, "
+            f"latency {stats['avg_latency']:.1f}s avg / {stats['p95_latency']:.1f}s p95"
+        )
+        if stats["last_error"]:
+            health_message += f"\n    Last error: {stats['last_error'][:200]}"
 
     user_id = update.message.from_user.id
     if str(user_id) in app_settings.ADMIN_USER_IDS:
@@ -114,9 +139,17 @@ async def send_story_summary(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 "concise overview with required amount of details to inform users about daily changes in The Story community."
             )
 
-            content_summary = summarize_text(news_url, prompt)
-
-            await update.message.reply_text(content_summary)
+            # summary is shown while it is generated
+            reply = StreamingReply(update.message)
+            await reply.start("⏳ Summarizing...")
+            try:
+                async for part in iterate_in_thread(stream_summary(news_url, prompt)):
+                    await reply.append(part)
+            except Exception:
+                await reply.append("\n\n⚠️ Failed to create summary.")
+                raise
+            finally:
+                await reply.finish("⚠️ Summary is empty.")
         else:
             await update.message.reply_text("Please provide a link to summarize.")
 
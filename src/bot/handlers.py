@@ -1,5 +1,6 @@
 import asyncio
 import datetime as dt
+import html
 import sys
 import traceback
 from logging import getLogger
@@ -14,11 +15,12 @@ from src.bot.utils import (
     get_response_json,
     split_message,
     load_static_info_from_yaml,
+    parse_search_args,
 )
 from src.config.config import app_settings
 from src.config.constants import TICKERS, TOPICS
-from src.database.connection import create_session
-from src.database.database import get_master_summary
+from src.database.async_connection import create_async_session
+from src.database.async_database import get_master_summary, search_articles
 
 logger = getLogger(__name__)
 
@@ -34,6 +36,7 @@ async def register_handlers(app: Application):
     app.add_handler(CommandHandler("validator_status", send_validator_status))
     app.add_handler(CommandHandler("join_the_channel", join_group))
     app.add_handler(CommandHandler("info", send_info))
+    app.add_handler(CommandHandler("search", search))
 
     commands = [
         BotCommand("start", "Start interacting with the bot"),
@@ -46,6 +49,10 @@ async def register_handlers(app: Application):
             "Join Crypto Daily Brief channel to get daily crypto news summaries.",
         ),
         BotCommand("info", "Learn more about Story Protocol (STORY)"),
+        BotCommand(
+            "search",
+            "Search past news: /search <query> [ticker] [days], e.g. /search etf BTC 30",
+        ),
     ]
     await app.bot.set_my_commands(commands)
 
@@ -92,6 +99,34 @@ async def send_info(update: Update, context: CallbackContext):
         await update.message.reply_text(text, disable_web_page_preview=True)
 
 
+async def search(update: Update, context: CallbackContext):
+    """Handle the /search <query> [ticker] [days] command."""
+    query, ticker, days = parse_search_args(context.args)
+    if not query:
+        await update.message.reply_text(
+            "Please provide a search query: /search <query> [ticker] [days]"
+        )
+        return
+
+    since_date = dt.date.today() - dt.timedelta(days=days) if days else None
+    async with create_async_session() as session:
+        hits = await search_articles(
+            session, query, ticker, since_date, app_settings.SEARCH_RESULTS_LIMIT
+        )
+
+    if not hits:
+        await update.message.reply_text(f"Nothing found for '{query}'.")
+        return
+
+    lines = [
+        f'{i}. {hit.date} <a href="{html.escape(hit.news_url)}">{html.escape(hit.title)}</a>'
+        for i, hit in enumerate(hits, start=1)
+    ]
+    await update.message.reply_text(
+        "\n".join(lines), parse_mode="HTML", disable_web_page_preview=True
+    )
+
+
 async def create_topic(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /create_topic command."""
     # Check if user provided a topic name
@@ -143,11 +178,11 @@ async def get_topics(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def send_master_summaries(as_of_date, bot_app):
     """Generate and send master summaries for each topic."""
 
-    with create_session() as session:
+    async with create_async_session() as session:
         try:
             for ticker in TICKERS:
                 logger.info(f"Loading master summary for '{ticker}' ticker...")
-                master_summary = get_master_summary(session, as_of_date, ticker)
+                master_summary = await get_master_summary(session, as_of_date, ticker)
 
                 if not master_summary:
                     logger.warning(
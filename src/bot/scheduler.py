@@ -1,17 +1,25 @@
+import asyncio
+import datetime as dt
 import sys
 import traceback
 from logging import getLogger
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 from src.bot.handlers import send_master_summaries
 from src.bot.utils import notify_admin_on_error
+from src.config.config import app_settings
+from src.database.connection import create_session
+from src.services.archive import archive_old_articles
+from src.services.batch_jobs import create_and_save_summaries_in_batch
 from src.services.datetime_util import DatetimeUtil
 from src.services.discord_client import run_scheduled_task
 from src.services.summarizer import (
-    pull_articles_and_save_articles,
+    pull_articles_and_save_articles_async,
     create_and_save_summaries,
+    process_new_articles,
 )
 from src.services.twitter_client import run_twitter_summarizer
 
@@ -20,6 +28,10 @@ logger = getLogger(__name__)
 
 def setup_article_pull_scheduler(bot_app):
     """Set up the scheduler and register tasks."""
+    if app_settings.INGESTION_MODE == "streaming":
+        setup_streaming_ingestion_scheduler(bot_app)
+        return
+
     scheduler = AsyncIOScheduler()
 
     scheduler.add_job(
@@ -37,6 +49,28 @@ def setup_article_pull_scheduler(bot_app):
     )
 
 
+def setup_streaming_ingestion_scheduler(bot_app):
+    """Set up the scheduler polling API for new articles during the day."""
+    scheduler = AsyncIOScheduler()
+    interval_minutes = app_settings.INGESTION_POLL_INTERVAL_MINUTES
+
+    scheduler.add_job(
+        poll_new_articles,
+        IntervalTrigger(minutes=interval_minutes),
+        kwargs={"bot_app": bot_app},
+        id="streaming_article_pull",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=dt.datetime.now(),
+    )
+
+    scheduler.start()
+    logger.info(
+        f"Streaming ingestion scheduler initialized, articles are polled every {interval_minutes} minutes."
+    )
+
+
 def setup_summarize_scheduler(bot_app):
     """Set up the scheduler and register tasks."""
     scheduler = AsyncIOScheduler()
@@ -56,6 +90,51 @@ def setup_summarize_scheduler(bot_app):
     )
 
 
+def setup_batch_summarize_scheduler(bot_app):
+    """Set up the scheduler requesting nightly summaries with batch jobs."""
+    if not app_settings.LLM_BATCH_MODE:
+        logger.info("Batch summarization is disabled.")
+        return
+
+    scheduler = AsyncIOScheduler()
+
+    scheduler.add_job(
+        generate_summaries_in_batch,
+        # leaves LLM_BATCH_TIMEOUT (4 hours) to the batch job before summaries are sent at 5:00
+        CronTrigger(hour=0, minute=30),
+        kwargs={"bot_app": bot_app},
+        id="daily_batch_summary",
+        replace_existing=True,
+    )
+
+    scheduler.start()
+    logger.info(
+        "Batch summarize scheduler initialized and daily task scheduled at 0:30 AM local time."
+    )
+
+
+def setup_retention_scheduler(bot_app):
+    """Set up the scheduler moving old articles to archive."""
+    if app_settings.ARTICLES_RETENTION_DAYS <= 0:
+        logger.info("Articles retention is disabled.")
+        return
+
+    scheduler = AsyncIOScheduler()
+
+    scheduler.add_job(
+        archive_articles,
+        CronTrigger(hour=3, minute=0),
+        kwargs={"bot_app": bot_app},
+        id="daily_articles_archive",
+        replace_existing=True,
+    )
+
+    scheduler.start()
+    logger.info(
+        "Retention scheduler initialized and daily task scheduled at 3:00 AM local time."
+    )
+
+
 def setup_discord_daily_summarize_scheduler(bot_app):
     """Set up the scheduler and register tasks."""
     scheduler = AsyncIOScheduler()
@@ -100,7 +179,7 @@ async def pull_todays_articles(bot_app):
 
     try:
         logger.info(f"Stage 1. Pulling articles and saving to db...")
-        pull_articles_and_save_articles(as_of_date)
+        await pull_articles_and_save_articles_async(as_of_date)
         logger.info("Successfully pulled and saved articles!\n\n")
     except Exception as e:
         exc_type, exc_value, exc_tb = sys.exc_info()
@@ -118,6 +197,32 @@ async def pull_todays_articles(bot_app):
         await notify_admin_on_error(bot_app.bot, "\n\n".join(messages))
 
 
+async def poll_new_articles(bot_app):
+    """Task to pull new articles, scrape them and create their content summaries."""
+    today = DatetimeUtil.utc_now().date()
+    # articles published late yesterday are still pulled after midnight, watermarks stop the pull
+    dates = [today - dt.timedelta(days=1), today]
+
+    try:
+        logger.info("Polling new articles...")
+        await process_new_articles(dates)
+        logger.info("Successfully processed new articles!\n\n")
+    except Exception as e:
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        tb_summary = traceback.extract_tb(exc_tb)
+
+        error_message = f"Error occurred during streaming ingestion: {e}"
+        messages = [error_message]
+        logger.error(error_message)
+
+        for tb in tb_summary:
+            message = f"File: {tb.filename}, Line: {tb.lineno}, Function: {tb.name}, Code: {tb.line}"
+            messages.append(message)
+            logger.error(message)
+
+        await notify_admin_on_error(bot_app.bot, "\n\n".join(messages))
+
+
 async def generate_master_summaries(bot_app):
     """Task to generate master summaries."""
     as_of_date = DatetimeUtil.utc_yesterday().date()
@@ -128,7 +233,8 @@ async def generate_master_summaries(bot_app):
             f"Stage 2. Creating content summaries for every article for {as_of_date}. "
             f"Creating master summary for {as_of_date} per ticker..."
         )
-        create_and_save_summaries(as_of_date)
+        # LLM calls and synchronous database access run outside of the event loop
+        await asyncio.to_thread(create_and_save_summaries, as_of_date)
 
         logger.info(
             f"Stage 3. Starting to send master summaries to each telegram group's topic..."
@@ -150,3 +256,52 @@ async def generate_master_summaries(bot_app):
             logger.error(message)
 
         await notify_admin_on_error(bot_app.bot, "\n\n".join(messages))
+
+
+async def generate_summaries_in_batch(bot_app):
+    """Task to create yesterday's summaries with batch jobs, the rest is summarized at 5:00."""
+    as_of_date = DatetimeUtil.utc_yesterday().date()
+
+    try:
+        logger.info(f"Creating summaries for {as_of_date} with batch jobs...")
+        await asyncio.to_thread(create_and_save_summaries_in_batch, as_of_date)
+        logger.info("Successfully created summaries with batch jobs!\n\n")
+    except Exception as e:
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        tb_summary = traceback.extract_tb(exc_tb)
+
+        error_message = f"Error occurred during batch summarization: {e}"
+        messages = [error_message]
+        logger.error(error_message)
+
+        for tb in tb_summary:
+            message = f"File: {tb.filename}, Line: {tb.lineno}, Function: {tb.name}, Code: {tb.line}"
+            messages.append(message)
+            logger.error(message)
+
+        await notify_admin_on_error(bot_app.bot, "\n\n".join(messages))
+
+
+async def archive_articles(bot_app):
+    """Task to move articles older than retention period to archive."""
+    try:
+        logger.info(
+            f"Archiving articles older than {app_settings.ARTICLES_RETENTION_DAYS} days..."
+        )
+        with create_session() as session:
+            await asyncio.to_thread(archive_old_articles, session)
+        logger.info("Successfully archived old articles!\n\n")
+    except Exception as e:
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        tb_summary = traceback.extract_tb(exc_tb)
+
+        error_message = f"Error occurred during articles archiving: {e}"
+        messages = [error_message]
+        logger.error(error_message)
+
+        for tb in tb_summary:
+            message = f"File: {tb.filename}, Line: {tb.lineno}, Function: {tb.name}, Code: {tb.line}"
+            messages.append(message)
+            logger.error(message)
+
+        await notify_admin_on_error(bot_app.bot, "\n\n".join(messages))
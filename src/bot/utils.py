@@ -1,18 +1,24 @@
+import asyncio
+import datetime as dt
 import os
+import time
 from logging import getLogger
+from typing import AsyncIterator, Iterator, List, Tuple
 
-import requests
 import yaml
-from telegram.error import TelegramError
+from telegram import Message
+from telegram.error import RetryAfter, TelegramError
 from telegram.ext import CallbackContext
 
 from src.config.config import app_settings
+from src.config.constants import TICKERS
+from src.services.http_cache import cached_get
 
 logger = getLogger(__name__)
 
 
 def get_response_json(url: str):
-    response = requests.get(url)
+    response = cached_get(url)
 
     if response is not None and response.status_code != 200:
         logger.error(f"Error on requesting 'url': {response.content}")
@@ -72,12 +78,33 @@ async def notify_admin_on_error(bot_app, error_message):
         logger.error(f"Failed to notify admin: {e}")
 
 
+def parse_search_args(args: List[str]) -> Tuple[str, str | None, int | None]:
+    """
+    Parses arguments of /search <query> [ticker] [days] command into (query, ticker, days).
+    Trailing number is the number of days, trailing known ticker is the ticker filter.
+    """
+    args = list(args or [])
+    days = None
+    if len(args) > 1 and args[-1].isdigit():
+        days = int(args.pop())
+    ticker = None
+    if len(args) > 1 and args[-1].upper() in TICKERS:
+        ticker = args.pop().upper()
+    return " ".join(args), ticker, days
+
+
 def split_message(message: str, max_length: int = 4096) -> list:
     """Split the message into chunks of max_length."""
     chunks = []
     current_chunk = ""
 
-    for line in message.split("\n"):
+    lines = [
+        line[start : start + max_length]
+        for line in message.split("\n")
+        # lines longer than max_length are split as well
+        for start in range(0, max(len(line), 1), max_length)
+    ]
+    for line in lines:
         # Check the length if we add this line
         if len(current_chunk) + len(line) + 1 > max_length:  # +1 for the newline
             if current_chunk:  # If current chunk is not empty, add it to chunks
@@ -94,6 +121,80 @@ def split_message(message: str, max_length: int = 4096) -> list:
 
     return chunks
 
+
+class StreamingReply:
+    """
+    Reply showing text while it is generated: placeholder message is edited with the text
+    received so far, at most once per TELEGRAM_EDIT_INTERVAL seconds (Telegram limits edits
+    of a chat). Text longer than a single message continues in new messages.
+    """
+
+    def __init__(self, message: Message, edit_interval: float = None):
+        self.message = message
+        self.edit_interval = (
+            app_settings.TELEGRAM_EDIT_INTERVAL
+            if edit_interval is None
+            else edit_interval
+        )
+        self.text = ""
+        self._messages: List[Message] = []
+        self._shown_texts: List[str] = []
+        self._next_edit_at = 0.0
+
+    async def start(self, placeholder: str):
+        self._messages.append(await self.message.reply_text(placeholder))
+        self._shown_texts.append(placeholder)
+
+    async def append(self, part: str):
+        self.text += part
+        if time.monotonic() >= self._next_edit_at:
+            try:
+                await self._render()
+            except RetryAfter as e:
+                self._next_edit_at = time.monotonic() + get_retry_after_seconds(e)
+
+    async def finish(self, empty_text: str = "⚠️ Nothing to show."):
+        """
+        Shows the whole text, waits for Telegram's rate limit if needed.
+        Placeholder is replaced with empty_text if no text was received.
+        """
+        if not self.text.strip():
+            self.text = empty_text
+        while True:
+            try:
+                await self._render()
+                return
+            except RetryAfter as e:
+                await asyncio.sleep(get_retry_after_seconds(e))
+
+    async def _render(self):
+        for i, chunk in enumerate(split_message(self.text.strip())):
+            if i == len(self._messages):
+                self._messages.append(await self.message.reply_text(chunk))
+                self._shown_texts.append(chunk)
+            elif chunk.strip() and chunk != self._shown_texts[i]:
+                await self._messages[i].edit_text(chunk)
+                self._shown_texts[i] = chunk
+        self._next_edit_at = time.monotonic() + self.edit_interval
+
+
+def get_retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if isinstance(retry_after, dt.timedelta):
+        return retry_after.total_seconds()
+    return retry_after
+
+
+async def iterate_in_thread(iterator: Iterator) -> AsyncIterator:
+    """Iterates blocking iterator in worker thread, so event loop is not blocked."""
+    end = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, end)
+        if item is end:
+            return
+        yield item
+
+
 def load_static_info_from_yaml(yaml_file, field: str):
     """Load prompts from the specified YAML file."""
     root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
@@ -0,0 +1,37 @@
+"""
+Moves articles older than retention period from database to Parquet archive.
+"""
+
+import argparse
+import datetime as dt
+from logging import getLogger
+
+from src.config.config import app_settings
+from src.config.logging_config import setup_logging
+from src.database.connection import bootstrap_schema, create_session
+from src.services.archive import archive_old_articles
+from src.services.datetime_util import DatetimeUtil
+
+logger = getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--older_than_days", type=int, default=app_settings.ARTICLES_RETENTION_DAYS
+    )
+    parser.add_argument("--archive_dir")
+    args = parser.parse_args()
+
+    setup_logging()
+    # 0 means that retention is disabled, archiving would delete everything up to today
+    if args.older_than_days <= 0:
+        logger.info(
+            f"Articles retention is disabled (older_than_days={args.older_than_days}). "
+            f"Nothing to archive."
+        )
+        raise SystemExit(0)
+    older_than = DatetimeUtil.utc_now().date() - dt.timedelta(days=args.older_than_days)
+
+    bootstrap_schema()
+    with create_session() as session:
+        archive_old_articles(session, older_than, args.archive_dir)
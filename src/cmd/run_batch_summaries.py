@@ -0,0 +1,36 @@
+"""
+Creates content summaries of articles without content summary and master summaries of all tickers
+for the given date (yesterday by default, as the nightly job) with batch jobs.
+Requests left unanswered are summarized by the interactive run.
+"""
+
+import argparse
+import datetime as dt
+
+from src.config.config import app_settings
+from src.config.logging_config import setup_logging
+from src.database.connection import bootstrap_schema
+from src.services.batch_jobs import create_and_save_summaries_in_batch
+from src.services.datetime_util import DatetimeUtil
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--as_of_date")
+    parser.add_argument(
+        "--backend",
+        choices=["openai", "local"],
+        help="Batch backend, LLM_BATCH_BACKEND setting by default.",
+    )
+    args = parser.parse_args()
+    if args.backend:
+        app_settings.LLM_BATCH_BACKEND = args.backend
+
+    setup_logging()
+    as_of_date = (
+        dt.datetime.strptime(args.as_of_date, "%Y-%m-%d")
+        if args.as_of_date
+        else DatetimeUtil.utc_yesterday()
+    )
+
+    bootstrap_schema()
+    create_and_save_summaries_in_batch(as_of_date.date())
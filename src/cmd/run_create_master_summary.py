@@ -1,19 +1,27 @@
 """
 Creates master summary based on all articles within previous business day
-and updates master_summary field of each db record with the generated summary.
+and saves it to daily_master_summaries table (one row per date and ticker).
 """
 
 import argparse
 import datetime as dt
 
-from src.database.connection import create_session
+from src.config.config import app_settings
+from src.database.connection import bootstrap_schema, create_session
 from src.services.summarizer import create_master_summary
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--as_of_date")
     parser.add_argument("--ticker")
+    parser.add_argument(
+        "--bypass_llm_cache",
+        action="store_true",
+        help="Call LLM even if response is cached (fresh response replaces cached one).",
+    )
     args = parser.parse_args()
+    if args.bypass_llm_cache:
+        app_settings.LLM_CACHE_BYPASS = True
 
     as_of_date = (
         dt.datetime.strptime(args.as_of_date, "%Y-%m-%d")
@@ -23,5 +31,6 @@ if __name__ == "__main__":
     as_of_date = as_of_date.date()
     ticker = args.ticker
 
+    bootstrap_schema()
     with create_session() as session:
         create_master_summary(session, as_of_date, ticker)
@@ -0,0 +1,46 @@
+"""
+Runs local stand-in of https://cryptonews-api.com API serving synthetic articles.
+Point CRYPTONEWS_API_URL setting to the printed url to pull articles from it.
+"""
+
+import argparse
+import datetime as dt
+from logging import getLogger
+
+from src.config.logging_config import setup_logging
+from src.services.cryptonews_stub_server import CryptonewsStubServer, generate_corpus
+
+logger = getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--as_of_date")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error_rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    setup_logging()
+    as_of_date = (
+        dt.datetime.strptime(args.as_of_date, "%Y-%m-%d")
+        if args.as_of_date
+        else dt.datetime.today()
+    )
+    as_of_date = as_of_date.date()
+
+    corpus = generate_corpus(args.articles, as_of_date, days=args.days)
+    server = CryptonewsStubServer(
+        corpus,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+    )
+    logger.info(
+        f"Serving {len(corpus)} articles on {server.url}. Press Ctrl+C to stop."
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
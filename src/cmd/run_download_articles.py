@@ -6,7 +6,7 @@ import argparse
 import datetime as dt
 from logging import getLogger
 
-from src.database.connection import create_session
+from src.database.connection import bootstrap_schema, create_session
 from src.services.pull_articles import pull_articles
 
 logger = getLogger(__name__)
@@ -23,5 +23,6 @@ if __name__ == "__main__":
     )
     as_of_date = as_of_date.date()
 
+    bootstrap_schema()
     with create_session() as session:
         pull_articles(session, as_of_date, test=False)
@@ -0,0 +1,136 @@
+"""
+Benchmarks articles ingestion against local stand-in of cryptonews API.
+
+Pulls articles for all tickers into a fresh database and reports articles per second,
+database queries per article and peak memory usage. Memory is traced in a separate pass
+because tracemalloc slows the code down considerably.
+WARNING: tables in --db_url database are dropped, use a scratch database only.
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import os
+import tempfile
+import tracemalloc
+from logging import getLogger
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.config.config import app_settings
+from src.config.constants import TICKERS
+from src.config.logging_config import setup_logging
+from src.database.async_connection import to_async_url
+from src.database.models import Base, CryptonewsArticlesDump
+from src.services.cryptonews_stub_server import CryptonewsStubServer, generate_corpus
+from src.services.pull_articles import pull_articles_for_tickers
+
+logger = getLogger(__name__)
+
+
+def pull_into_fresh_db(engine, as_of_date: dt.date, trace_memory: bool = False) -> dict:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    queries = [0]
+
+    def count_query(*args):
+        queries[0] += 1
+
+    async def pull():
+        async_engine = create_async_engine(to_async_url(db_url))
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count_query)
+        try:
+            async with async_sessionmaker(
+                bind=async_engine, expire_on_commit=False
+            )() as session:
+                await pull_articles_for_tickers(session, as_of_date, list(TICKERS))
+        finally:
+            await async_engine.dispose()
+
+    db_url = engine.url.render_as_string(hide_password=False)
+    if trace_memory:
+        tracemalloc.start()
+    start_time = dt.datetime.now()
+    try:
+        asyncio.run(pull())
+    except Exception as e:
+        logger.error(f"Articles pull finished with errors: {e}")
+    running_secs = (dt.datetime.now() - start_time).total_seconds()
+    if trace_memory:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    with sessionmaker(bind=engine)() as session:
+        articles = session.scalar(select(func.count(CryptonewsArticlesDump.id)))
+
+    stats = {"articles": articles, "seconds": running_secs, "queries": queries[0]}
+    if trace_memory:
+        stats["peak_memory"] = peak_memory
+    return stats
+
+
+def run(
+    n_articles: int,
+    latency: float,
+    error_rate: float,
+    db_url: str,
+    as_of_date: dt.date,
+) -> dict:
+    corpus = generate_corpus(n_articles, as_of_date)
+    server = CryptonewsStubServer(corpus, latency=latency, error_rate=error_rate)
+    server.start()
+
+    app_settings.CRYPTONEWS_API_URL = server.url
+    app_settings.HTTP_CACHE_ENABLED = False
+    engine = create_engine(db_url)
+
+    try:
+        stats = pull_into_fresh_db(engine, as_of_date)
+        api_requests = server.requests_count
+        memory_stats = pull_into_fresh_db(engine, as_of_date, trace_memory=True)
+    finally:
+        server.stop()
+        engine.dispose()
+
+    articles, running_secs = stats["articles"], stats["seconds"]
+    return {
+        "articles": articles,
+        "api_requests": api_requests,
+        "seconds": running_secs,
+        "articles_per_second": articles / running_secs if running_secs else 0,
+        "queries_per_article": stats["queries"] / articles if articles else 0,
+        "peak_memory_mb": memory_stats["peak_memory"] / 1024 / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error_rate", type=float, default=0.0)
+    parser.add_argument(
+        "--db_url", help="Scratch database url, its tables are dropped."
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_url = args.db_url or f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        stats = run(
+            args.articles,
+            args.latency,
+            args.error_rate,
+            db_url,
+            dt.date.today(),
+        )
+
+    logger.info(
+        f"Ingested {stats['articles']} articles with {stats['api_requests']} API requests "
+        f"in {stats['seconds']:.2f} seconds.\n"
+        f"Articles per second: {stats['articles_per_second']:.1f}\n"
+        f"Queries per article: {stats['queries_per_article']:.3f}\n"
+        f"Peak memory: {stats['peak_memory_mb']:.1f} MB"
+    )
@@ -0,0 +1,195 @@
+"""
+Benchmarks latency of hot article queries while the articles table grows.
+
+Fills a scratch database with synthetic articles (1000 per day) up to every size from --sizes
+and reports median latency of ticker/day selection, master summary lookup and news_url dedup lookup.
+Run with --without_indexes to compare with the schema before indexes were added.
+WARNING: tables in --db_url database are dropped, use a scratch database only.
+"""
+
+import argparse
+import datetime as dt
+import os
+import statistics
+import tempfile
+import time
+from logging import getLogger
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from src.config.constants import TICKERS
+from src.config.logging_config import setup_logging
+from src.services.cryptonews_stub_server import WORDS
+from src.database.database import (
+    get_articles_by_ticker,
+    get_master_summary,
+    search_articles,
+)
+from src.database.migrations import drop_schema, migrate
+from src.database.models import (
+    ArticleTicker,
+    Base,
+    CryptonewsArticlesDump,
+    DailyMasterSummary,
+)
+
+logger = getLogger(__name__)
+
+ARTICLES_PER_DAY = 1000
+BATCH_SIZE = 10000
+REPEATS = 20
+RARE_WORDS = 20000
+
+
+def get_rare_word(i: int) -> str:
+    """Returns one of RARE_WORDS words, real texts have long tail of rare words besides common ones."""
+    return f"term{i % RARE_WORDS}"
+
+
+def fill_articles(engine, start: int, end: int, first_date: dt.date):
+    tickers = list(TICKERS)
+    with engine.begin() as connection:
+        for batch_start in range(start, end, BATCH_SIZE):
+            ids = range(batch_start + 1, min(batch_start + BATCH_SIZE, end) + 1)
+            connection.execute(
+                insert(CryptonewsArticlesDump),
+                [
+                    {
+                        "id": i,
+                        "news_url": f"https://news.example.com/{i}",
+                        "title": f"{tickers[i % len(tickers)]} {WORDS[i % len(WORDS)]} "
+                        f"{get_rare_word(i * 7)} {get_rare_word(i * 13)}",
+                        "date": first_date + dt.timedelta(days=i // ARTICLES_PER_DAY),
+                        "tags": tickers[i % len(tickers)],
+                        "content_summary": (
+                            " ".join(
+                                WORDS[(i + j) * 11 % len(WORDS)] for j in range(12)
+                            )
+                            if i % 10
+                            else None
+                        ),
+                    }
+                    for i in ids
+                ],
+            )
+            connection.execute(
+                insert(ArticleTicker),
+                [{"article_id": i, "ticker": tickers[i % len(tickers)]} for i in ids],
+            )
+            # master summaries of days starting in the batch
+            dates = [
+                first_date + dt.timedelta(days=i // ARTICLES_PER_DAY)
+                for i in ids
+                if i == 1 or i % ARTICLES_PER_DAY == 0
+            ]
+            connection.execute(
+                insert(DailyMasterSummary),
+                [
+                    {
+                        "date": date,
+                        "ticker": ticker,
+                        "summary": f"Master summary of {ticker} for {date}",
+                        "article_ids": [],
+                        "created_at": dt.datetime.now(),
+                    }
+                    for date in dates
+                    for ticker in tickers
+                ],
+            )
+        # refresh planner statistics like autovacuum does on Postgres
+        connection.exec_driver_sql("ANALYZE")
+
+
+def measure(func) -> float:
+    """Returns median latency of func in milliseconds."""
+    latencies = []
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(latencies)
+
+
+def run(sizes, db_url: str, with_indexes: bool = True):
+    engine = create_engine(db_url)
+    drop_schema(engine)
+    if with_indexes:
+        migrate(engine)
+    else:
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for model in (CryptonewsArticlesDump, ArticleTicker):
+                for index in model.__table__.indexes:
+                    index.drop(connection)
+
+    first_date = dt.date(2020, 1, 1)
+    filled = 0
+    results = []
+    for size in sorted(sizes):
+        fill_articles(engine, filled, size, first_date)
+        filled = size
+
+        last_date = first_date + dt.timedelta(days=(size - 1) // ARTICLES_PER_DAY)
+        urls = [f"https://news.example.com/{i}" for i in range(size - 499, size + 1)]
+        with sessionmaker(bind=engine)() as session:
+            results.append(
+                {
+                    "size": size,
+                    "articles_by_ticker_ms": measure(
+                        lambda: get_articles_by_ticker(
+                            session, last_date, "BTC", empty_content_summary=True
+                        )
+                    ),
+                    "master_summary_ms": measure(
+                        lambda: get_master_summary(session, last_date, "BTC")
+                    ),
+                    "dedup_lookup_ms": measure(
+                        lambda: session.scalars(
+                            select(CryptonewsArticlesDump.news_url).where(
+                                CryptonewsArticlesDump.news_url.in_(urls)
+                            )
+                        ).all()
+                    ),
+                }
+            )
+            if with_indexes:
+                results[-1]["search_ms"] = measure(
+                    lambda: search_articles(
+                        session,
+                        "regulation term1234",
+                        "BTC",
+                        last_date - dt.timedelta(days=30),
+                    )
+                )
+        logger.info(f"Measured queries for {size} articles: {results[-1]}")
+
+    engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--without_indexes", action="store_true")
+    parser.add_argument(
+        "--db_url", help="Scratch database url, its tables are dropped."
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_url = args.db_url or f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        results = run(sizes, db_url, with_indexes=not args.without_indexes)
+
+    lines = [
+        f"{'articles':>10} {'by ticker':>12} {'master':>12} {'dedup':>12} {'search':>12}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['size']:>10} {result['articles_by_ticker_ms']:>10.2f}ms "
+            f"{result['master_summary_ms']:>10.2f}ms {result['dedup_lookup_ms']:>10.2f}ms "
+            + (f"{result['search_ms']:>10.2f}ms" if "search_ms" in result else "")
+        )
+    logger.info("Query latency (median):\n" + "\n".join(lines))
@@ -17,8 +17,73 @@ class AppSettings(BaseSettings):
     DEBUG_MODE: bool
 
     DB_CONNECTION_STRING: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    ARTICLES_READ_BATCH_SIZE: int = 1000
+    CONTENT_SUMMARY_WRITE_BATCH_SIZE: int = 50
+    # short articles are summarized together in requests of up to that many tokens, 0 disables it
+    CONTENT_SUMMARY_BATCH_TOKENS: int = 6000
+    CONTENT_SUMMARY_BATCH_MAX_ARTICLES: int = 10
+    # articles older than ARTICLES_RETENTION_DAYS are moved to Parquet archive, 0 disables the job
+    ARTICLES_RETENTION_DAYS: int = 90
+    ARCHIVE_DIR: str = None
 
     CRYPTONEWS_API_KEY: str
+    CRYPTONEWS_API_URL: str = "https://cryptonews-api.com"
+    CRYPTONEWS_MAX_CONCURRENT_REQUESTS: int = 8
+    CRYPTONEWS_REQUEST_TIMEOUT: float = 30.0
+    # 'batch' pulls articles once a day, 'streaming' polls API every INGESTION_POLL_INTERVAL_MINUTES
+    INGESTION_MODE: str = "batch"
+    INGESTION_POLL_INTERVAL_MINUTES: int = 10
+
+    SCRAPER_MAX_WORKERS: int = 16
+    SCRAPER_PER_DOMAIN_LIMIT: int = 2
+    SCRAPER_MAX_RESPONSE_BYTES: int = 2_000_000
+    SCRAPER_REQUEST_TIMEOUT: float = 15.0
+
+    NEAR_DUPLICATE_DETECTION: bool = True
+    NEAR_DUPLICATE_MAX_DISTANCE: int = 6
+    NEAR_DUPLICATE_WINDOW_DAYS: int = 3
+
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_DIR: str = None
+    HTTP_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    CRYPTONEWS_CACHE_TTL: int = 300
+    ARTICLE_CACHE_TTL: int = 7 * 24 * 3600
+
+    # client-side limits of every LLM provider, set them to the quota of your account
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200_000
+    LLM_MAX_CONCURRENT_REQUESTS: int = 8
+    LLM_EXPECTED_COMPLETION_TOKENS: int = 300
+    LLM_MAX_RETRIES: int = 5
+    LLM_BACKOFF_BASE_SECONDS: float = 1.0
+    LLM_REQUEST_TIMEOUT: float = 120.0
+    # provider is skipped for LLM_CIRCUIT_RESET_SECONDS after that many consecutive failures
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: int = 60
+    # longer inputs are summarized with map-reduce in chunks of SUMMARY_TOKEN_BUDGET tokens,
+    # chunk summaries are merged by SUMMARY_REDUCE_FAN_IN (at least 2) at a time
+    SUMMARY_TOKEN_BUDGET: int = 32_000
+    SUMMARY_REDUCE_FAN_IN: int = 8
+    # longer texts are shrunk to their most important sentences before summarization, 0 disables it;
+    # texts exceeding SUMMARY_TOKEN_BUDGET are not shrunk, they are summarized with map-reduce
+    EXTRACTIVE_TOKEN_BUDGET: int = 6000
+    # nightly summaries are requested with batch job ('openai' Batch API or 'local' stand-in)
+    # and only the rest is summarized interactively at 5:00
+    LLM_BATCH_MODE: bool = False
+    LLM_BATCH_BACKEND: str = "openai"
+    LLM_BATCH_DIR: str = None
+    LLM_BATCH_POLL_INTERVAL: int = 60
+    LLM_BATCH_TIMEOUT: int = 4 * 3600
+
+    LLM_CACHE_ENABLED: bool = True
+    # bypassed cache is not read, but fresh responses are still stored
+    LLM_CACHE_BYPASS: bool = False
+    LLM_CACHE_PATH: str = None
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_TTL: int = 30 * 24 * 3600
 
     OPENAI_API_KEY: str
     OPENROUTER_API_KEY: str
@@ -30,6 +95,9 @@ class AppSettings(BaseSettings):
     ADMIN_USER_IDS: List[str] = []
     TELEGRAM_BOT_TOKEN: str
     GROUP_CHAT_ID: int
+    SEARCH_RESULTS_LIMIT: int = 10
+    # minimal interval between edits of a message streaming LLM's answer
+    TELEGRAM_EDIT_INTERVAL: float = 1.5
 
     DISCORD_BOT_TOKEN: str
     DISCORD_CHANNEL_ID: int
@@ -67,6 +135,7 @@ app_settings.HUGGINGFACE_HEADERS = {
 
 logger.info(f"CONFIG (DEBUG_MODE): {app_settings.DEBUG_MODE}")
 logger.info(f"CONFIG (LANGUAGE_MODEL): {app_settings.LANGUAGE_MODEL}")
+logger.info(f"CONFIG (INGESTION_MODE): {app_settings.INGESTION_MODE}")
 logger.info(f"CONFIG (GROUP_CHAT_ID): {app_settings.GROUP_CHAT_ID}")
 logger.info(f"CONFIG (ADMIN_USER_IDS): {app_settings.ADMIN_USER_IDS}")
 logger.info(f"CONFIG (CONTENT_SUMMARY_PROMPT): {app_settings.CONTENT_SUMMARY_PROMPT}")
@@ -0,0 +1,6 @@
+from src.config.logging_config import setup_logging
+from src.database.connection import bootstrap_schema
+
+if __name__ == "__main__":
+    setup_logging()
+    bootstrap_schema(drop_table=False)
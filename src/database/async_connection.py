@@ -0,0 +1,67 @@
+"""
+Async engines and sessions (SQLAlchemy asyncio extension) used inside the bot's event loop.
+
+Connection string from settings is reused with its async driver: asyncpg for Postgres
+and aiosqlite for SQLite. Schema is bootstrapped by the synchronous engine on start.
+"""
+
+from logging import getLogger
+from typing import Dict
+
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.config.config import app_settings
+from src.database.connection import get_engine_options
+
+logger = getLogger(__name__)
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+# engines are bound to the event loop they were used in, one loop runs per process
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_session_factories: Dict[str, async_sessionmaker] = {}
+
+
+def to_async_url(db_url: str) -> str:
+    """Replaces sync driver of connection string with the async one, e.g. psycopg2 -> asyncpg."""
+    url = make_url(db_url)
+    async_driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if async_driver is None:
+        return db_url
+    return url.set(
+        drivername=f"{url.get_backend_name()}+{async_driver}"
+    ).render_as_string(hide_password=False)
+
+
+def get_async_engine(db_url: str = None) -> AsyncEngine:
+    """Returns pooled async engine for db_url, the engine is created once per process."""
+    db_url = db_url or app_settings.DB_CONNECTION_STRING
+    engine = _async_engines.get(db_url)
+    if engine is None:
+        engine = create_async_engine(to_async_url(db_url), **get_engine_options(db_url))
+        _async_engines[db_url] = engine
+        # loaded objects stay usable after commit, lazy loads are not possible in async code
+        _async_session_factories[db_url] = async_sessionmaker(
+            bind=engine, expire_on_commit=False
+        )
+    return engine
+
+
+def create_async_session(db_url: str = None) -> AsyncSession:
+    db_url = db_url or app_settings.DB_CONNECTION_STRING
+    get_async_engine(db_url)
+    return _async_session_factories[db_url]()
+
+
+async def dispose_async_engines():
+    """Closes all pooled async connections, e.g. before process shutdown."""
+    for engine in _async_engines.values():
+        await engine.dispose()
+    _async_engines.clear()
+    _async_session_factories.clear()
@@ -0,0 +1,78 @@
+"""
+Async versions of repository functions from src/database/database.py for the bot's event loop.
+
+Simple lookups are native async queries. Bulk writes run the synchronous repository functions
+through AsyncSession.run_sync, which executes them on the async driver without blocking the loop.
+"""
+
+import datetime as dt
+from typing import List, Tuple
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import database
+from src.database.models import (
+    CryptonewsArticlesDump,
+    DailyMasterSummary,
+    IngestionWatermark,
+)
+
+
+async def get_daily_master_summary(
+    session: AsyncSession, start_date: dt.date, ticker: str
+) -> DailyMasterSummary | None:
+    """Load master summary of ticker for the date with its generation metadata."""
+    return await session.get(DailyMasterSummary, (start_date, ticker))
+
+
+async def get_master_summary(
+    session: AsyncSession, start_date: dt.date, ticker: str
+) -> str | None:
+    """Load master summary of ticker for the date from database."""
+    master_summary = await get_daily_master_summary(session, start_date, ticker)
+    return master_summary.summary if master_summary else None
+
+
+async def get_watermark(
+    session: AsyncSession, ticker: str, source: str
+) -> IngestionWatermark | None:
+    """Load ingestion watermark for ticker and source."""
+    return await session.get(IngestionWatermark, (ticker, source))
+
+
+async def update_watermark(
+    session: AsyncSession,
+    ticker: str,
+    source: str,
+    newest_date: dt.datetime,
+    newest_news_url: str,
+):
+    """Move ingestion watermark forward if newest_date is newer than the stored one."""
+    await session.run_sync(
+        database.update_watermark, ticker, source, newest_date, newest_news_url
+    )
+
+
+async def save_articles_to_db(
+    session: AsyncSession,
+    cryptonews_articles: List[CryptonewsArticlesDump],
+    batch_size: int = 500,
+) -> Tuple[int, int]:
+    """Insert articles and link them with their tickers, see database.save_articles_to_db."""
+    return await session.run_sync(
+        database.save_articles_to_db, cryptonews_articles, batch_size
+    )
+
+
+async def search_articles(
+    session: AsyncSession,
+    query: str,
+    ticker: str = None,
+    since_date: dt.date = None,
+    limit: int = 10,
+) -> List[Row]:
+    """Full-text search of articles, see database.search_articles."""
+    return await session.run_sync(
+        database.search_articles, query, ticker, since_date, limit
+    )
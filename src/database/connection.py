@@ -1,28 +1,76 @@
+import threading
 from logging import getLogger
+from typing import Dict
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.config.config import app_settings
+from src.database.migrations import migrate
 from src.database.models import CryptonewsArticlesDump, Base
 
 logger = getLogger(__name__)
 
+# process-wide engines and session factories keyed by connection string
+_engines: Dict[str, Engine] = {}
+_session_factories: Dict[str, sessionmaker] = {}
+_bootstrapped_urls = set()
+_lock = threading.Lock()
 
-def create_session():
-    engine = create_engine(app_settings.DB_CONNECTION_STRING)
-    Session = sessionmaker(bind=engine)
-    return Session()
 
+def get_engine(db_url: str = None) -> Engine:
+    """Returns pooled engine for db_url, the engine is created once per process."""
+    db_url = db_url or app_settings.DB_CONNECTION_STRING
+    with _lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            engine = create_engine(db_url, **get_engine_options(db_url))
+            _engines[db_url] = engine
+            _session_factories[db_url] = sessionmaker(bind=engine)
+    return engine
 
-def run(drop_table: bool = False):
-    engine = create_engine(app_settings.DB_CONNECTION_STRING)
+
+def get_engine_options(db_url: str) -> dict:
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": app_settings.DB_POOL_RECYCLE,
+    }
+    # SQLite uses its own pool implementations without size settings
+    if not db_url.startswith("sqlite"):
+        options["pool_size"] = app_settings.DB_POOL_SIZE
+        options["max_overflow"] = app_settings.DB_MAX_OVERFLOW
+    return options
+
+
+def create_session(db_url: str = None):
+    db_url = db_url or app_settings.DB_CONNECTION_STRING
+    get_engine(db_url)
+    return _session_factories[db_url]()
+
+
+def dispose_engines():
+    """Closes all pooled connections, e.g. before process shutdown."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _session_factories.clear()
+
+
+def bootstrap_schema(drop_table: bool = False, db_url: str = None):
+    """Apply schema migrations once per process. Must be called on application start."""
+    db_url = db_url or app_settings.DB_CONNECTION_STRING
+    if db_url in _bootstrapped_urls and not drop_table:
+        return
+
+    engine = get_engine(db_url)
     if drop_table:
         CryptonewsArticlesDump.__table__.drop(engine)
+        Base.metadata.create_all(engine)
 
-    logger.info("Create tables in the database (if they don't exist).")
-    Base.metadata.create_all(engine)
+    logger.info(
+        "Migrate database schema (create tables and indexes if they don't exist)."
+    )
+    migrate(engine)
+    _bootstrapped_urls.add(db_url)
     logger.info("Success.")
-
-
-run(drop_table=False)
@@ -1,10 +1,35 @@
 import datetime as dt
+import re
 from logging import getLogger
-from typing import List
+from typing import Dict, Iterator, List, Set, Tuple
 
-from sqlalchemy import and_, or_
+from sqlalchemy import (
+    Row,
+    Select,
+    and_,
+    column,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from src.database.models import CryptonewsArticlesDump
+from src.database.migrations import ARTICLES_FTS_TABLE
+from src.database.models import (
+    ArticleFingerprint,
+    ArticleLshBand,
+    ArticleTicker,
+    CryptonewsArticlesDump,
+    DailyMasterSummary,
+    IngestionWatermark,
+)
 
 logger = getLogger(__name__)
 
@@ -26,70 +51,504 @@ def get_articles_by_ticker(
     start_date: dt.date,
     ticker: str,
     empty_content_summary: bool = None,
-    empty_master_summary: bool = None,
 ):
-    """Load CryptonewsArticlesDump objects from database."""
+    """Load CryptonewsArticlesDump objects referenced by ticker from database."""
+
+    result = (
+        session.query(CryptonewsArticlesDump)
+        .join(ArticleTicker, ArticleTicker.article_id == CryptonewsArticlesDump.id)
+        .filter(
+            and_(*get_article_conditions(start_date, ticker, empty_content_summary))
+        )
+        .all()
+    )
+    return result
 
-    # TODO: carefully select records based on date (take care of timezone)
-    all_conditions = [
-        CryptonewsArticlesDump.date == start_date,
-        CryptonewsArticlesDump.tags == ticker,
-    ]
 
+def get_article_conditions(
+    start_date: dt.date = None, ticker: str = None, empty_content_summary: bool = None
+) -> list:
+    """Filter conditions of article queries, ticker condition requires join with ArticleTicker."""
+
+    # TODO: carefully select records based on date (take care of timezone)
+    conditions = []
+    if start_date:
+        conditions.append(CryptonewsArticlesDump.date == start_date)
+    if ticker:
+        conditions.append(ArticleTicker.ticker == ticker)
     if empty_content_summary is not None:
-        if empty_content_summary:
-            content_summary_condition = or_(
-                CryptonewsArticlesDump.content_summary.is_(None),
-                CryptonewsArticlesDump.content_summary == "",
-            )
-        else:
-            content_summary_condition = and_(
-                CryptonewsArticlesDump.content_summary.isnot(None),
-                CryptonewsArticlesDump.content_summary != "",
-            )
-        all_conditions.append(content_summary_condition)
+        conditions.append(
+            is_empty(CryptonewsArticlesDump.content_summary, empty_content_summary)
+        )
+    return conditions
 
-    if empty_master_summary is not None:
-        if empty_master_summary:
-            master_summary_condition = or_(
-                CryptonewsArticlesDump.master_summary.is_(None),
-                CryptonewsArticlesDump.master_summary == "",
-            )
-        else:
-            master_summary_condition = and_(
-                CryptonewsArticlesDump.master_summary.isnot(None),
-                CryptonewsArticlesDump.master_summary != "",
-            )
-        all_conditions.append(master_summary_condition)
 
-    result = session.query(CryptonewsArticlesDump).filter(and_(*all_conditions)).all()
-    return result
+def select_article_columns(
+    columns,
+    start_date: dt.date = None,
+    ticker: str = None,
+    empty_content_summary: bool = None,
+) -> Select:
+    statement = select(*columns)
+    if ticker:
+        statement = statement.join(
+            ArticleTicker, ArticleTicker.article_id == CryptonewsArticlesDump.id
+        )
+    return statement.where(
+        and_(true(), *get_article_conditions(start_date, ticker, empty_content_summary))
+    )
+
+
+def iter_article_rows(
+    session,
+    columns,
+    start_date: dt.date = None,
+    ticker: str = None,
+    empty_content_summary: bool = None,
+    batch_size: int = 1000,
+) -> Iterator[Row]:
+    """
+    Stream rows with the requested CryptonewsArticlesDump columns only.
+
+    Rows are plain named tuples (not tracked by the session) fetched batch_size at a time,
+    on Postgres through a server-side cursor. Session must not be committed while iterating,
+    use iter_article_batches for consumers writing to database.
+    """
+    statement = select_article_columns(
+        columns, start_date, ticker, empty_content_summary
+    )
+    yield from session.execute(
+        statement.order_by(CryptonewsArticlesDump.id),
+        execution_options={"yield_per": batch_size},
+    )
+
+
+def iter_article_batches(
+    session,
+    columns,
+    start_date: dt.date = None,
+    ticker: str = None,
+    empty_content_summary: bool = None,
+    batch_size: int = 1000,
+) -> Iterator[List[Row]]:
+    """
+    Load rows with the requested CryptonewsArticlesDump columns in batches ordered by id.
+
+    Every batch is a separate keyset query (id greater than the last seen), so the consumer
+    may update and commit rows between batches. Columns must include CryptonewsArticlesDump.id.
+    """
+    statement = select_article_columns(
+        columns, start_date, ticker, empty_content_summary
+    )
+    last_id = None
+    while True:
+        batch_statement = statement
+        if last_id is not None:
+            batch_statement = batch_statement.where(CryptonewsArticlesDump.id > last_id)
+        rows = session.execute(
+            batch_statement.order_by(CryptonewsArticlesDump.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def is_empty(column, empty: bool):
+    """Condition checking that string column is (not) NULL or empty."""
+    if empty:
+        return or_(column.is_(None), column == "")
+    return and_(column.isnot(None), column != "")
+
+
+def get_daily_master_summary(
+    session, start_date: dt.date, ticker: str
+) -> DailyMasterSummary | None:
+    """Load master summary of ticker for the date with its generation metadata."""
+    return session.get(DailyMasterSummary, (start_date, ticker))
 
 
 def get_master_summary(session, start_date: dt.date, ticker: str) -> str | None:
-    """Load CryptonewsArticlesDump objects from database."""
+    """Load master summary of ticker for the date from database."""
+    master_summary = get_daily_master_summary(session, start_date, ticker)
+    return master_summary.summary if master_summary else None
 
-    master_summary = (
-        session.query(CryptonewsArticlesDump.master_summary)
-        .filter(
+
+def save_master_summary(
+    session,
+    start_date: dt.date,
+    ticker: str,
+    master_summary: str,
+    article_ids: List[int],
+    usage: Dict = None,
+):
+    """Save (or replace) ticker's master summary for the date."""
+    usage = usage or {}
+    session.merge(
+        DailyMasterSummary(
+            date=start_date,
+            ticker=ticker,
+            summary=master_summary,
+            model=usage.get("model"),
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            article_ids=sorted(article_ids),
+            created_at=dt.datetime.now(dt.timezone.utc).replace(tzinfo=None),
+        )
+    )
+    session.commit()
+
+
+def search_articles(
+    session,
+    query: str,
+    ticker: str = None,
+    since_date: dt.date = None,
+    limit: int = 10,
+) -> List[Row]:
+    """
+    Full-text search over title, text, body and content summary of articles.
+    Returns (id, date, title, news_url) rows ordered by relevance, best match first.
+    """
+    columns = (
+        CryptonewsArticlesDump.id,
+        CryptonewsArticlesDump.date,
+        CryptonewsArticlesDump.title,
+        CryptonewsArticlesDump.news_url,
+    )
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        search_vector = literal_column("cryptonews_articles_dump.search_vector")
+        ts_query = func.websearch_to_tsquery("english", query)
+        rank = func.ts_rank_cd(search_vector, ts_query)
+        statement = (
+            select(*columns)
+            .where(search_vector.op("@@")(ts_query))
+            .order_by(rank.desc())
+        )
+    elif dialect_name == "sqlite":
+        # every word is quoted, so user input can't break FTS5 query syntax
+        fts_query = " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+        if not fts_query:
+            return []
+        fts = table(ARTICLES_FTS_TABLE, column("rowid"))
+        fts_table = literal_column(ARTICLES_FTS_TABLE)
+        # weights of title, text, body and content_summary columns
+        rank = func.bm25(fts_table, 10.0, 2.0, 1.0, 5.0)
+        statement = (
+            select(*columns)
+            .join(fts, fts.c.rowid == CryptonewsArticlesDump.id)
+            .where(fts_table.op("MATCH")(fts_query))
+            .order_by(rank)
+        )
+    else:
+        raise NotImplementedError(
+            f"Full-text search is not supported for '{dialect_name}' database."
+        )
+
+    if ticker:
+        statement = statement.join(
+            ArticleTicker, ArticleTicker.article_id == CryptonewsArticlesDump.id
+        ).where(ArticleTicker.ticker == ticker)
+    if since_date:
+        statement = statement.where(CryptonewsArticlesDump.date >= since_date)
+    return session.execute(statement.limit(limit)).all()
+
+
+def get_articles_without_body(session, start_date: dt.date):
+    """Load (id, news_url) of articles which were not scraped yet."""
+
+    return session.execute(
+        select(CryptonewsArticlesDump.id, CryptonewsArticlesDump.news_url).where(
             and_(
                 CryptonewsArticlesDump.date == start_date,
-                CryptonewsArticlesDump.tags == ticker,
+                CryptonewsArticlesDump.body.is_(None),
             )
         )
-        .first()
+    ).all()
+
+
+def bulk_update_articles(session, rows: List[dict]):
+    """Update CryptonewsArticlesDump records by primary key. Every row must contain 'id' key."""
+
+    if rows:
+        session.execute(update(CryptonewsArticlesDump), rows)
+    session.commit()
+
+
+class ArticleWriter:
+    """
+    Buffers column updates of CryptonewsArticlesDump rows and writes them with bulk UPDATE
+    by primary key every batch_size rows, committing each batch.
+
+    Used as a context manager it writes the buffered rows on exit, also when the block raises,
+    so results which were already produced are not lost.
+    """
+
+    def __init__(self, session, batch_size: int):
+        self.session = session
+        self.batch_size = batch_size
+        self.written = 0
+        self._rows = []
+
+    def add(self, article_id: int, **values):
+        self._rows.append({"id": article_id, **values})
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        bulk_update_articles(self.session, self._rows)
+        self.written += len(self._rows)
+        logger.info(f"Written {self.written} updated articles to db.")
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            # discard partial state of the failed statement before writing finished rows
+            self.session.rollback()
+        self.flush()
+
+
+def save_articles_to_db(
+    session, cryptonews_articles: List[CryptonewsArticlesDump], batch_size: int = 500
+) -> Tuple[int, int]:
+    """
+    Insert list of CryptonewsArticlesDump objects to database and link them with their tickers.
+
+    Articles whose news_url is already stored (or repeated in the list) are not inserted again,
+    they are only linked with the ticker of the new copy. Every batch costs one IN (...) lookup
+    and one executemany INSERT ... ON CONFLICT DO NOTHING per table, so rows inserted concurrently
+    by another process are skipped as well and only linked. Returns (inserted, skipped) counts of articles.
+    """
+    inserted, skipped = 0, 0
+    for start in range(0, len(cryptonews_articles), batch_size):
+        batch = cryptonews_articles[start : start + batch_size]
+
+        news_urls = {article.news_url for article in batch}
+        article_ids = dict(
+            session.execute(
+                select(
+                    CryptonewsArticlesDump.news_url, CryptonewsArticlesDump.id
+                ).where(CryptonewsArticlesDump.news_url.in_(news_urls))
+            ).all()
+        )
+
+        rows = []
+        for article in batch:
+            if article.news_url in article_ids:
+                skipped += 1
+                continue
+            article_ids[article.news_url] = None
+            rows.append(article_to_row(article))
+
+        if rows:
+            inserted_ids = session.execute(
+                insert_ignoring_conflicts(
+                    session, CryptonewsArticlesDump, "news_url"
+                ).returning(CryptonewsArticlesDump.news_url, CryptonewsArticlesDump.id),
+                rows,
+            ).all()
+            article_ids.update(inserted_ids)
+            inserted += len(inserted_ids)
+            skipped += len(rows) - len(inserted_ids)
+
+            # articles inserted concurrently by another process aren't returned, they are
+            # looked up again, the watermark won't let them be fetched on the next run
+            conflicting_urls = {
+                row["news_url"] for row in rows if not article_ids[row["news_url"]]
+            }
+            if conflicting_urls:
+                article_ids.update(
+                    session.execute(
+                        select(
+                            CryptonewsArticlesDump.news_url, CryptonewsArticlesDump.id
+                        ).where(CryptonewsArticlesDump.news_url.in_(conflicting_urls))
+                    ).all()
+                )
+
+        link_articles_to_tickers(
+            session,
+            {
+                (article_ids[article.news_url], article.tags)
+                for article in batch
+                if article_ids.get(article.news_url)
+            },
+        )
+
+    session.commit()
+    logger.info(f"Saved articles to db: {inserted} inserted, {skipped} skipped.")
+    return inserted, skipped
+
+
+def insert_ignoring_conflicts(session, model, *index_elements: str):
+    """
+    INSERT ... ON CONFLICT DO NOTHING statement on Postgres and SQLite.
+    Other dialects get plain INSERT, duplicates are filtered out by the caller's lookup anyway.
+    """
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        return postgresql_insert(model).on_conflict_do_nothing(
+            index_elements=index_elements
+        )
+    if dialect_name == "sqlite":
+        return sqlite_insert(model).on_conflict_do_nothing(
+            index_elements=index_elements
+        )
+    return insert(model)
+
+
+def link_articles_to_tickers(session, article_tickers: Set[Tuple[int, str]]):
+    """Insert missing (article_id, ticker) associations."""
+
+    article_tickers = {
+        (article_id, ticker) for article_id, ticker in article_tickers if ticker
+    }
+    if not article_tickers:
+        return
+
+    known_article_tickers = set(
+        session.execute(
+            select(ArticleTicker.article_id, ArticleTicker.ticker).where(
+                ArticleTicker.article_id.in_(
+                    {article_id for article_id, _ in article_tickers}
+                )
+            )
+        ).all()
+    )
+    rows = [
+        {"article_id": article_id, "ticker": ticker}
+        for article_id, ticker in article_tickers - known_article_tickers
+    ]
+    if rows:
+        session.execute(insert(ArticleTicker), rows)
+
+
+def article_to_row(article: CryptonewsArticlesDump) -> dict:
+    """Convert CryptonewsArticlesDump object to a dict of column values (without id)."""
+    return {
+        column.key: getattr(article, column.key)
+        for column in CryptonewsArticlesDump.__table__.columns
+        if column.key != "id"
+    }
+
+
+def get_watermark(session, ticker: str, source: str) -> IngestionWatermark | None:
+    """Load ingestion watermark for ticker and source."""
+
+    return session.get(IngestionWatermark, (ticker, source))
+
+
+def update_watermark(
+    session, ticker: str, source: str, newest_date: dt.datetime, newest_news_url: str
+):
+    """Move ingestion watermark forward if newest_date is newer than the stored one."""
+
+    watermark = get_watermark(session, ticker, source)
+    if watermark is None:
+        watermark = IngestionWatermark(ticker=ticker, source=source)
+        session.add(watermark)
+    elif watermark.newest_date >= newest_date:
+        return
+
+    watermark.newest_date = newest_date
+    watermark.newest_news_url = newest_news_url
+    watermark.updated_at = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    session.commit()
+
+
+def get_fingerprints(session, article_ids: List[int]) -> Dict[int, int]:
+    """Load {article_id: cluster_id} of already fingerprinted articles."""
+
+    if not article_ids:
+        return {}
+    return dict(
+        session.execute(
+            select(ArticleFingerprint.article_id, ArticleFingerprint.cluster_id).where(
+                ArticleFingerprint.article_id.in_(article_ids)
+            )
+        ).all()
     )
-    return master_summary[0] if master_summary else None
 
 
-def save_articles_to_db(session, cryptonews_articles: List[CryptonewsArticlesDump]):
-    """Insert list of CryptonewsArticlesDump objects to database."""
+def get_lsh_candidates(
+    session,
+    bands: Set[Tuple[int, int]],
+    since_date: dt.date = None,
+    batch_size: int = 500,
+):
+    """
+    Load (band, value, article_id, simhash, cluster_id) of articles sharing any of the bands
+    and published on or after since_date.
+    """
 
-    for article in cryptonews_articles:
-        q = session.query(CryptonewsArticlesDump.id).filter(
-            CryptonewsArticlesDump.news_url == article.news_url
+    bands = list(bands)
+    date_condition = CryptonewsArticlesDump.date >= since_date if since_date else true()
+    candidates = []
+    for start in range(0, len(bands), batch_size):
+        candidates.extend(
+            session.execute(
+                select(
+                    ArticleLshBand.band,
+                    ArticleLshBand.value,
+                    ArticleLshBand.article_id,
+                    ArticleFingerprint.simhash,
+                    ArticleFingerprint.cluster_id,
+                )
+                .join(
+                    ArticleFingerprint,
+                    ArticleFingerprint.article_id == ArticleLshBand.article_id,
+                )
+                .join(
+                    CryptonewsArticlesDump,
+                    CryptonewsArticlesDump.id == ArticleLshBand.article_id,
+                )
+                .where(
+                    and_(
+                        tuple_(ArticleLshBand.band, ArticleLshBand.value).in_(
+                            bands[start : start + batch_size]
+                        ),
+                        date_condition,
+                    )
+                )
+            ).all()
         )
-        is_already_in_db = session.query(q.exists()).scalar()
-        if not is_already_in_db:
-            session.add(article)
+    return candidates
+
+
+def save_fingerprints(session, fingerprints: List[dict], bands: List[dict]):
+    """Insert article fingerprints and their LSH bands."""
+
+    if fingerprints:
+        session.execute(insert(ArticleFingerprint), fingerprints)
+    if bands:
+        session.execute(insert(ArticleLshBand), bands)
     session.commit()
+
+
+def get_cluster_summaries(session, cluster_ids: Set[int]) -> Dict[int, str]:
+    """Load {cluster_id: content_summary} for clusters having an already summarized article."""
+
+    if not cluster_ids:
+        return {}
+    return dict(
+        session.execute(
+            select(
+                ArticleFingerprint.cluster_id, CryptonewsArticlesDump.content_summary
+            )
+            .join(
+                CryptonewsArticlesDump,
+                CryptonewsArticlesDump.id == ArticleFingerprint.article_id,
+            )
+            .where(
+                and_(
+                    ArticleFingerprint.cluster_id.in_(cluster_ids),
+                    is_empty(CryptonewsArticlesDump.content_summary, False),
+                )
+            )
+        ).all()
+    )
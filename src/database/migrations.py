@@ -0,0 +1,379 @@
+"""
+Schema migrations applied on application start by bootstrap_schema.
+
+Every migration is a function receiving a connection. Migrations are applied in order inside
+their own transaction and applied versions are recorded in schema_migrations table.
+Migrations must be idempotent because create_all in the first migration creates tables
+with the latest indexes for new databases.
+"""
+
+import datetime as dt
+from logging import getLogger
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Engine,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    and_,
+    bindparam,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    update,
+)
+
+from src.database.models import (
+    ArticleFingerprint,
+    ArticleLshBand,
+    ArticleTicker,
+    Base,
+    CryptonewsArticlesDump,
+    DailyMasterSummary,
+)
+
+logger = getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def create_tables(connection: Connection):
+    Base.metadata.create_all(connection)
+
+
+def link_legacy_articles_to_tickers(connection: Connection):
+    """Link articles stored before article_tickers table existed using legacy tags column."""
+    not_linked = ~(
+        select(ArticleTicker.article_id)
+        .where(ArticleTicker.article_id == CryptonewsArticlesDump.id)
+        .exists()
+    )
+    result = connection.execute(
+        insert(ArticleTicker).from_select(
+            ["article_id", "ticker"],
+            select(
+                CryptonewsArticlesDump.id,
+                CryptonewsArticlesDump.tags,
+            ).where(and_(CryptonewsArticlesDump.tags.isnot(None), not_linked)),
+        )
+    )
+    if result.rowcount:
+        logger.info(f"Linked {result.rowcount} legacy articles with their tickers.")
+
+
+def deduplicate_news_urls(connection: Connection):
+    """Merge rows with the same news_url into the oldest one before unique index is created."""
+    keepers = (
+        select(
+            CryptonewsArticlesDump.news_url,
+            func.min(CryptonewsArticlesDump.id).label("keeper_id"),
+        )
+        .group_by(CryptonewsArticlesDump.news_url)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    duplicates = connection.execute(
+        select(CryptonewsArticlesDump.id, keepers.c.keeper_id).join(
+            keepers,
+            and_(
+                CryptonewsArticlesDump.news_url == keepers.c.news_url,
+                CryptonewsArticlesDump.id != keepers.c.keeper_id,
+            ),
+        )
+    ).all()
+    if not duplicates:
+        return
+
+    keeper_ids = dict(duplicates)
+    duplicate_ids = list(keeper_ids)
+    merge_duplicate_columns(connection, keeper_ids)
+    duplicate_tickers = connection.execute(
+        select(ArticleTicker.article_id, ArticleTicker.ticker).where(
+            ArticleTicker.article_id.in_(duplicate_ids)
+        )
+    ).all()
+    known_tickers = set(
+        connection.execute(
+            select(ArticleTicker.article_id, ArticleTicker.ticker).where(
+                ArticleTicker.article_id.in_(set(keeper_ids.values()))
+            )
+        ).all()
+    )
+    rows = {
+        (keeper_ids[article_id], ticker) for article_id, ticker in duplicate_tickers
+    } - known_tickers
+    if rows:
+        connection.execute(
+            insert(ArticleTicker),
+            [
+                {"article_id": article_id, "ticker": ticker}
+                for article_id, ticker in rows
+            ],
+        )
+
+    for duplicate_id, keeper_id in keeper_ids.items():
+        connection.execute(
+            update(ArticleFingerprint)
+            .where(ArticleFingerprint.cluster_id == duplicate_id)
+            .values(cluster_id=keeper_id)
+        )
+    for model in (ArticleTicker, ArticleFingerprint, ArticleLshBand):
+        connection.execute(delete(model).where(model.article_id.in_(duplicate_ids)))
+    connection.execute(
+        delete(CryptonewsArticlesDump).where(
+            CryptonewsArticlesDump.id.in_(duplicate_ids)
+        )
+    )
+    logger.info(f"Removed {len(duplicate_ids)} duplicated articles.")
+
+
+def merge_duplicate_columns(connection: Connection, keeper_ids: Dict[int, int]):
+    """
+    Fills empty columns of keepers (e.g. body or content_summary) with values of their
+    duplicates, the oldest duplicate having the value wins.
+    """
+    articles_table = CryptonewsArticlesDump.__table__
+    columns = [column.key for column in articles_table.columns if column.key != "id"]
+    articles = {
+        row.id: row._mapping
+        for row in connection.execute(
+            select(articles_table).where(
+                articles_table.c.id.in_(set(keeper_ids) | set(keeper_ids.values()))
+            )
+        )
+    }
+
+    merged = {}
+    for duplicate_id in sorted(keeper_ids):
+        keeper_id = keeper_ids[duplicate_id]
+        values = merged.setdefault(keeper_id, {})
+        for column in columns:
+            if (
+                articles[keeper_id][column] in (None, "")
+                and column not in values
+                and articles[duplicate_id][column] not in (None, "")
+            ):
+                values[column] = articles[duplicate_id][column]
+
+    # executemany needs the same parameters in every row
+    rows = [
+        {
+            "keeper_id": keeper_id,
+            **{
+                column: values.get(column, articles[keeper_id][column])
+                for column in columns
+            },
+        }
+        for keeper_id, values in merged.items()
+        if values
+    ]
+    if rows:
+        connection.execute(
+            update(articles_table).where(articles_table.c.id == bindparam("keeper_id")),
+            rows,
+        )
+        logger.info(f"Merged columns of duplicated articles into {len(rows)} articles.")
+
+
+def create_article_indexes(connection: Connection):
+    # (date, tags) index served ticker filters before they moved to article_tickers join
+    connection.execute(
+        text("DROP INDEX IF EXISTS ix_cryptonews_articles_dump_date_tags")
+    )
+    for model in (CryptonewsArticlesDump, ArticleTicker):
+        for index in model.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def move_master_summaries_to_daily_table(connection: Connection):
+    """
+    Copy master summaries repeated in every article row into daily_master_summaries table
+    (one row per date and ticker) and drop master_summary column of article_tickers table.
+    """
+    DailyMasterSummary.__table__.create(connection, checkfirst=True)
+
+    # (date, ticker, summary, article_id) of legacy and article_tickers master summaries
+    sources = [
+        select(
+            CryptonewsArticlesDump.date,
+            CryptonewsArticlesDump.tags,
+            CryptonewsArticlesDump.master_summary,
+            CryptonewsArticlesDump.id,
+        ).where(CryptonewsArticlesDump.tags.isnot(None))
+    ]
+    article_tickers_columns = {
+        column["name"] for column in inspect(connection).get_columns("article_tickers")
+    }
+    if "master_summary" in article_tickers_columns:
+        article_tickers = Table("article_tickers", MetaData(), autoload_with=connection)
+        sources.append(
+            select(
+                CryptonewsArticlesDump.date,
+                article_tickers.c.ticker,
+                article_tickers.c.master_summary,
+                article_tickers.c.article_id,
+            ).join(
+                CryptonewsArticlesDump,
+                CryptonewsArticlesDump.id == article_tickers.c.article_id,
+            )
+        )
+
+    summaries = {}
+    for source in sources:
+        for date, ticker, summary, article_id in connection.execute(
+            source.where(source.selected_columns[2] != "")
+        ):
+            key = (date, ticker)
+            if key not in summaries:
+                summaries[key] = (summary, set())
+            if summaries[key][0] == summary:
+                summaries[key][1].add(article_id)
+
+    known_keys = set(
+        connection.execute(
+            select(DailyMasterSummary.date, DailyMasterSummary.ticker)
+        ).all()
+    )
+    created_at = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    rows = [
+        {
+            "date": date,
+            "ticker": ticker,
+            "summary": summary,
+            "article_ids": sorted(article_ids),
+            "created_at": created_at,
+        }
+        for (date, ticker), (summary, article_ids) in summaries.items()
+        if date and (date, ticker) not in known_keys
+    ]
+    if rows:
+        connection.execute(insert(DailyMasterSummary), rows)
+        logger.info(f"Moved {len(rows)} daily master summaries.")
+
+    if "master_summary" in article_tickers_columns:
+        connection.execute(
+            text("DROP INDEX IF EXISTS ix_article_tickers_ticker_empty_master_summary")
+        )
+        connection.execute(
+            text("ALTER TABLE article_tickers DROP COLUMN master_summary")
+        )
+
+
+ARTICLES_FTS_TABLE = "cryptonews_articles_fts"
+FTS_COLUMNS = ("title", "text", "body", "content_summary")
+
+
+def create_full_text_search(connection: Connection):
+    """
+    Full-text index over title, text, body and content summary of articles.
+
+    Postgres gets generated tsvector column (recomputed on every insert and update) with GIN
+    index, SQLite gets FTS5 table kept up to date by triggers. Other databases are not indexed.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text(
+                "ALTER TABLE cryptonews_articles_dump ADD COLUMN IF NOT EXISTS search_vector "
+                "tsvector GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(content_summary, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(text, '')), 'C') || "
+                "setweight(to_tsvector('english', coalesce(body, '')), 'D')) STORED"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_cryptonews_articles_dump_search_vector "
+                "ON cryptonews_articles_dump USING GIN (search_vector)"
+            )
+        )
+    elif connection.dialect.name == "sqlite":
+        columns = ", ".join(FTS_COLUMNS)
+        new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+        old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+        delete_old = (
+            f"INSERT INTO {ARTICLES_FTS_TABLE} ({ARTICLES_FTS_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        insert_new = (
+            f"INSERT INTO {ARTICLES_FTS_TABLE} (rowid, {columns}) "
+            f"VALUES (new.id, {new_values});"
+        )
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {ARTICLES_FTS_TABLE} USING fts5({columns}, "
+            f"content='cryptonews_articles_dump', content_rowid='id', "
+            f"tokenize='porter unicode61')",
+            f"CREATE TRIGGER IF NOT EXISTS {ARTICLES_FTS_TABLE}_insert "
+            f"AFTER INSERT ON cryptonews_articles_dump BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {ARTICLES_FTS_TABLE}_delete "
+            f"AFTER DELETE ON cryptonews_articles_dump BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS {ARTICLES_FTS_TABLE}_update "
+            f"AFTER UPDATE OF {columns} ON cryptonews_articles_dump "
+            f"BEGIN {delete_old} {insert_new} END",
+            # index rows stored before the index existed
+            f"INSERT INTO {ARTICLES_FTS_TABLE} ({ARTICLES_FTS_TABLE}) VALUES ('rebuild')",
+        ]
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+    else:
+        logger.warning(
+            f"Full-text search is not supported for '{connection.dialect.name}' database."
+        )
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create_tables", create_tables),
+    (2, "link_legacy_articles_to_tickers", link_legacy_articles_to_tickers),
+    (3, "deduplicate_news_urls", deduplicate_news_urls),
+    (4, "create_article_indexes", create_article_indexes),
+    (5, "move_master_summaries_to_daily_table", move_master_summaries_to_daily_table),
+    (6, "create_full_text_search", create_full_text_search),
+    # databases migrated with (date, tags) index get plain (date) index
+    (7, "replace_date_tags_index", create_article_indexes),
+]
+
+
+def migrate(engine: Engine):
+    """Apply all migrations which were not applied yet."""
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied_versions = set(
+            connection.scalars(select(schema_migrations.c.version)).all()
+        )
+
+    for version, name, migration in MIGRATIONS:
+        if version in applied_versions:
+            continue
+        logger.info(f"Applying migration #{version} '{name}'...")
+        with engine.begin() as connection:
+            migration(connection)
+            connection.execute(
+                insert(schema_migrations).values(
+                    version=version,
+                    name=name,
+                    applied_at=dt.datetime.now(dt.timezone.utc).replace(tzinfo=None),
+                )
+            )
+
+
+def drop_schema(engine: Engine):
+    """Drop all tables including migrations history and full-text index, for scratch databases."""
+    with engine.begin() as connection:
+        if connection.dialect.name == "sqlite":
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {ARTICLES_FTS_TABLE}")
+        Base.metadata.drop_all(connection)
+        schema_migrations.drop(connection, checkfirst=True)
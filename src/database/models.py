@@ -1,13 +1,28 @@
-from sqlalchemy import Integer, Date
-from sqlalchemy import String
+from sqlalchemy import BigInteger, Integer, Date, DateTime, ForeignKey
+from sqlalchemy import Index, JSON, String, text
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import mapped_column
 
 Base = declarative_base()
 
 
+def partial_index(name: str, *columns: str, where: str) -> Index:
+    """Index limited to rows matching `where` predicate (filtered index) on Postgres and SQLite."""
+    return Index(name, *columns, postgresql_where=text(where), sqlite_where=text(where))
+
+
 class CryptonewsArticlesDump(Base):
     __tablename__ = "cryptonews_articles_dump"
+    __table_args__ = (
+        Index("ux_cryptonews_articles_dump_news_url", "news_url", unique=True),
+        # articles of a ticker are filtered through article_tickers join
+        Index("ix_cryptonews_articles_dump_date", "date"),
+        partial_index(
+            "ix_cryptonews_articles_dump_date_empty_content_summary",
+            "date",
+            where="content_summary IS NULL OR content_summary = ''",
+        ),
+    )
 
     id = mapped_column(Integer, primary_key=True)
     news_url = mapped_column(String, nullable=False)
@@ -21,5 +36,79 @@ class CryptonewsArticlesDump(Base):
     content_type = mapped_column(String, nullable=True)
     body = mapped_column(String, nullable=True)
     content_summary = mapped_column(String, nullable=True)
+    # legacy columns, see article_tickers and daily_master_summaries tables
     master_summary = mapped_column(String, nullable=True)
     tags = mapped_column(String, nullable=True)
+
+
+class ArticleTicker(Base):
+    """Association of an article with every ticker whose feed contained it."""
+
+    __tablename__ = "article_tickers"
+    __table_args__ = (
+        Index("ix_article_tickers_ticker_article_id", "ticker", "article_id"),
+    )
+
+    article_id = mapped_column(
+        Integer,
+        ForeignKey("cryptonews_articles_dump.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    ticker = mapped_column(String, primary_key=True)
+
+
+class DailyMasterSummary(Base):
+    """Master summary of ticker's articles for a day with its generation metadata."""
+
+    __tablename__ = "daily_master_summaries"
+
+    date = mapped_column(Date, primary_key=True)
+    ticker = mapped_column(String, primary_key=True)
+    summary = mapped_column(String, nullable=False)
+    model = mapped_column(String, nullable=True)
+    prompt_tokens = mapped_column(Integer, nullable=True)
+    completion_tokens = mapped_column(Integer, nullable=True)
+    # ids of articles whose content summaries were summarized
+    article_ids = mapped_column(JSON, nullable=False)
+    created_at = mapped_column(DateTime, nullable=False)
+
+
+class IngestionWatermark(Base):
+    """Newest article seen per ticker and source, used to stop pulls at already known content."""
+
+    __tablename__ = "ingestion_watermarks"
+
+    ticker = mapped_column(String, primary_key=True)
+    source = mapped_column(String, primary_key=True)
+    newest_date = mapped_column(DateTime, nullable=False)
+    newest_news_url = mapped_column(String, nullable=False)
+    updated_at = mapped_column(DateTime, nullable=False)
+
+
+class ArticleFingerprint(Base):
+    """SimHash fingerprint of an article and id of its near-duplicates cluster."""
+
+    __tablename__ = "article_fingerprints"
+
+    article_id = mapped_column(
+        Integer,
+        ForeignKey("cryptonews_articles_dump.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # NULL if article is too short to be fingerprinted
+    simhash = mapped_column(BigInteger, nullable=True)
+    cluster_id = mapped_column(Integer, nullable=False, index=True)
+
+
+class ArticleLshBand(Base):
+    """LSH index: bands of article fingerprints used to find near-duplicate candidates."""
+
+    __tablename__ = "article_lsh_bands"
+
+    band = mapped_column(Integer, primary_key=True)
+    value = mapped_column(Integer, primary_key=True)
+    article_id = mapped_column(
+        Integer,
+        ForeignKey("cryptonews_articles_dump.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
@@ -5,16 +5,26 @@ from telegram.ext import ApplicationBuilder
 
 from src.bot.admin_handlers import register_admin_handlers
 from src.bot.handlers import register_handlers
-from src.bot.scheduler import setup_summarize_scheduler, setup_article_pull_scheduler
+from src.bot.scheduler import (
+    setup_batch_summarize_scheduler,
+    setup_summarize_scheduler,
+    setup_article_pull_scheduler,
+    setup_retention_scheduler,
+)
 from src.bot.utils import error_handler
 from src.config.config import app_settings
 from src.config.logging_config import setup_logging
+from src.database.async_connection import dispose_async_engines
+from src.database.connection import bootstrap_schema, dispose_engines
+from src.services.providers import close_providers
 
 logger = getLogger(__name__)
 
 
 async def main():
     """Main entry point for the bot."""
+    bootstrap_schema()
+
     bot_app = ApplicationBuilder().token(app_settings.TELEGRAM_BOT_TOKEN).build()
 
     # Initialize the application
@@ -25,7 +35,9 @@ async def main():
     register_admin_handlers(bot_app)
 
     setup_article_pull_scheduler(bot_app)
+    setup_batch_summarize_scheduler(bot_app)
     setup_summarize_scheduler(bot_app)
+    setup_retention_scheduler(bot_app)
 
     bot_app.add_error_handler(error_handler)
 
@@ -38,6 +50,9 @@ async def main():
         logger.error("Bot stopped.")
     finally:
         logger.info("Shutting down the bot...")
+        await dispose_async_engines()
+        dispose_engines()
+        close_providers()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,182 @@
+"""
+This file contains retention job moving old articles out of the hot table into Parquet archive.
+
+Archive is partitioned by article's date: <archive_dir>/articles/date=YYYY-MM-DD/part-<ids>.parquet
+(zstd compressed). Every row keeps all article columns and the list of tickers it was linked to.
+Part files are named after the first and last archived id, so a rerun after a crash overwrites
+the part instead of duplicating rows. Archived days are read back with read_archived_articles.
+"""
+
+import datetime as dt
+import os
+from logging import getLogger
+from typing import Dict, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import delete, select
+
+from src.config.config import app_settings
+from src.config.logging_config import ROOT_DIR
+from src.database.database import iter_article_rows
+from src.database.models import (
+    ArticleFingerprint,
+    ArticleLshBand,
+    ArticleTicker,
+    CryptonewsArticlesDump,
+)
+from src.services.datetime_util import DatetimeUtil
+
+logger = getLogger(__name__)
+
+ARCHIVED_COLUMNS = [
+    column
+    for column in CryptonewsArticlesDump.__table__.columns
+    if column.name != "date"
+]
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        pa.field(column.name, pa.int64() if column.name == "id" else pa.string())
+        for column in ARCHIVED_COLUMNS
+    ]
+    + [pa.field("tickers", pa.list_(pa.string()))]
+)
+# article's date is stored in partition directory name
+PARTITIONING = ds.partitioning(
+    pa.schema([pa.field("date", pa.date32())]), flavor="hive"
+)
+DELETE_BATCH_SIZE = 500
+
+
+def get_archive_dir(archive_dir: str = None) -> str:
+    return os.path.join(
+        archive_dir or app_settings.ARCHIVE_DIR or os.path.join(ROOT_DIR, "archive"),
+        "articles",
+    )
+
+
+def archive_old_articles(
+    session, older_than: dt.date = None, archive_dir: str = None
+) -> int:
+    """
+    Moves articles published before older_than (ARTICLES_RETENTION_DAYS ago by default)
+    to archive day by day. Rows of a day are deleted from db only after its file is written.
+    Returns number of archived articles.
+    """
+    if older_than is None:
+        if app_settings.ARTICLES_RETENTION_DAYS <= 0:
+            logger.info("Articles retention is disabled. Nothing to archive.")
+            return 0
+        older_than = DatetimeUtil.utc_now().date() - dt.timedelta(
+            days=app_settings.ARTICLES_RETENTION_DAYS
+        )
+    dates = session.scalars(
+        select(CryptonewsArticlesDump.date)
+        .distinct()
+        .where(CryptonewsArticlesDump.date < older_than)
+        .order_by(CryptonewsArticlesDump.date)
+    ).all()
+    logger.info(f"Found {len(dates)} days with articles older than {older_than}.")
+
+    archived = 0
+    for date in dates:
+        archived += archive_day(session, date, archive_dir)
+    logger.info(f"Archived {archived} articles older than {older_than}.")
+    return archived
+
+
+def archive_day(session, date: dt.date, archive_dir: str = None) -> int:
+    rows = [
+        row._asdict()
+        for row in iter_article_rows(
+            session,
+            ARCHIVED_COLUMNS,
+            start_date=date,
+            batch_size=app_settings.ARTICLES_READ_BATCH_SIZE,
+        )
+    ]
+    if not rows:
+        return 0
+
+    article_ids = [row["id"] for row in rows]
+    tickers = get_article_tickers(session, article_ids)
+    for row in rows:
+        row["tickers"] = tickers.get(row["id"], [])
+
+    partition_dir = os.path.join(get_archive_dir(archive_dir), f"date={date}")
+    os.makedirs(partition_dir, exist_ok=True)
+    filename = f"part-{article_ids[0]}-{article_ids[-1]}.parquet"
+    path = os.path.join(partition_dir, filename)
+    # files starting with '.' are skipped by dataset reader, half-written file is never read
+    tmp_path = os.path.join(partition_dir, f".{filename}.tmp")
+    pq.write_table(
+        pa.Table.from_pylist(rows, schema=ARCHIVE_SCHEMA),
+        tmp_path,
+        compression="zstd",
+    )
+    os.replace(tmp_path, path)
+
+    delete_articles(session, article_ids)
+    logger.info(f"Archived {len(rows)} articles of {date} to '{path}'.")
+    return len(rows)
+
+
+def get_article_tickers(session, article_ids: List[int]) -> Dict[int, List[str]]:
+    tickers = {}
+    for start in range(0, len(article_ids), DELETE_BATCH_SIZE):
+        for article_id, ticker in session.execute(
+            select(ArticleTicker.article_id, ArticleTicker.ticker).where(
+                ArticleTicker.article_id.in_(
+                    article_ids[start : start + DELETE_BATCH_SIZE]
+                )
+            )
+        ):
+            tickers.setdefault(article_id, []).append(ticker)
+    return tickers
+
+
+def delete_articles(session, article_ids: List[int]):
+    """Deletes articles with their ticker links, fingerprints and LSH bands."""
+    for start in range(0, len(article_ids), DELETE_BATCH_SIZE):
+        batch_ids = article_ids[start : start + DELETE_BATCH_SIZE]
+        for model in (ArticleTicker, ArticleFingerprint, ArticleLshBand):
+            session.execute(delete(model).where(model.article_id.in_(batch_ids)))
+        session.execute(
+            delete(CryptonewsArticlesDump).where(
+                CryptonewsArticlesDump.id.in_(batch_ids)
+            )
+        )
+    session.commit()
+
+
+def read_archived_articles(
+    start_date: dt.date,
+    end_date: dt.date = None,
+    ticker: str = None,
+    columns: List[str] = None,
+    archive_dir: str = None,
+) -> pd.DataFrame:
+    """
+    Reads archived articles published from start_date to end_date (inclusive, start_date only
+    by default) into DataFrame. Only partitions of requested days and requested columns are read.
+    """
+    end_date = end_date or start_date
+    path = get_archive_dir(archive_dir)
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns or ARCHIVE_SCHEMA.names + ["date"])
+
+    read_columns = columns
+    if ticker and columns and "tickers" not in columns:
+        read_columns = columns + ["tickers"]
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+    articles = dataset.to_table(
+        columns=read_columns,
+        filter=(ds.field("date") >= start_date) & (ds.field("date") <= end_date),
+    ).to_pandas()
+
+    if ticker:
+        articles = articles[articles["tickers"].map(lambda tickers: ticker in tickers)]
+        articles = articles[columns] if columns else articles
+    return articles.reset_index(drop=True)
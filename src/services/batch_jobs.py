@@ -0,0 +1,395 @@
+"""
+This file contains offline batch mode of nightly summarization.
+
+Summary requests of all pending articles are written to a JSONL file (one chat completion request
+per line in OpenAI Batch API format), the file is submitted through a batch backend and the job
+is polled until it ends. Answers are applied back to db in bulk. Backends:
+    'openai' - OpenAI Batch API, cheaper than interactive requests and completed within 24 hours,
+    'local'  - runs requests of the file through make_openai_client_api_call, for development and tests.
+Requests which are not answered (failed lines, job timeout, texts too long for a single request)
+are left to the interactive run, it only summarizes articles which are still without summary.
+"""
+
+import datetime as dt
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from logging import getLogger
+from typing import Callable, Dict, List
+
+from openai import OpenAI
+
+from src.config.config import app_settings
+from src.config.constants import TICKERS
+from src.config.logging_config import ROOT_DIR
+from src.database.connection import create_session
+from src.database.database import (
+    ArticleWriter,
+    iter_article_batches,
+    save_master_summary,
+)
+from src.services.providers import get_provider
+from src.services.summarizer import (
+    ARTICLE_TEXT_COLUMNS,
+    add_pending_clusters,
+    get_master_summary_articles,
+    get_summary_batches,
+)
+from src.services.utils import (
+    compress_for_summary,
+    count_tokens,
+    get_batch_summary_messages,
+    get_summary_messages,
+    make_openai_client_api_call,
+    parse_batch_summaries,
+)
+
+logger = getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# statuses of OpenAI Batch API after which job is not changed anymore
+FINISHED_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchBackend(ABC):
+    """Runs JSONL file of chat completion requests as one batch job."""
+
+    def get_model(self, model: str) -> str:
+        return model
+
+    @abstractmethod
+    def submit(self, path: str) -> str:
+        """Submits batch file and returns id of the job."""
+
+    @abstractmethod
+    def get_status(self, job_id: str) -> str:
+        pass
+
+    @abstractmethod
+    def download_results(self, job_id: str, path: str) -> bool:
+        """Saves answered requests of finished job to path, returns False if there are none."""
+
+    @abstractmethod
+    def cancel(self, job_id: str):
+        pass
+
+
+class OpenAiBatchBackend(BatchBackend):
+    def __init__(self, client: OpenAI):
+        self.client = client
+
+    def get_model(self, model: str) -> str:
+        # OpenAI expects model name without vendor prefix
+        return model.split("/")[-1]
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as file:
+            input_file = self.client.files.create(file=file, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def get_status(self, job_id: str) -> str:
+        return self.client.batches.retrieve(job_id).status
+
+    def download_results(self, job_id: str, path: str) -> bool:
+        batch = self.client.batches.retrieve(job_id)
+        if batch.request_counts:
+            logger.info(
+                f"Batch job '{job_id}' is {batch.status}: {batch.request_counts.completed} "
+                f"completed and {batch.request_counts.failed} failed of {batch.request_counts.total} requests."
+            )
+        # expired and cancelled jobs keep answers of requests completed in time
+        if not batch.output_file_id:
+            return False
+        self.client.files.content(batch.output_file_id).write_to_file(path)
+        return True
+
+    def cancel(self, job_id: str):
+        self.client.batches.cancel(job_id)
+
+
+class LocalBatchBackend(BatchBackend):
+    """Stand-in of provider's Batch API: requests are run one by one when the file is submitted."""
+
+    def __init__(self, complete: Callable = make_openai_client_api_call):
+        # complete(messages, model, usage) -> answer
+        self.complete = complete
+        self._results: Dict[str, List[dict]] = {}
+
+    def submit(self, path: str) -> str:
+        job_id = f"local-{uuid.uuid4().hex}"
+        results = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                request = json.loads(line)
+                results.append(self._run_request(request))
+        self._results[job_id] = results
+        return job_id
+
+    def _run_request(self, request: dict) -> dict:
+        body = request["body"]
+        usage = {}
+        try:
+            output = self.complete(body["messages"], body["model"], usage)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {
+                "custom_id": request["custom_id"],
+                "response": None,
+                "error": {"message": str(e)},
+            }
+        return {
+            "custom_id": request["custom_id"],
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "model": usage.get("model", body["model"]),
+                    "choices": [{"message": {"role": "assistant", "content": output}}],
+                    "usage": {
+                        "prompt_tokens": usage.get("prompt_tokens", 0),
+                        "completion_tokens": usage.get("completion_tokens", 0),
+                    },
+                },
+            },
+            "error": None,
+        }
+
+    def get_status(self, job_id: str) -> str:
+        return "completed"
+
+    def download_results(self, job_id: str, path: str) -> bool:
+        with open(path, "w", encoding="utf-8") as file:
+            for result in self._results.pop(job_id):
+                file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        return True
+
+    def cancel(self, job_id: str):
+        self._results.pop(job_id, None)
+
+
+def get_batch_backend() -> BatchBackend:
+    if app_settings.LLM_BATCH_BACKEND == "local":
+        return LocalBatchBackend()
+    if app_settings.LLM_BATCH_BACKEND == "openai":
+        return OpenAiBatchBackend(get_provider("openai").client)
+    raise ValueError(f"Unknown batch backend '{app_settings.LLM_BATCH_BACKEND}'.")
+
+
+def get_batch_dir() -> str:
+    batch_dir = app_settings.LLM_BATCH_DIR or os.path.join(ROOT_DIR, "batches")
+    os.makedirs(batch_dir, exist_ok=True)
+    return batch_dir
+
+
+def run_batch_job(
+    backend: BatchBackend, requests: Dict[str, List[Dict[str, str]]], name: str
+) -> Dict[str, dict]:
+    """
+    Writes requests {custom_id: messages} to batch file, submits it and waits until the job ends
+    (at most LLM_BATCH_TIMEOUT seconds, the job is cancelled afterwards).
+    Returns {custom_id: answer} of answered requests, where answer has 'content' and 'usage'.
+    """
+    if not requests:
+        return {}
+
+    path = os.path.join(get_batch_dir(), f"{name}.jsonl")
+    model = backend.get_model(app_settings.LANGUAGE_MODEL)
+    with open(path, "w", encoding="utf-8") as file:
+        for custom_id, messages in requests.items():
+            request = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {"model": model, "messages": messages},
+            }
+            file.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+    job_id = backend.submit(path)
+    logger.info(f"Submitted batch job '{job_id}' with {len(requests)} requests.")
+
+    deadline = time.monotonic() + app_settings.LLM_BATCH_TIMEOUT
+    status = backend.get_status(job_id)
+    while status not in FINISHED_STATUSES:
+        if time.monotonic() >= deadline:
+            logger.warning(
+                f"Batch job '{job_id}' is not finished in {app_settings.LLM_BATCH_TIMEOUT} "
+                f"seconds (status '{status}'). Cancelling, requests are left to interactive run."
+            )
+            backend.cancel(job_id)
+            return {}
+        time.sleep(app_settings.LLM_BATCH_POLL_INTERVAL)
+        status = backend.get_status(job_id)
+    logger.info(f"Batch job '{job_id}' is {status}.")
+
+    results_path = os.path.join(get_batch_dir(), f"{name}.results.jsonl")
+    if not backend.download_results(job_id, results_path):
+        return {}
+    return read_batch_results(results_path)
+
+
+def read_batch_results(path: str) -> Dict[str, dict]:
+    answers = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            result = json.loads(line)
+            response = result.get("response") or {}
+            body = response.get("body") or {}
+            if response.get("status_code") != 200 or not body.get("choices"):
+                logger.error(
+                    f"Request '{result.get('custom_id')}' of batch failed: "
+                    f"{result.get('error') or body.get('error')}"
+                )
+                continue
+            answers[result["custom_id"]] = {
+                "content": body["choices"][0]["message"]["content"],
+                "model": body.get("model"),
+                "usage": body.get("usage") or {},
+            }
+    return answers
+
+
+def create_content_summaries_in_batch(
+    session, as_of_date: dt.date, backend: BatchBackend
+) -> int:
+    """
+    Summarizes articles of all tickers without content summary with one batch job.
+    Returns number of articles updated.
+    """
+    prompt = app_settings.CONTENT_SUMMARY_PROMPT
+    model = app_settings.LANGUAGE_MODEL
+    pending_articles, cluster_texts, cluster_summaries = {}, {}, {}
+    with ArticleWriter(
+        session, app_settings.CONTENT_SUMMARY_WRITE_BATCH_SIZE
+    ) as writer:
+        for ticker in TICKERS:
+            for articles in iter_article_batches(
+                session,
+                ARTICLE_TEXT_COLUMNS,
+                as_of_date,
+                ticker,
+                empty_content_summary=True,
+                batch_size=app_settings.ARTICLES_READ_BATCH_SIZE,
+            ):
+                add_pending_clusters(
+                    session,
+                    articles,
+                    cluster_summaries,
+                    writer,
+                    pending_articles,
+                    cluster_texts,
+                )
+    # no transaction is kept open while the job runs
+    session.commit()
+
+    # long texts need map-reduce of several requests, they are summarized interactively,
+    # other texts are compressed the same way as by interactive summarize_text
+    budget = app_settings.SUMMARY_TOKEN_BUDGET - count_tokens(prompt, model)
+    cluster_texts = {
+        cluster_id: compress_for_summary(text)
+        for cluster_id, text in cluster_texts.items()
+        if text and count_tokens(text, model) <= budget
+    }
+    batches = {
+        f"content-{i}": batch
+        for i, batch in enumerate(get_summary_batches(cluster_texts, prompt))
+    }
+    requests = {
+        custom_id: (
+            get_batch_summary_messages(batch, prompt)
+            if len(batch) > 1
+            else get_summary_messages(next(iter(batch.values())), prompt)
+        )
+        for custom_id, batch in batches.items()
+    }
+    logger.info(
+        f"Summarizing {len(cluster_texts)} clusters of articles with batch job of {len(requests)} requests."
+    )
+    answers = run_batch_job(
+        backend, requests, f"content-summaries-{as_of_date}-{int(time.time())}"
+    )
+
+    updated = 0
+    with ArticleWriter(
+        session, app_settings.CONTENT_SUMMARY_WRITE_BATCH_SIZE
+    ) as writer:
+        for custom_id, answer in answers.items():
+            batch = batches[custom_id]
+            if len(batch) > 1:
+                summaries = parse_batch_summaries(answer["content"], list(batch))
+            else:
+                summaries = {key: answer["content"] for key in batch}
+            for cluster_id, content_summary in summaries.items():
+                if not content_summary:
+                    continue
+                for article_id in pending_articles[cluster_id]:
+                    writer.add(article_id, content_summary=content_summary)
+                    updated += 1
+
+    logger.info(f"Batch job created content summaries for {updated} articles.")
+    return updated
+
+
+def create_master_summaries_in_batch(
+    session, as_of_date: dt.date, backend: BatchBackend
+) -> int:
+    """
+    Creates master summaries of all tickers with one batch job.
+    Returns number of saved master summaries.
+    """
+    prompt = app_settings.MASTER_SUMMARY_PROMPT
+    model = app_settings.LANGUAGE_MODEL
+    requests, ticker_article_ids = {}, {}
+    for ticker in TICKERS:
+        articles = get_master_summary_articles(session, as_of_date, ticker)
+        if not articles:
+            continue
+        all_content_summaries = "\n\n".join(
+            article.content_summary for article in articles
+        )
+        # content summaries which need map-reduce are summarized interactively
+        if (
+            count_tokens(f"{prompt}\n\n{all_content_summaries}", model)
+            > app_settings.SUMMARY_TOKEN_BUDGET
+        ):
+            continue
+        custom_id = f"master-{ticker}"
+        requests[custom_id] = get_summary_messages(all_content_summaries, prompt)
+        ticker_article_ids[custom_id] = (ticker, [article.id for article in articles])
+    session.commit()
+
+    answers = run_batch_job(
+        backend, requests, f"master-summaries-{as_of_date}-{int(time.time())}"
+    )
+    saved = 0
+    for custom_id, answer in answers.items():
+        if not answer["content"]:
+            continue
+        ticker, article_ids = ticker_article_ids[custom_id]
+        usage = {
+            "model": answer["model"] or model,
+            "prompt_tokens": answer["usage"].get("prompt_tokens", 0),
+            "completion_tokens": answer["usage"].get("completion_tokens", 0),
+        }
+        save_master_summary(
+            session, as_of_date, ticker, answer["content"], article_ids, usage
+        )
+        saved += 1
+
+    logger.info(f"Batch job created {saved} master summaries.")
+    return saved
+
+
+def create_and_save_summaries_in_batch(
+    as_of_date: dt.date, backend: BatchBackend = None
+):
+    """Creates content summaries, then master summaries of all tickers with batch jobs."""
+    backend = backend or get_batch_backend()
+    with create_session() as session:
+        create_content_summaries_in_batch(session, as_of_date, backend)
+        create_master_summaries_in_batch(session, as_of_date, backend)
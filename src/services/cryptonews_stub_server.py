@@ -0,0 +1,197 @@
+"""
+This file contains local HTTP server mimicking https://cryptonews-api.com API for tests and benchmarks.
+
+Server serves synthetic corpus of articles for /api/v1?tickers=... and /api/v1/category?section=general
+endpoints with 'items' and 'page' params, articles are ordered from newest to oldest as in the real API.
+Article pages are served under /articles/<id> so that scraping can be exercised as well.
+Requests for failing_tickers always get 500 response, e.g. to test that one ticker doesn't
+abort the pull of the others.
+"""
+
+import datetime as dt
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from typing import Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+from src.config.constants import TICKERS
+
+logger = getLogger(__name__)
+
+MAX_ITEMS_PER_PAGE = 100
+SOURCES = ["CryptoSlate", "Coindesk", "Cointelegraph", "Bitcoinworld", "NewsBTC"]
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+WORDS = (
+    "market price traders bitcoin rally exchange network token investors analysts "
+    "liquidity volume whales support resistance breakout regulation adoption staking "
+    "protocol upgrade funds inflows outflows volatility momentum sentiment"
+).split()
+
+
+def generate_corpus(
+    n_articles: int,
+    as_of_date: dt.date,
+    days: int = 3,
+    tickers: List[str] = None,
+    seed: int = 42,
+) -> List[dict]:
+    """
+    Generates articles spread evenly over `days` days up to the end of as_of_date, newest first.
+    Every article references one or two tickers, so some articles are shared between feeds.
+    """
+    rng = random.Random(seed)
+    tickers = tickers or list(TICKERS)
+    timezone = dt.timezone(dt.timedelta(hours=-5))
+    end = dt.datetime.combine(as_of_date, dt.time(23, 59, 59), tzinfo=timezone)
+    step = dt.timedelta(days=days) / n_articles
+
+    corpus = []
+    for i in range(n_articles):
+        published = end - step * i
+        article_tickers = rng.sample(tickers, k=rng.choice((1, 1, 1, 2)))
+        title_words = rng.sample(WORDS, k=6)
+        corpus.append(
+            {
+                "id": i,
+                "news_url": f"/articles/{i}",
+                "image_url": f"https://images.example.com/{i}.jpg",
+                "title": f"{article_tickers[0]} " + " ".join(title_words).capitalize(),
+                "text": " ".join(rng.choices(WORDS, k=40)).capitalize() + ".",
+                "source_name": rng.choice(SOURCES),
+                "date": published.strftime("%a, %d %b %Y %H:%M:%S %z"),
+                "topics": [],
+                "sentiment": rng.choice(SENTIMENTS),
+                "type": "Article",
+                "tickers": article_tickers,
+            }
+        )
+    return corpus
+
+
+class CryptonewsStubHandler(BaseHTTPRequestHandler):
+    server: "CryptonewsStubServer"
+
+    def do_GET(self):
+        stub = self.server
+        stub.count_request()
+        if stub.latency:
+            time.sleep(stub.latency * stub.rng.uniform(0.5, 1.5))
+
+        if stub.rng.random() < stub.error_rate:
+            self._send(500, b'{"message": "Internal server error"}')
+            return
+
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query)
+        if params.get("tickers", [""])[0] in stub.failing_tickers:
+            self._send(500, b'{"message": "Internal server error"}')
+            return
+
+        if parts.path.startswith("/articles/"):
+            self._send_article_page(parts.path.rsplit("/", 1)[-1])
+        elif parts.path == "/api/v1":
+            articles = stub.by_ticker.get(params.get("tickers", [""])[0], [])
+            self._send_page(articles, params)
+        elif parts.path == "/api/v1/category":
+            self._send_page(stub.corpus, params)
+        else:
+            self._send(404, b'{"message": "Not found"}')
+
+    def _send_page(self, articles: List[dict], params: Dict[str, List[str]]):
+        items = min(int(params.get("items", ["50"])[0]), MAX_ITEMS_PER_PAGE)
+        page = int(params.get("page", ["1"])[0])
+        page_articles = articles[(page - 1) * items : page * items]
+        total_pages = (len(articles) + items - 1) // items
+
+        base_url = self.server.url
+        data = [
+            {
+                key: f"{base_url}{value}" if key == "news_url" else value
+                for key, value in article.items()
+                if key != "id"
+            }
+            for article in page_articles
+        ]
+        body = json.dumps({"data": data, "total_pages": total_pages}).encode("utf-8")
+        self._send(200, body)
+
+    def _send_article_page(self, article_id: str):
+        if not article_id.isdigit() or int(article_id) >= len(self.server.corpus):
+            self._send(404, b"Not found", "text/html")
+            return
+        article = self.server.corpus[int(article_id)]
+        paragraphs = "".join(f"<p>{article['text']}</p>" for _ in range(10))
+        page = (
+            f"<html><head><title>{article['title']}</title></head><body>"
+            f"<nav>Menu</nav><div id='articleContent'>{paragraphs}</div>"
+            f"<footer>Related articles</footer></body></html>"
+        )
+        self._send(200, page.encode("utf-8"), "text/html")
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CryptonewsStubServer(ThreadingHTTPServer):
+    """Threaded HTTP server serving synthetic cryptonews corpus."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        corpus: List[dict],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 42,
+        failing_tickers: List[str] = None,
+    ):
+        super().__init__((host, port), CryptonewsStubHandler)
+        self.corpus = corpus
+        self.by_ticker = {}
+        for article in corpus:
+            for ticker in article["tickers"]:
+                self.by_ticker.setdefault(ticker, []).append(article)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.failing_tickers = set(failing_tickers or [])
+        self.rng = random.Random(seed)
+        self.requests_count = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._lock:
+            self.requests_count += 1
+
+    def start(self):
+        """Starts serving requests in background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Cryptonews stub server with {len(self.corpus)} articles is running on {self.url}."
+        )
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
@@ -16,6 +16,13 @@ class DatetimeUtil:
         yesterday_utc = now_utc - dt.timedelta(days=1)
         return yesterday_utc
 
+    @classmethod
+    def to_naive_utc(cls, datetime_obj: dt.datetime) -> dt.datetime:
+        """Convert timezone aware datetime to naive UTC datetime (as it is stored in db)."""
+        if datetime_obj.tzinfo is None:
+            return datetime_obj
+        return datetime_obj.astimezone(dt.timezone.utc).replace(tzinfo=None)
+
     @classmethod
     def parse_and_convert_to_utc(cls, date_string: str) -> dt.datetime:
         """Parse the input string (assumes it is in Eastern Time)."""
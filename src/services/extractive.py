@@ -0,0 +1,262 @@
+"""
+This file contains extractive compression of texts before they are sent to LLM.
+
+Text is split into sentences, sentences are scored with TextRank over TF-IDF cosine similarity
+and the best ones are selected with maximal marginal relevance until the token budget is filled,
+so boilerplate and repeated quotes (similar to an already selected sentence) are dropped first.
+Selected sentences keep their original order. Everything is computed with NumPy on CPU:
+TF-IDF matrix is stored sparse (only nonzero entries), similarity matrix is never materialized,
+TextRank iterates over factored TF-IDF matrix. Memory grows with the number of words of text.
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Callable, List
+
+import numpy as np
+
+logger = getLogger(__name__)
+
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?…])\s+|\s*\n+\s*")
+WORD_PATTERN = re.compile(r"\w{2,}")
+DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+# weight of sentence's score against its similarity to selected sentences
+MMR_LAMBDA = 0.7
+# sentences more similar to a selected sentence are treated as repeated
+REDUNDANCY_THRESHOLD = 0.8
+
+
+@dataclass
+class CompressionResult:
+    text: str
+    original_tokens: int
+    compressed_tokens: int
+
+    @property
+    def ratio(self) -> float:
+        return (
+            self.compressed_tokens / self.original_tokens
+            if self.original_tokens
+            else 1.0
+        )
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.compressed_tokens
+
+
+_stats = {"calls": 0, "original_tokens": 0, "compressed_tokens": 0}
+_stats_lock = threading.Lock()
+
+
+def compress_text(
+    text: str, token_budget: int, count_tokens: Callable[[str], int]
+) -> CompressionResult:
+    """Selects the most important not repeated sentences of text fitting into token_budget."""
+    original_tokens = count_tokens(text)
+    if original_tokens <= token_budget:
+        return CompressionResult(text, original_tokens, original_tokens)
+
+    # repeated sentences (boilerplate, quotes) would raise rank of each other, first one is kept
+    unique_sentences = {}
+    for sentence in split_sentences(text):
+        key = " ".join(WORD_PATTERN.findall(sentence.lower()))
+        unique_sentences.setdefault(key, sentence)
+    sentences = list(unique_sentences.values())
+    sentence_tokens = np.array([count_tokens(sentence) for sentence in sentences])
+    features = get_tfidf_features(sentences)
+    scores = get_textrank_scores(features)
+    selected = select_sentences(features, scores, sentence_tokens, token_budget)
+
+    if selected:
+        compressed_text = " ".join(sentences[i] for i in selected)
+    else:
+        # every sentence exceeds the budget, e.g. scraped text without sentence breaks
+        logger.warning(
+            f"No sentence fits into {token_budget} tokens, text is truncated instead"
+        )
+        compressed_text = truncate_text(text, token_budget, count_tokens)
+    result = CompressionResult(
+        compressed_text, original_tokens, count_tokens(compressed_text)
+    )
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["original_tokens"] += result.original_tokens
+        _stats["compressed_tokens"] += result.compressed_tokens
+    return result
+
+
+def truncate_text(
+    text: str, token_budget: int, count_tokens: Callable[[str], int]
+) -> str:
+    """Returns the longest prefix of text's words fitting into token_budget."""
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
+def split_sentences(text: str) -> List[str]:
+    return [
+        sentence.strip()
+        for sentence in SENTENCE_SPLIT_PATTERN.split(text)
+        if sentence.strip()
+    ]
+
+
+@dataclass
+class SparseFeatures:
+    """Sparse matrix of sentence features in coordinate format, entries are sorted by row."""
+
+    rows: np.ndarray
+    columns: np.ndarray
+    values: np.ndarray
+    n_rows: int
+    n_columns: int
+    _column_order: np.ndarray = field(default=None, init=False, repr=False)
+    _column_starts: np.ndarray = field(default=None, init=False, repr=False)
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        """Returns F @ vector."""
+        return np.bincount(
+            self.rows, self.values * vector[self.columns], minlength=self.n_rows
+        )
+
+    def transpose_dot(self, vector: np.ndarray) -> np.ndarray:
+        """Returns F.T @ vector."""
+        return np.bincount(
+            self.columns, self.values * vector[self.rows], minlength=self.n_columns
+        )
+
+    def row_similarities(self, i: int) -> np.ndarray:
+        """
+        Returns F @ F[i], products of i-th row with all rows. Only entries of i-th row's columns
+        are multiplied, they are looked up in the index of entries sorted by column.
+        """
+        if self._column_order is None:
+            self._column_order = np.argsort(self.columns, kind="stable")
+            self._column_starts = np.searchsorted(
+                self.columns[self._column_order], np.arange(self.n_columns + 1)
+            )
+        start, end = np.searchsorted(self.rows, [i, i + 1])
+        entries, weights = [], []
+        for column, value in zip(self.columns[start:end], self.values[start:end]):
+            column_start, column_end = self._column_starts[column : column + 2]
+            entries.append(self._column_order[column_start:column_end])
+            weights.append(np.full(column_end - column_start, value))
+        if not entries:
+            return np.zeros(self.n_rows)
+        entries = np.concatenate(entries)
+        return np.bincount(
+            self.rows[entries],
+            self.values[entries] * np.concatenate(weights),
+            minlength=self.n_rows,
+        )
+
+
+def get_tfidf_features(sentences: List[str]) -> SparseFeatures:
+    """
+    Returns L2-normalized TF-IDF vectors of sentences (one row per sentence). Only entries
+    of words found in several sentences are kept, other words never make sentences similar.
+    """
+    vocabulary = {}
+    rows, columns = [], []
+    for i, sentence in enumerate(sentences):
+        for word in WORD_PATTERN.findall(sentence.lower()):
+            rows.append(i)
+            columns.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    n_rows, n_columns = len(sentences), len(vocabulary)
+    # unique (row, column) pairs sorted by row with number of occurrences
+    entries, counts = np.unique(
+        np.array(rows, dtype=np.int64) * n_columns + np.array(columns, dtype=np.int64),
+        return_counts=True,
+    )
+    rows, columns = entries // n_columns, entries % n_columns
+    document_frequency = np.bincount(columns, minlength=n_columns)
+    idf = np.log((1 + n_rows) / (1 + document_frequency)) + 1
+    values = np.log1p(counts) * idf[columns]
+    # norms include all words, so products of shared columns are exact cosine similarities
+    norms = np.sqrt(np.bincount(rows, values * values, minlength=n_rows))
+
+    shared = document_frequency[columns] > 1
+    rows, columns = rows[shared], columns[shared]
+    return SparseFeatures(
+        rows, columns, values[shared] / norms[rows], n_rows, n_columns
+    )
+
+
+def get_textrank_scores(features: SparseFeatures) -> np.ndarray:
+    """
+    Returns TextRank scores of sentences on the graph weighted by cosine similarity of sentences.
+    Similarity matrix S = F @ F.T without self-similarity is applied as F @ (F.T @ v) - diag(S) * v.
+    """
+    n = features.n_rows
+    self_similarity = np.bincount(
+        features.rows, features.values * features.values, minlength=n
+    )
+    degree = features.dot(features.transpose_dot(np.ones(n))) - self_similarity
+    isolated = degree <= 1e-9
+    degree = np.where(isolated, 1, degree)
+
+    scores = np.full(n, 1 / n)
+    for _ in range(TEXTRANK_ITERATIONS):
+        weights = np.where(isolated, 0, scores / degree)
+        propagated = (
+            features.dot(features.transpose_dot(weights)) - self_similarity * weights
+        )
+        # rank of sentences without similar sentences is spread evenly
+        dangling = scores[isolated].sum() / n
+        new_scores = (1 - DAMPING) / n + DAMPING * (propagated + dangling)
+        if np.abs(new_scores - scores).sum() < 1e-6:
+            return new_scores
+        scores = new_scores
+    return scores
+
+
+def select_sentences(
+    features: SparseFeatures,
+    scores: np.ndarray,
+    sentence_tokens: np.ndarray,
+    token_budget: int,
+) -> List[int]:
+    """
+    Greedily selects sentences with maximal marginal relevance fitting into token_budget,
+    skipping sentences repeating selected ones. Returns indexes in original order.
+    """
+    relevance = scores / scores.max() if scores.max() > 0 else scores
+    max_similarity = np.zeros(features.n_rows)
+    available = sentence_tokens <= token_budget
+    selected = []
+    remaining_budget = token_budget
+    while available.any():
+        mmr = MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * max_similarity
+        best = int(np.argmax(np.where(available, mmr, -np.inf)))
+        selected.append(best)
+        remaining_budget -= sentence_tokens[best]
+        max_similarity = np.maximum(max_similarity, features.row_similarities(best))
+        available &= (sentence_tokens <= remaining_budget) & (
+            max_similarity < REDUNDANCY_THRESHOLD
+        )
+        available[best] = False
+    return sorted(selected)
+
+
+def get_compression_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["saved_tokens"] = stats["original_tokens"] - stats["compressed_tokens"]
+    stats["ratio"] = (
+        stats["compressed_tokens"] / stats["original_tokens"]
+        if stats["original_tokens"]
+        else 1.0
+    )
+    return stats
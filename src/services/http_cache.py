@@ -0,0 +1,296 @@
+"""
+This file contains on-disk HTTP response cache shared by news API, article and bot requests.
+
+Responses are keyed by url without secret query params (e.g. token). Cache honors Cache-Control,
+revalidates stale entries with ETag/Last-Modified and evicts least recently used entries
+once total size of cached bodies exceeds the configured limit.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+
+from src.config.config import app_settings
+from src.config.logging_config import ROOT_DIR
+
+logger = getLogger(__name__)
+
+SECRET_QUERY_PARAMS = {"token", "api_key", "apikey"}
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HttpCache:
+    """Size-bounded LRU cache of HTTP responses stored on local disk."""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._total_bytes = sum(
+            os.path.getsize(os.path.join(self.cache_dir, filename))
+            for filename in os.listdir(self.cache_dir)
+            if filename.endswith(".body")
+        )
+
+    @staticmethod
+    def cache_key(url: str) -> str:
+        """Returns key of url with secret query params removed."""
+        parts = urlsplit(url)
+        query = [
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if name.lower() not in SECRET_QUERY_PARAMS
+        ]
+        public_url = urlunsplit(parts._replace(query=urlencode(sorted(query))))
+        return hashlib.sha256(public_url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base_path = os.path.join(self.cache_dir, key)
+        return f"{base_path}.meta", f"{base_path}.body"
+
+    def get(self, url: str) -> Optional[Tuple[dict, bytes]]:
+        """Returns (metadata, body) of cached response and marks it as recently used."""
+        meta_path, body_path = self._paths(self.cache_key(url))
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def put(self, url: str, headers: Dict[str, str], body: bytes, default_ttl: int = 0):
+        """Stores response unless Cache-Control forbids it."""
+        cache_control = parse_cache_control(headers)
+        if "no-store" in cache_control:
+            return
+
+        meta = {
+            "url": url.split("?")[0],
+            "headers": {
+                name: value
+                for name, value in headers.items()
+                if name.lower() in ("etag", "last-modified", "content-type")
+            },
+            "expires_at": time.time() + get_ttl(cache_control, default_ttl),
+        }
+        meta_path, body_path = self._paths(self.cache_key(url))
+
+        with self._lock:
+            previous_size = (
+                os.path.getsize(body_path) if os.path.exists(body_path) else 0
+            )
+            write_atomically(body_path, body)
+            write_atomically(meta_path, json.dumps(meta).encode("utf-8"))
+            self._total_bytes += len(body) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def refresh(self, url: str, meta: dict, headers: Dict[str, str], default_ttl: int):
+        """Updates expiration time of entry revalidated with 304 Not Modified response."""
+        cache_control = parse_cache_control(headers)
+        meta["expires_at"] = time.time() + get_ttl(cache_control, default_ttl)
+        for name, value in headers.items():
+            if name.lower() in ("etag", "last-modified"):
+                meta["headers"][name] = value
+
+        meta_path, _ = self._paths(self.cache_key(url))
+        write_atomically(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _evict(self):
+        """Removes least recently used entries until cache fits into 90% of max size."""
+        meta_files = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".meta"):
+                meta_path = os.path.join(self.cache_dir, filename)
+                meta_files.append((os.path.getmtime(meta_path), meta_path))
+
+        target_bytes = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _, meta_path in sorted(meta_files):
+            if self._total_bytes <= target_bytes:
+                break
+            body_path = meta_path[: -len(".meta")] + ".body"
+            try:
+                body_size = os.path.getsize(body_path)
+                os.remove(body_path)
+                os.remove(meta_path)
+            except OSError:
+                continue
+            self._total_bytes -= body_size
+            evicted += 1
+        logger.info(f"Evicted {evicted} entries from HTTP cache '{self.cache_dir}'.")
+
+
+def parse_cache_control(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+    value = next(
+        (v for name, v in headers.items() if name.lower() == "cache-control"), ""
+    )
+    directives = {}
+    for directive in value.split(","):
+        directive = directive.strip().lower()
+        if not directive:
+            continue
+        name, _, argument = directive.partition("=")
+        directives[name] = argument.strip('"') or None
+    return directives
+
+
+def get_ttl(cache_control: Dict[str, Optional[str]], default_ttl: int) -> int:
+    """Returns number of seconds response stays fresh."""
+    if "no-cache" in cache_control:
+        return 0
+    for directive in ("s-maxage", "max-age"):
+        if cache_control.get(directive):
+            try:
+                return int(cache_control[directive])
+            except ValueError:
+                pass
+    return default_ttl
+
+
+def get_conditional_headers(meta: dict) -> Dict[str, str]:
+    headers = {}
+    for name, value in meta["headers"].items():
+        if name.lower() == "etag":
+            headers["If-None-Match"] = value
+        elif name.lower() == "last-modified":
+            headers["If-Modified-Since"] = value
+    return headers
+
+
+def write_atomically(path: str, data: bytes):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+_default_http_cache: HttpCache | None = None
+_default_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache | None:
+    """Returns process-wide HTTP cache, None if cache is disabled."""
+    global _default_http_cache
+    if not app_settings.HTTP_CACHE_ENABLED:
+        return None
+    with _default_http_cache_lock:
+        if _default_http_cache is None:
+            _default_http_cache = HttpCache(
+                app_settings.HTTP_CACHE_DIR or os.path.join(ROOT_DIR, "cache", "http"),
+                app_settings.HTTP_CACHE_MAX_BYTES,
+            )
+    return _default_http_cache
+
+
+def cached_get(
+    url: str,
+    headers: Dict[str, str] = None,
+    timeout: float = None,
+    max_bytes: int = None,
+    default_ttl: int = 0,
+    cache: HttpCache = None,
+) -> CachedResponse:
+    """
+    Performs GET request through HTTP cache.
+
+    Fresh cached responses are returned without network requests, stale responses are
+    revalidated with conditional headers. Response body is truncated to max_bytes if specified,
+    truncated responses are not cached.
+    """
+    cache = cache or get_http_cache()
+    request_headers = dict(headers or {})
+    cached = cache.get(url) if cache else None
+
+    if cached:
+        meta, body = cached
+        if time.time() < meta["expires_at"]:
+            return CachedResponse(url, 200, body, meta["headers"], from_cache=True)
+        request_headers.update(get_conditional_headers(meta))
+
+    with requests.get(
+        url, headers=request_headers, timeout=timeout, stream=True
+    ) as response:
+        response_headers = dict(response.headers)
+        if cached and response.status_code == 304:
+            cache.refresh(url, meta, response_headers, default_ttl)
+            return CachedResponse(url, 200, body, meta["headers"], from_cache=True)
+
+        content = bytearray()
+        truncated = False
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            content.extend(chunk)
+            if max_bytes and len(content) > max_bytes:
+                logger.warning(
+                    f"Response of '{url.split('?')[0]}' exceeds {max_bytes} bytes. Truncating."
+                )
+                truncated = True
+                break
+        content = bytes(content[:max_bytes] if max_bytes else content)
+
+    # truncated body would be revalidated and served as the complete page for good
+    if cache and response.status_code == 200 and not truncated:
+        cache.put(url, response_headers, content, default_ttl)
+    return CachedResponse(url, response.status_code, content, response_headers)
+
+
+async def async_cached_get(
+    client: httpx.AsyncClient,
+    url: str,
+    default_ttl: int = 0,
+    cache: HttpCache = None,
+) -> CachedResponse:
+    """
+    Performs GET request with httpx async client through HTTP cache.
+    Cache files are read and written in worker threads, so the event loop is not blocked.
+    """
+    cache = cache or await asyncio.to_thread(get_http_cache)
+    request_headers = {}
+    cached = await asyncio.to_thread(cache.get, url) if cache else None
+
+    if cached:
+        meta, body = cached
+        if time.time() < meta["expires_at"]:
+            return CachedResponse(url, 200, body, meta["headers"], from_cache=True)
+        request_headers.update(get_conditional_headers(meta))
+
+    response = await client.get(url, headers=request_headers)
+    response_headers = dict(response.headers)
+    if cached and response.status_code == 304:
+        await asyncio.to_thread(cache.refresh, url, meta, response_headers, default_ttl)
+        return CachedResponse(url, 200, body, meta["headers"], from_cache=True)
+
+    if cache and response.status_code == 200:
+        await asyncio.to_thread(
+            cache.put, url, response_headers, response.content, default_ttl
+        )
+    return CachedResponse(url, response.status_code, response.content, response_headers)
@@ -0,0 +1,178 @@
+"""
+This file contains persistent cache of LLM responses stored in local SQLite database.
+
+Responses are keyed by hash of (provider, model, messages, parameters), so the same prompt
+sent to the same model is answered from disk. Entries expire after LLM_CACHE_TTL seconds and
+least recently used entries are evicted once total size of cached responses exceeds the limit.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Dict, List, Optional
+
+from src.config.config import app_settings
+from src.config.logging_config import ROOT_DIR
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class CachedLlmResponse:
+    output: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class LlmCache:
+    """Size-bounded LRU cache of LLM responses with TTL."""
+
+    def __init__(self, path: str, max_bytes: int, ttl: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, output TEXT NOT NULL, model TEXT, "
+                "prompt_tokens INTEGER, completion_tokens INTEGER, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_responses_accessed_at "
+                "ON llm_responses (accessed_at)"
+            )
+
+    @staticmethod
+    def cache_key(
+        provider: str, model: str, messages: List[Dict[str, str]], **params
+    ) -> str:
+        payload = json.dumps(
+            {
+                "provider": provider,
+                "model": model,
+                "messages": messages,
+                "params": params,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedLlmResponse]:
+        """Returns fresh cached response and marks it as recently used."""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT output, model, prompt_tokens, completion_tokens, created_at "
+                "FROM llm_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row and now - row[4] >= self.ttl:
+                self._connection.execute(
+                    "DELETE FROM llm_responses WHERE key = ?", (key,)
+                )
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._connection.execute(
+                "UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        return CachedLlmResponse(*row[:4])
+
+    def put(self, key: str, response: CachedLlmResponse):
+        size = len(response.output.encode("utf-8"))
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.output,
+                    response.model,
+                    response.prompt_tokens,
+                    response.completion_tokens,
+                    size,
+                    now,
+                    now,
+                ),
+            )
+            if self._total_bytes() > self.max_bytes:
+                self._evict()
+
+    def _total_bytes(self) -> int:
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()[0]
+
+    def _evict(self):
+        """Removes expired and least recently used entries until cache fits into 90% of max size."""
+        self._connection.execute(
+            "DELETE FROM llm_responses WHERE created_at <= ?", (time.time() - self.ttl,)
+        )
+        excess_bytes = self._total_bytes() - int(self.max_bytes * 0.9)
+        evicted = 0
+        if excess_bytes > 0:
+            # running total of sizes from the least recently used entry
+            evicted = self._connection.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(size) OVER "
+                "(ORDER BY accessed_at, key) - size AS evicted_before "
+                "FROM llm_responses) WHERE evicted_before < ?)",
+                (excess_bytes,),
+            ).rowcount
+        logger.info(f"Evicted {evicted} entries from LLM cache '{self.path}'.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+            ).fetchone()
+        requests_count = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests_count if requests_count else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_llm_cache: LlmCache | None = None
+_default_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LlmCache | None:
+    """Returns process-wide LLM cache, None if cache is disabled."""
+    global _default_llm_cache
+    if not app_settings.LLM_CACHE_ENABLED:
+        return None
+    with _default_llm_cache_lock:
+        if _default_llm_cache is None:
+            _default_llm_cache = LlmCache(
+                app_settings.LLM_CACHE_PATH
+                or os.path.join(ROOT_DIR, "cache", "llm.sqlite3"),
+                app_settings.LLM_CACHE_MAX_BYTES,
+                app_settings.LLM_CACHE_TTL,
+            )
+    return _default_llm_cache
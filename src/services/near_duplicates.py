@@ -0,0 +1,175 @@
+"""
+This file contains near-duplicate detection of articles based on SimHash of word shingles.
+
+Fingerprints are split into bands stored in LSH index table, articles sharing at least one band
+are candidates, candidates within NEAR_DUPLICATE_MAX_DISTANCE bits belong to the same cluster.
+With 8 bands of 8 bits any two fingerprints differing in at most 7 bits share a band.
+Only articles published within NEAR_DUPLICATE_WINDOW_DAYS are considered as candidates.
+"""
+
+import datetime as dt
+import hashlib
+import re
+from logging import getLogger
+from typing import Dict, List
+
+from src.config.config import app_settings
+from src.database.database import (
+    get_fingerprints,
+    get_lsh_candidates,
+    save_fingerprints,
+)
+
+logger = getLogger(__name__)
+
+SIMHASH_BITS = 64
+LSH_BANDS = 8
+BAND_BITS = SIMHASH_BITS // LSH_BANDS
+SHINGLE_SIZE = 3
+# texts with fewer words are too short to produce reliable fingerprints
+MIN_WORDS = 20
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def get_shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return []
+    return [" ".join(words[i : i + size]) for i in range(len(words) - size + 1)]
+
+
+def compute_simhash(text: str) -> int | None:
+    """Returns 64-bit SimHash of text's word shingles or None if text is too short."""
+    shingles = get_shingles(text)
+    if not shingles:
+        return None
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        shingle_hash = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if shingle_hash >> bit & 1 else -1
+
+    simhash = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            simhash |= 1 << bit
+    return simhash
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+def split_into_bands(simhash: int) -> List[int]:
+    band_mask = (1 << BAND_BITS) - 1
+    return [simhash >> (band * BAND_BITS) & band_mask for band in range(LSH_BANDS)]
+
+
+def to_signed(simhash: int) -> int:
+    """Converts unsigned 64-bit value to signed one to fit BIGINT column."""
+    return (
+        simhash - (1 << SIMHASH_BITS) if simhash >= 1 << (SIMHASH_BITS - 1) else simhash
+    )
+
+
+def to_unsigned(simhash: int) -> int:
+    return simhash + (1 << SIMHASH_BITS) if simhash < 0 else simhash
+
+
+def get_fingerprint_text(article) -> str:
+    return " ".join(
+        part for part in (article.title, article.text, article.body) if part
+    )
+
+
+def assign_near_duplicate_clusters(session, articles) -> Dict[int, int]:
+    """
+    Fingerprints articles and assigns each one to a cluster of near-duplicates.
+    Returns mapping of article id to cluster id (id of the first article of the cluster).
+    """
+    if not app_settings.NEAR_DUPLICATE_DETECTION:
+        return {article.id: article.id for article in articles}
+
+    clusters = get_fingerprints(session, [article.id for article in articles])
+    new_articles = sorted(
+        (article for article in articles if article.id not in clusters),
+        key=lambda article: article.id,
+    )
+    simhashes = {
+        article.id: compute_simhash(get_fingerprint_text(article))
+        for article in new_articles
+    }
+
+    bands = {
+        (band, value)
+        for simhash in simhashes.values()
+        if simhash is not None
+        for band, value in enumerate(split_into_bands(simhash))
+    }
+    since_date = min(
+        (article.date for article in new_articles if article.date), default=None
+    )
+    if since_date:
+        since_date -= dt.timedelta(days=app_settings.NEAR_DUPLICATE_WINDOW_DAYS)
+
+    # (band, value) -> list of (article_id, simhash, cluster_id)
+    lsh_index = {}
+    for band, value, article_id, simhash, cluster_id in get_lsh_candidates(
+        session, bands, since_date
+    ):
+        lsh_index.setdefault((band, value), []).append(
+            (article_id, to_unsigned(simhash), cluster_id)
+        )
+
+    max_distance = app_settings.NEAR_DUPLICATE_MAX_DISTANCE
+    fingerprints = []
+    for article in new_articles:
+        simhash = simhashes[article.id]
+        cluster_id = article.id
+        if simhash is not None:
+            article_bands = list(enumerate(split_into_bands(simhash)))
+            candidates = [
+                candidate
+                for band in article_bands
+                for candidate in lsh_index.get(band, [])
+            ]
+            for _, candidate_simhash, candidate_cluster_id in sorted(candidates):
+                if hamming_distance(simhash, candidate_simhash) <= max_distance:
+                    cluster_id = candidate_cluster_id
+                    break
+
+            for band in article_bands:
+                lsh_index.setdefault(band, []).append((article.id, simhash, cluster_id))
+
+        clusters[article.id] = cluster_id
+        fingerprints.append(
+            {
+                "article_id": article.id,
+                "simhash": to_signed(simhash) if simhash is not None else None,
+                "cluster_id": cluster_id,
+            }
+        )
+
+    save_fingerprints(
+        session,
+        fingerprints,
+        [
+            {"band": band, "value": value, "article_id": article_id}
+            for article_id, simhash in simhashes.items()
+            if simhash is not None
+            for band, value in enumerate(split_into_bands(simhash))
+        ],
+    )
+
+    duplicates = sum(
+        1 for article_id, cluster_id in clusters.items() if article_id != cluster_id
+    )
+    logger.info(
+        f"Fingerprinted {len(new_articles)} new articles. "
+        f"{duplicates} of {len(articles)} articles are near-duplicates of other articles."
+    )
+    return clusters
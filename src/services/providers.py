@@ -0,0 +1,258 @@
+"""
+This file contains registry of LLM providers (OpenAI, OpenRouter) with one long-lived client each.
+
+Client of a provider is created once and reused, so its HTTP connection pool stays warm between
+requests. Every provider keeps outcomes and latencies of its recent requests and has a circuit
+breaker: after LLM_CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens and requests
+are routed to the next provider straight away. After LLM_CIRCUIT_RESET_SECONDS a single trial
+request is let through, its success closes the circuit and its failure opens it again.
+Only transient errors (timeouts, connection errors, 429 and 5xx responses) are failures of
+a provider. Client errors (e.g. 400 Bad Request of too long prompt or 401) would fail with
+every provider, so they are raised straight away and don't affect the circuit.
+"""
+
+import threading
+import time
+from collections import deque
+from logging import getLogger
+from typing import Callable, Dict, List, TypeVar
+
+import httpx
+from openai import APIConnectionError, APIStatusError, OpenAI
+
+from src.config.config import app_settings
+
+logger = getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+STATS_WINDOW = 100
+PROVIDER_BASE_URLS = {
+    "openai": None,
+    "openrouter": "https://openrouter.ai/api/v1",
+}
+
+T = TypeVar("T")
+
+
+class ProvidersUnavailableError(Exception):
+    pass
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Returns True for errors which may not happen on retry or with another provider."""
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(
+        error, (APIConnectionError, httpx.TransportError, TimeoutError, ConnectionError)
+    )
+
+
+class LlmProvider:
+    """Pooled client, request statistics and circuit breaker of one LLM provider."""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str | None,
+        api_key: str,
+        failure_threshold: int,
+        reset_seconds: float,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_error = None
+        self._opened_at = 0.0
+        self._trial_request_sent = False
+        # (succeeded, latency in seconds) of recent requests
+        self._recent = deque(maxlen=STATS_WINDOW)
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAI:
+        with self._lock:
+            if self._client is None:
+                max_connections = app_settings.LLM_MAX_CONCURRENT_REQUESTS
+                # retries are done by create_chat_completion, so they respect the rate limiter
+                self._client = OpenAI(
+                    base_url=self.base_url,
+                    api_key=self.api_key,
+                    max_retries=0,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=max_connections,
+                            max_keepalive_connections=max_connections,
+                        ),
+                        timeout=app_settings.LLM_REQUEST_TIMEOUT,
+                    ),
+                )
+        return self._client
+
+    def allow_request(self) -> bool:
+        """Returns False while circuit is open, lets a single trial request through afterwards."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self._trial_request_sent = False
+            if self.state == HALF_OPEN:
+                if self._trial_request_sent:
+                    return False
+                self._trial_request_sent = True
+            return True
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.requests += 1
+            self._recent.append((True, latency))
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"Circuit of LLM provider '{self.name}' is closed.")
+            self.state = CLOSED
+
+    def record_failure(self, latency: float, error: Exception):
+        """Records failed request, only transient errors count towards opening the circuit."""
+        with self._lock:
+            self.requests += 1
+            if not is_transient_error(error):
+                self.last_error = f"{type(error).__name__}: {error}"
+                return
+            self.failures += 1
+            self._recent.append((False, latency))
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if (
+                self.state == HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != OPEN:
+                    logger.warning(
+                        f"Circuit of LLM provider '{self.name}' is open after "
+                        f"{self.consecutive_failures} consecutive failures. "
+                        f"Last error: {self.last_error}"
+                    )
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release_trial_request(self):
+        """Lets another trial request through if the trial request ended without outcome."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_request_sent = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = list(self._recent)
+            state = self.state
+            if (
+                state == OPEN
+                and time.monotonic() - self._opened_at >= self.reset_seconds
+            ):
+                state = HALF_OPEN
+        latencies = sorted(latency for _, latency in recent)
+        return {
+            "name": self.name,
+            "state": state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "error_rate": (
+                sum(not succeeded for succeeded, _ in recent) / len(recent)
+                if recent
+                else 0.0
+            ),
+            "avg_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p95_latency": (
+                latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                if latencies
+                else 0.0
+            ),
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_providers: Dict[str, LlmProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str) -> LlmProvider:
+    """Returns process-wide provider by its name ('openai' or 'openrouter')."""
+    with _providers_lock:
+        provider = _providers.get(name)
+        if provider is None:
+            api_keys = {
+                "openai": app_settings.OPENAI_API_KEY,
+                "openrouter": app_settings.OPENROUTER_API_KEY,
+            }
+            provider = LlmProvider(
+                name,
+                PROVIDER_BASE_URLS[name],
+                api_keys[name],
+                app_settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                app_settings.LLM_CIRCUIT_RESET_SECONDS,
+            )
+            _providers[name] = provider
+    return provider
+
+
+def get_provider_names() -> List[str]:
+    """Returns providers in order of preference: OpenRouter only in debug mode, OpenAI first otherwise."""
+    if app_settings.DEBUG_MODE:
+        return ["openrouter"]
+    return ["openai", "openrouter"]
+
+
+def get_providers_stats() -> List[dict]:
+    return [get_provider(name).stats() for name in get_provider_names()]
+
+
+def call_with_failover(request: Callable[[str], T]) -> T:
+    """
+    Calls request(provider_name) with providers in order of preference until one succeeds.
+    Providers with open circuit are skipped without sending a request. Only transient errors
+    are retried with the next provider, other errors are raised straight away.
+    """
+    last_error = None
+    for name in get_provider_names():
+        provider = get_provider(name)
+        if not provider.allow_request():
+            logger.warning(f"Circuit of LLM provider '{name}' is open. SKIPPING")
+            continue
+        try:
+            return request(name)
+        except Exception as e:
+            if not is_transient_error(e):
+                raise
+            logger.error(f"Request to LLM provider '{name}' failed: {e}", exc_info=True)
+            last_error = e
+        finally:
+            # outcome is recorded by the request, unless it failed before being sent
+            provider.release_trial_request()
+
+    if last_error:
+        raise last_error
+    raise ProvidersUnavailableError(
+        f"Circuits of all LLM providers are open: {get_provider_names()}."
+    )
+
+
+def close_providers():
+    with _providers_lock:
+        for provider in _providers.values():
+            provider.close()
@@ -2,44 +2,47 @@
 This file contains functions to get/download/organize/save data from cryptonews websites.
 """
 
+import asyncio
 import datetime as dt
 from logging import getLogger
+from typing import List, Tuple
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.config import app_settings
-from src.database.database import save_articles_to_db
-from src.database.models import CryptonewsArticlesDump
+from src.database import async_database
+from src.database.database import (
+    get_watermark,
+    save_articles_to_db,
+    update_watermark,
+)
+from src.database.models import CryptonewsArticlesDump, IngestionWatermark
 from src.services.datetime_util import DatetimeUtil
+from src.services.http_cache import async_cached_get, cached_get
+from src.services.scrape_articles import scrape_article
 
 logger = getLogger(__name__)
 
+MAX_PAGES_TO_PROCESS = 5  # Basic plans can query up to 5 pages
+ITEMS_PER_PAGE = 100  # max allowed items in response is 100 json objects
+WATERMARK_SOURCE = "cryptonews"
+
 
 def get_article_content(news_url: str) -> str:
     """
     Scrapes text of news article.
     """
-
-    response = requests.get(news_url)
-    page = response.text
-    soup = BeautifulSoup(page, features="html.parser")
-
     try:
-        article_content = soup.find(id="articleContent")
-        if not article_content:
-            article_content = soup.find(class_="post-box")
-        if not article_content:
-            article_content = soup.find(class_="entry-content")
-    except:
-        article_content = None
-
-    return article_content.text if article_content else ""
+        return scrape_article(news_url)
+    except Exception as e:
+        logger.warning(f"Failed to scrape article '{news_url}': {e}")
+        return ""
 
 
 def create_cryptonews_article_db_entity(
     metadata: dict,
-    article_content: str,
+    article_content: str | None,
     ticker: str,
 ) -> CryptonewsArticlesDump:
     """Create database entry."""
@@ -83,71 +86,231 @@ def pull_articles_from_api(session, as_of_date: dt.date, ticker: str = None):
 
     Tags feature is not available yet.
     """
-    max_pages_to_process = 5  # Basic plans can query up to 5 pages
-    items = 100  # max allowed items in response is 100 json objects
+    watermark = get_watermark(session, get_watermark_key(ticker), WATERMARK_SOURCE)
 
-    skip_the_rest_of_articles = False
     db_entities = []
-    for page in range(1, max_pages_to_process + 1):
-        if skip_the_rest_of_articles:
-            break
+    for page in range(1, MAX_PAGES_TO_PROCESS + 1):
         articles_metadata_list = get_cryptonews_response(
-            ticker, items, page, as_of_date
+            ticker, ITEMS_PER_PAGE, page, as_of_date
         )
 
         if not articles_metadata_list:
             logger.warning(
-                f"No data to pull from https://cryptonews-api.com/ with params (ticker, items, page, as_of_date): "
-                f"({(ticker, items, page, as_of_date)}). Skipping."
+                f"No data to pull from {app_settings.CRYPTONEWS_API_URL} with params (ticker, items, page, as_of_date): "
+                f"({(ticker, ITEMS_PER_PAGE, page, as_of_date)}). Skipping."
             )
             continue
 
-        for article_metadata in articles_metadata_list:
-            news_url = article_metadata.get("news_url")
-            if news_url:
-                # TODO: do not scrape/save article's content, we have a article link saved and
-                #  we can scrape it later if needed
-                # article_content = get_article_content(news_url)
-                article_content = ""
+        page_entities, reached_known_articles = collect_new_articles(
+            articles_metadata_list, as_of_date, ticker, watermark
+        )
+        db_entities.extend(page_entities)
+        if reached_known_articles:
+            break
 
-                db_entity = create_cryptonews_article_db_entity(
-                    article_metadata, article_content, ticker
-                )
-                if db_entity.date.date() < as_of_date:
-                    logger.warning(
-                        f"Current article's date = {db_entity.date} is earlier than the specified "
-                        f"as_of_date = {as_of_date}. So skipping further processing for ticker '{ticker}'.\n"
-                    )
-                    skip_the_rest_of_articles = True
-                    break
-
-                existing_article = (
-                    session.query(CryptonewsArticlesDump)
-                    .filter_by(news_url=news_url)
-                    .first()
+    inserted, skipped = save_articles_to_db(session, db_entities)
+    save_watermark(session, ticker, db_entities)
+    logger.info(
+        f"Articles pull and save completed successfully. "
+        f"Total number of saved articles: {inserted}, already stored: {skipped}.\n"
+    )
+
+
+async def pull_articles_for_tickers(
+    session: AsyncSession, as_of_date: dt.date, tickers: List[str]
+):
+    """
+    Collects news articles for all tickers concurrently and saves them to db with async session.
+
+    Tickers are fetched in parallel over one pooled HTTP client, pages of a single ticker are
+    fetched one after another so paging stops as soon as a page crosses as_of_date boundary
+    or reaches ticker's ingestion watermark.
+    """
+    watermarks = {
+        ticker: await async_database.get_watermark(
+            session, get_watermark_key(ticker), WATERMARK_SOURCE
+        )
+        for ticker in tickers
+    }
+    max_requests = app_settings.CRYPTONEWS_MAX_CONCURRENT_REQUESTS
+    limits = httpx.Limits(
+        max_connections=max_requests, max_keepalive_connections=max_requests
+    )
+    semaphore = asyncio.Semaphore(max_requests)
+    start_time = dt.datetime.now()
+
+    async with httpx.AsyncClient(
+        limits=limits, timeout=app_settings.CRYPTONEWS_REQUEST_TIMEOUT
+    ) as client:
+        results = await asyncio.gather(
+            *[
+                fetch_ticker_articles(
+                    client, semaphore, ticker, as_of_date, watermarks[ticker]
                 )
-                if not existing_article:
-                    db_entities.append(db_entity)
+                for ticker in tickers
+            ],
+            return_exceptions=True,
+        )
 
-    save_articles_to_db(session, db_entities)
+    running_secs = (dt.datetime.now() - start_time).total_seconds()
     logger.info(
-        f"Articles pull and save completed successfully. "
-        f"Total number of saved articles: {len(db_entities)}.\n"
+        f"Fetched articles metadata for {len(tickers)} tickers in {running_secs:.2f} seconds."
     )
 
+    failed_tickers = []
+    for ticker, result in zip(tickers, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to pull articles for '{ticker}' ticker: {result}")
+            failed_tickers.append(ticker)
+            continue
 
-def get_cryptonews_response(ticker, items, page, as_of_date):
-    # Sundown Digest is an engaging evening article that encapsulates the crucial news and events of the day, presented in a digestible format. Available Mon-Fri at 7pm Eastern Time.
-    # https://cryptonews-api.com/api/v1/sundown-digest?page=1&token=GET_API_KEY
-    # start_date = get_start_date(as_of_date)
-    # start_date_str = start_date.strftime("%m%d%Y")
+        db_entities, _ = collect_new_articles(
+            result, as_of_date, ticker, watermarks[ticker]
+        )
+        inserted, skipped = await async_database.save_articles_to_db(
+            session, db_entities
+        )
+        await save_watermark_async(session, ticker, db_entities)
+        logger.info(
+            f"Articles pull and save completed for '{ticker}' ticker. "
+            f"Total number of saved articles: {inserted}, already stored: {skipped}."
+        )
+
+    if failed_tickers:
+        raise Exception(f"Articles pull failed for tickers: {failed_tickers}")
+
+
+async def fetch_ticker_articles(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    ticker: str,
+    as_of_date: dt.date,
+    watermark: IngestionWatermark = None,
+) -> List[dict]:
+    """
+    Fetches pages for one ticker until a page contains articles older than as_of_date
+    or articles already seen according to the watermark.
+    """
+    articles_metadata = []
+    for page in range(1, MAX_PAGES_TO_PROCESS + 1):
+        async with semaphore:
+            articles_metadata_list = await get_cryptonews_response_async(
+                client, ticker, ITEMS_PER_PAGE, page
+            )
+
+        if not articles_metadata_list:
+            logger.warning(
+                f"No data to pull for '{ticker}' ticker from page #{page}. Stop paging."
+            )
+            break
+
+        articles_metadata.extend(articles_metadata_list)
+        if any(
+            is_older_than(article_metadata, as_of_date)
+            or is_known_article(article_metadata, watermark)
+            for article_metadata in articles_metadata_list
+        ):
+            break
+    return articles_metadata
+
+
+def collect_new_articles(
+    articles_metadata_list: List[dict],
+    as_of_date: dt.date,
+    ticker: str,
+    watermark: IngestionWatermark = None,
+) -> Tuple[List[CryptonewsArticlesDump], bool]:
+    """
+    Creates db entities for articles published on or after as_of_date and newer than watermark.
+    Returns entities and a flag whether an article older than as_of_date or already known
+    article was reached. Articles already stored in db are skipped later in bulk by save_articles_to_db.
+    """
+    db_entities = []
+    for article_metadata in articles_metadata_list:
+        news_url = article_metadata.get("news_url")
+        if not news_url:
+            continue
+
+        if is_older_than(article_metadata, as_of_date):
+            logger.warning(
+                f"Current article's date = {article_metadata.get('date')} is earlier than the specified "
+                f"as_of_date = {as_of_date}. So skipping further processing for ticker '{ticker}'.\n"
+            )
+            return db_entities, True
+
+        if is_known_article(article_metadata, watermark):
+            logger.info(
+                f"Reached already pulled article '{news_url}' for ticker '{ticker}'. "
+                f"Skipping further processing.\n"
+            )
+            return db_entities, True
+
+        # article's content is scraped later by scrape_article_bodies stage
+        article_content = None
+        db_entity = create_cryptonews_article_db_entity(
+            article_metadata, article_content, ticker
+        )
+        db_entities.append(db_entity)
+    return db_entities, False
+
+
+def is_older_than(article_metadata: dict, as_of_date: dt.date) -> bool:
+    date_str = article_metadata.get("date")
+    return DatetimeUtil.parse_and_convert_to_utc(date_str).date() < as_of_date
+
+
+def is_known_article(
+    article_metadata: dict, watermark: IngestionWatermark | None
+) -> bool:
+    """Checks whether article is not newer than the newest article pulled before."""
+    if watermark is None:
+        return False
+    if article_metadata.get("news_url") == watermark.newest_news_url:
+        return True
+    article_date = DatetimeUtil.parse_and_convert_to_utc(article_metadata.get("date"))
+    return DatetimeUtil.to_naive_utc(article_date) < watermark.newest_date
+
+
+def get_watermark_key(ticker: str | None) -> str:
+    return ticker or "general"
+
+
+def save_watermark(
+    session, ticker: str | None, db_entities: List[CryptonewsArticlesDump]
+):
+    """Moves ticker's watermark to the newest pulled article."""
+    if db_entities:
+        update_watermark(session, *get_watermark_values(ticker, db_entities))
+
+
+async def save_watermark_async(
+    session: AsyncSession, ticker: str | None, db_entities: List[CryptonewsArticlesDump]
+):
+    if db_entities:
+        await async_database.update_watermark(
+            session, *get_watermark_values(ticker, db_entities)
+        )
 
-    token = app_settings.CRYPTONEWS_API_KEY
 
+def get_watermark_values(
+    ticker: str | None, db_entities: List[CryptonewsArticlesDump]
+) -> Tuple[str, str, dt.datetime, str]:
+    """Returns (ticker key, source, newest date, newest news_url) of the newest pulled article."""
+    newest_article = max(db_entities, key=lambda article: article.date)
+    return (
+        get_watermark_key(ticker),
+        WATERMARK_SOURCE,
+        DatetimeUtil.to_naive_utc(newest_article.date),
+        newest_article.news_url,
+    )
+
+
+def build_cryptonews_url(ticker, items, page) -> str:
+    """Returns cryptonews API url without token."""
     # TODO: review timeframe set up in url
     # Available formats:
     #   01152019-today, 01152019-01152019, today, yesterday, last7days, last30days, yeartodate
-    url_base = f"https://cryptonews-api.com"
+    url_base = app_settings.CRYPTONEWS_API_URL
     if ticker:
         url_with_params = f"{url_base}/api/v1?tickers={ticker}"
     else:
@@ -155,18 +318,32 @@ def get_cryptonews_response(ticker, items, page, as_of_date):
 
     # TODO: currently we consider that we pull articles on daily basis so we hardcode 'date' param as 'yesterday'
     # TODO: specifying &date=yesterday is not supported in Basic subscription, so pull today's articles on daily basis
-    url_with_params = url_with_params + f"&items={items}&page={page}"
+    return url_with_params + f"&items={items}&page={page}"
+
+
+def get_cryptonews_response(ticker, items, page, as_of_date):
+    # Sundown Digest is an engaging evening article that encapsulates the crucial news and events of the day, presented in a digestible format. Available Mon-Fri at 7pm Eastern Time.
+    # https://cryptonews-api.com/api/v1/sundown-digest?page=1&token=GET_API_KEY
+    # start_date = get_start_date(as_of_date)
+    # start_date_str = start_date.strftime("%m%d%Y")
+
+    token = app_settings.CRYPTONEWS_API_KEY
+    url_with_params = build_cryptonews_url(ticker, items, page)
 
     logger.info(
         f"Starting to pull data from page #{page} '{items}' items for '{ticker}' ticker "
-        f"for 'today' period from {url_base}."
+        f"for 'today' period from {app_settings.CRYPTONEWS_API_URL}."
     )
     logger.info(f"URL: {url_with_params}&token=")
 
     full_url = f"{url_with_params}&token={token}"
-    response = requests.get(full_url)
+    response = cached_get(
+        full_url,
+        timeout=app_settings.CRYPTONEWS_REQUEST_TIMEOUT,
+        default_ttl=app_settings.CRYPTONEWS_CACHE_TTL,
+    )
 
-    if response is not None and response.status_code != 200:
+    if response.status_code != 200:
         logger.error(
             f"Error on requesting '{url_with_params}&token=<my_token>': {response.content}"
         )
@@ -178,6 +355,28 @@ def get_cryptonews_response(ticker, items, page, as_of_date):
     return articles_metadata_list
 
 
+async def get_cryptonews_response_async(
+    client: httpx.AsyncClient, ticker, items, page
+) -> List[dict]:
+    token = app_settings.CRYPTONEWS_API_KEY
+    url_with_params = build_cryptonews_url(ticker, items, page)
+
+    logger.info(f"URL: {url_with_params}&token=")
+    response = await async_cached_get(
+        client,
+        f"{url_with_params}&token={token}",
+        default_ttl=app_settings.CRYPTONEWS_CACHE_TTL,
+    )
+
+    if response.status_code != 200:
+        logger.error(
+            f"Error on requesting '{url_with_params}&token=<my_token>': {response.content}"
+        )
+        raise Exception(response.content)
+
+    return response.json().get("data", [])
+
+
 def get_cryptonews_response_stub_with_error(ticker, items, page, as_of_date):
     if ticker == "Test Error":
         raise Exception("Intentional test error.")
@@ -0,0 +1,123 @@
+"""
+This file contains client-side rate limiting of LLM provider requests.
+
+Every provider gets token buckets for requests per minute and tokens per minute and a cap
+on concurrent requests, so concurrent workers send requests as fast as provider's quota allows
+instead of hitting 429 Too Many Requests. When 429 is received anyway all workers of the provider
+pause for the retry delay.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Dict
+
+from src.config.config import app_settings
+
+logger = getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously up to its capacity."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self._updated_at) * self.refill_per_second,
+        )
+        self._updated_at = now
+
+    def acquire(self, amount: float = 1):
+        """Blocks until amount of tokens is available (at most capacity) and takes them."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_secs = (amount - self.tokens) / self.refill_per_second
+            time.sleep(wait_secs)
+
+    def adjust(self, amount: float):
+        """Takes (or returns if negative) tokens without waiting, e.g. to correct an estimate."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class ProviderRateLimiter:
+    """Requests per minute, tokens per minute and concurrency limits of one provider."""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrent_requests: int,
+    ):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self.semaphore = threading.BoundedSemaphore(max_concurrent_requests)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, estimated_tokens: int):
+        """Waits for a free request slot and quota of the request, holds the slot inside the block."""
+        with self.semaphore:
+            self._wait_for_pause()
+            self.requests.acquire(1)
+            self.tokens.acquire(estimated_tokens)
+            yield
+
+    def pause(self, seconds: float):
+        """Pauses all requests to the provider, e.g. after 429 Too Many Requests response."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _wait_for_pause(self):
+        while True:
+            with self._lock:
+                wait_secs = self._paused_until - time.monotonic()
+            if wait_secs <= 0:
+                return
+            time.sleep(wait_secs)
+
+
+_rate_limiters: Dict[str, ProviderRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Returns process-wide rate limiter of provider."""
+    with _rate_limiters_lock:
+        rate_limiter = _rate_limiters.get(provider)
+        if rate_limiter is None:
+            rate_limiter = ProviderRateLimiter(
+                app_settings.LLM_REQUESTS_PER_MINUTE,
+                app_settings.LLM_TOKENS_PER_MINUTE,
+                app_settings.LLM_MAX_CONCURRENT_REQUESTS,
+            )
+            _rate_limiters[provider] = rate_limiter
+    return rate_limiter
+
+
+def get_retry_delay(headers: Dict[str, str], attempt: int) -> float:
+    """Returns delay before retry: provider's Retry-After header or exponential backoff with jitter."""
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            pass
+    backoff = min(app_settings.LLM_BACKOFF_BASE_SECONDS * 2**attempt, 60)
+    return backoff * random.uniform(0.5, 1.5)
@@ -0,0 +1,145 @@
+"""
+This file contains functions to scrape bodies of news articles.
+"""
+
+import datetime as dt
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging import getLogger
+from typing import Dict
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+from src.config.config import app_settings
+from src.database.database import bulk_update_articles, get_articles_without_body
+from src.services.http_cache import cached_get
+
+logger = getLogger(__name__)
+
+REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; NewsSummarizer/1.0)"}
+
+# Known article containers in order of preference
+ARTICLE_CONTAINER_XPATHS = [
+    etree.XPath('//*[@id="articleContent"]'),
+    etree.XPath(
+        '//*[contains(concat(" ", normalize-space(@class), " "), " post-box ")]'
+    ),
+    etree.XPath(
+        '//*[contains(concat(" ", normalize-space(@class), " "), " entry-content ")]'
+    ),
+]
+
+_domain_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_domain_semaphores_lock = threading.Lock()
+
+
+def get_domain_semaphore(news_url: str) -> threading.BoundedSemaphore:
+    """Returns semaphore limiting number of concurrent requests to url's domain."""
+    domain = urlparse(news_url).netloc.lower()
+    with _domain_semaphores_lock:
+        semaphore = _domain_semaphores.get(domain)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(
+                app_settings.SCRAPER_PER_DOMAIN_LIMIT
+            )
+            _domain_semaphores[domain] = semaphore
+    return semaphore
+
+
+def fetch_article_page(news_url: str) -> bytes:
+    """Downloads article page, reading no more than SCRAPER_MAX_RESPONSE_BYTES bytes."""
+    with get_domain_semaphore(news_url):
+        response = cached_get(
+            news_url,
+            headers=REQUEST_HEADERS,
+            timeout=app_settings.SCRAPER_REQUEST_TIMEOUT,
+            max_bytes=app_settings.SCRAPER_MAX_RESPONSE_BYTES,
+            default_ttl=app_settings.ARTICLE_CACHE_TTL,
+        )
+
+    if response.status_code != 200:
+        raise Exception(f"Got {response.status_code} status code for '{news_url}'.")
+    return response.content
+
+
+def extract_article_text(page: bytes) -> str:
+    """
+    Extracts article's text from known containers.
+    Uses lxml as a fast path and falls back to BeautifulSoup if lxml fails to parse the page.
+    """
+    if not page:
+        return ""
+
+    try:
+        document = lxml_html.fromstring(page)
+    except (etree.ParserError, ValueError) as e:
+        logger.warning(f"lxml failed to parse article page: {e}. Using BeautifulSoup.")
+        return extract_article_text_with_bs4(page)
+
+    for container_xpath in ARTICLE_CONTAINER_XPATHS:
+        containers = container_xpath(document)
+        if containers:
+            return containers[0].text_content()
+    return ""
+
+
+def extract_article_text_with_bs4(page: bytes) -> str:
+    soup = BeautifulSoup(page, features="html.parser")
+
+    article_content = soup.find(id="articleContent")
+    if not article_content:
+        article_content = soup.find(class_="post-box")
+    if not article_content:
+        article_content = soup.find(class_="entry-content")
+
+    return article_content.text if article_content else ""
+
+
+def scrape_article(news_url: str) -> str:
+    page = fetch_article_page(news_url)
+    return extract_article_text(page)
+
+
+def scrape_article_bodies(session, as_of_date: dt.date) -> int:
+    """
+    Scrapes bodies of all articles for as_of_date which were not scraped yet and saves them to db.
+
+    Pages are downloaded by a bounded pool of workers with a per-domain concurrency limit.
+    Articles which failed to be scraped get an empty body so they are not retried on every run.
+    """
+    articles = get_articles_without_body(session, as_of_date)
+    if not articles:
+        logger.info(f"No articles to scrape for {as_of_date}.")
+        return 0
+
+    logger.info(f"Starting to scrape {len(articles)} articles for {as_of_date}...")
+    start_time = dt.datetime.now()
+
+    bodies = {}
+    with ThreadPoolExecutor(max_workers=app_settings.SCRAPER_MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(scrape_article, news_url): (article_id, news_url)
+            for article_id, news_url in articles
+        }
+        for future in as_completed(futures):
+            article_id, news_url = futures[future]
+            try:
+                bodies[article_id] = future.result()
+            except Exception as e:
+                logger.warning(f"Failed to scrape article '{news_url}': {e}")
+                bodies[article_id] = ""
+
+    bulk_update_articles(
+        session,
+        [{"id": article_id, "body": body} for article_id, body in bodies.items()],
+    )
+
+    scraped = sum(1 for body in bodies.values() if body)
+    running_secs = (dt.datetime.now() - start_time).total_seconds()
+    logger.info(
+        f"Scraped {scraped} of {len(articles)} articles in {running_secs:.2f} seconds."
+    )
+    return scraped
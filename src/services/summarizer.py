@@ -1,15 +1,44 @@
+import asyncio
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging import getLogger
+from typing import Dict, Iterator, List, Tuple
 
 from src.config.config import app_settings
 from src.config.constants import TICKERS
+from src.database.async_connection import create_async_session
 from src.database.connection import create_session
-from src.database.database import get_articles_by_ticker
-from src.services.pull_articles import pull_articles
-from src.services.utils import summarize_text
+from src.database.database import (
+    ArticleWriter,
+    get_cluster_summaries,
+    get_daily_master_summary,
+    iter_article_batches,
+    iter_article_rows,
+    save_master_summary,
+)
+from src.database.models import CryptonewsArticlesDump
+from src.services.near_duplicates import assign_near_duplicate_clusters
+from src.services.pull_articles import pull_articles, pull_articles_for_tickers
+from src.services.scrape_articles import scrape_article_bodies
+from src.services.utils import (
+    count_tokens,
+    map_reduce_summarize,
+    summarize_text,
+    summarize_texts_batch,
+)
 
 logger = getLogger(__name__)
 
+# columns needed to fingerprint and summarize articles, large summary columns are not loaded
+ARTICLE_TEXT_COLUMNS = (
+    CryptonewsArticlesDump.id,
+    CryptonewsArticlesDump.news_url,
+    CryptonewsArticlesDump.title,
+    CryptonewsArticlesDump.text,
+    CryptonewsArticlesDump.body,
+    CryptonewsArticlesDump.date,
+)
+
 
 def create_content_summary(session, as_of_date: dt.date, ticker: str):
     prompt = app_settings.CONTENT_SUMMARY_PROMPT
@@ -17,66 +46,263 @@ def create_content_summary(session, as_of_date: dt.date, ticker: str):
         f"Starting content summary generation for each article with '{ticker}' ticker and no content summary.."
     )
 
-    articles = get_articles_by_ticker(
-        session, as_of_date, ticker, empty_content_summary=True
-    )
+    articles_count, summarized_clusters = 0, 0
+    cluster_summaries = {}
+    # summaries are committed every CONTENT_SUMMARY_WRITE_BATCH_SIZE articles (and on failure),
+    # so a rerun only calls LLM for articles which are still without summary
+    with ArticleWriter(
+        session, app_settings.CONTENT_SUMMARY_WRITE_BATCH_SIZE
+    ) as writer:
+        for articles in iter_article_batches(
+            session,
+            ARTICLE_TEXT_COLUMNS,
+            as_of_date,
+            ticker,
+            empty_content_summary=True,
+            batch_size=app_settings.ARTICLES_READ_BATCH_SIZE,
+        ):
+            logger.info(
+                f"Loaded {len(articles)} articles with '{ticker}' ticker and empty content summary. "
+                f"LLM will summarize every cluster of near-duplicate articles once."
+            )
+            pending_articles, cluster_texts = {}, {}
+            add_pending_clusters(
+                session,
+                articles,
+                cluster_summaries,
+                writer,
+                pending_articles,
+                cluster_texts,
+            )
+
+            for cluster_id, content_summary in summarize_concurrently(
+                cluster_texts, prompt
+            ):
+                cluster_summaries[cluster_id] = content_summary
+                summarized_clusters += 1
+                for article_id in pending_articles[cluster_id]:
+                    writer.add(article_id, content_summary=content_summary)
+            articles_count += len(articles)
+
     logger.info(
-        f"Found {len(articles)} articles with '{ticker}' ticker and empty content summary. "
-        f"LLM will be called for every link to summarize its content."
+        f"Created content summaries for {articles_count} articles "
+        f"({summarized_clusters} clusters summarized by LLM)."
     )
+    logger.info("Content summary generation completed.\n")
 
+
+def add_pending_clusters(
+    session,
+    articles,
+    cluster_summaries: Dict[int, str],
+    writer: ArticleWriter,
+    pending_articles: Dict[int, List[int]],
+    cluster_texts: Dict[int, str],
+):
+    """
+    Assigns articles to clusters of near-duplicates. Articles of already summarized clusters
+    get cluster's summary, other articles wait for the summary of the first article of
+    their cluster: they are added to pending_articles and its text to cluster_texts.
+    """
+    clusters = assign_near_duplicate_clusters(session, articles)
+    cluster_summaries.update(
+        get_cluster_summaries(session, set(clusters.values()) - set(cluster_summaries))
+    )
     for article in articles:
-        content_summary = summarize_text(article.news_url, prompt)
-        article.content_summary = content_summary
+        cluster_id = clusters[article.id]
+        content_summary = cluster_summaries.get(cluster_id)
+        if content_summary:
+            writer.add(article.id, content_summary=content_summary)
+            continue
+        pending_articles.setdefault(cluster_id, []).append(article.id)
+        cluster_texts.setdefault(cluster_id, get_article_text(article))
 
-    session.commit()
-    logger.info("Content summary generation completed.\n")
+
+def summarize_concurrently(
+    texts: Dict[int, str], prompt: str
+) -> Iterator[Tuple[int, str]]:
+    """
+    Summarizes texts in a pool of LLM_MAX_CONCURRENT_REQUESTS threads and yields (key, summary)
+    as soon as every summary is ready. Short texts are summarized in batches, one request each.
+    Request and token rates are limited per provider by make_openai_client_api_call,
+    so throughput follows provider's quota.
+    If a summary fails, the first error is raised after finished summaries are yielded.
+    """
+    if not texts:
+        return
+    batches = get_summary_batches(texts, prompt)
+    logger.info(f"Summarizing {len(texts)} texts with {len(batches)} requests...")
+    executor = ThreadPoolExecutor(
+        max_workers=min(app_settings.LLM_MAX_CONCURRENT_REQUESTS, len(batches))
+    )
+    error = None
+    try:
+        futures = [executor.submit(summarize_batch, batch, prompt) for batch in batches]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            try:
+                summaries = future.result()
+            except Exception as e:
+                # summaries which were not started yet are not requested,
+                # summaries which are being generated are still yielded
+                if error is None:
+                    error = e
+                    for pending_future in futures:
+                        pending_future.cancel()
+                continue
+            yield from summaries.items()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if error:
+        raise error
+
+
+def get_summary_batches(texts: Dict[int, str], prompt: str) -> List[Dict[int, str]]:
+    """
+    Packs texts into batches of up to CONTENT_SUMMARY_BATCH_MAX_ARTICLES texts which fit
+    into CONTENT_SUMMARY_BATCH_TOKENS together with the prompt. Long texts get a batch of their own.
+    """
+    if app_settings.CONTENT_SUMMARY_BATCH_TOKENS <= 0:
+        return [{key: text} for key, text in texts.items()]
+
+    model = app_settings.LANGUAGE_MODEL
+    budget = app_settings.CONTENT_SUMMARY_BATCH_TOKENS - count_tokens(prompt, model)
+    batches = []
+    batch, batch_tokens = {}, 0
+    for key, text in texts.items():
+        n_tokens = count_tokens(text, model)
+        if batch and (
+            len(batch) == app_settings.CONTENT_SUMMARY_BATCH_MAX_ARTICLES
+            or batch_tokens + n_tokens > budget
+        ):
+            batches.append(batch)
+            batch, batch_tokens = {}, 0
+        batch[key] = text
+        batch_tokens += n_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def summarize_batch(batch: Dict[int, str], prompt: str) -> Dict[int, str]:
+    if len(batch) == 1:
+        return {key: summarize_text(text, prompt) for key, text in batch.items()}
+    return summarize_texts_batch(batch, prompt)
+
+
+def get_article_text(article) -> str:
+    """Returns scraped article's body, or title and description if the body is missing."""
+    if article.body:
+        return article.body
+    if article.text:
+        return f"{article.title}\n\n{article.text}"
+    return article.news_url
 
 
 def create_master_summary(session, as_of_date: dt.date, ticker: str):
-    master_summary = ""
     prompt = app_settings.MASTER_SUMMARY_PROMPT
     logger.info(
         f"Starting master summary generation process for '{ticker}' ticker for all articles with content summary.."
     )
 
-    # TODO: carefully select records based on date (take care of timezone)
-    articles = get_articles_by_ticker(
-        session,
-        as_of_date,
-        ticker,
-        empty_content_summary=False,
-        empty_master_summary=True,
-    )
+    articles = get_master_summary_articles(session, as_of_date, ticker)
+    if articles is None:
+        return
+    article_ids = [article.id for article in articles]
+
     logger.info(
-        f"Found {len(articles)} articles with '{ticker}' ticker, not empty content summary and "
-        f"empty master summary. LLM will be called for every link to summarize its content."
+        f"Found {len(articles)} articles with '{ticker}' ticker and not empty content summary. "
+        f"Content summaries will be merged with map-reduce."
     )
 
     all_content_summaries_list = [article.content_summary for article in articles]
-    all_content_summaries = "\n\n".join(all_content_summaries_list)
-
-    if all_content_summaries:
-        master_summary = articles[0].master_summary
-        if not master_summary:
-            master_summary = summarize_text(all_content_summaries, prompt)
-            for article in articles:
-                article.master_summary = master_summary
+
+    if all_content_summaries_list:
+        usage = {}
+        master_summary = map_reduce_summarize(all_content_summaries_list, prompt, usage)
+        if master_summary:
+            save_master_summary(
+                session, as_of_date, ticker, master_summary, article_ids, usage
+            )
     else:
         logger.warning(f"No summaries were found for {as_of_date.isoformat()} date.")
 
-    session.commit()
     logger.info("Master summary generation completed.\n")
 
 
+def get_master_summary_articles(session, as_of_date: dt.date, ticker: str):
+    """
+    Returns (id, content_summary) rows of ticker's articles with content summary,
+    None if master summary of these articles is already saved.
+    """
+    # TODO: carefully select records based on date (take care of timezone)
+    articles = list(
+        iter_article_rows(
+            session,
+            (CryptonewsArticlesDump.id, CryptonewsArticlesDump.content_summary),
+            as_of_date,
+            ticker,
+            empty_content_summary=False,
+            batch_size=app_settings.ARTICLES_READ_BATCH_SIZE,
+        )
+    )
+    daily_master_summary = get_daily_master_summary(session, as_of_date, ticker)
+    if daily_master_summary and daily_master_summary.article_ids == [
+        article.id for article in articles
+    ]:
+        logger.info(
+            f"Master summary of '{ticker}' ticker for {as_of_date.isoformat()} is up to date. SKIPPING."
+        )
+        return None
+    return articles
+
+
 def pull_articles_and_save_articles(as_of_date: dt.date, test: bool = False):
     """"""
+    if not test:
+        asyncio.run(pull_articles_and_save_articles_async(as_of_date))
+        return
+
     with create_session() as session:
         for ticker in TICKERS:
             logger.info(f"Starting articles pull for '{ticker}' ticker...")
             pull_articles(session, as_of_date, ticker, test=test)
 
 
+async def pull_articles_and_save_articles_async(as_of_date: dt.date):
+    """Pulls articles for all tickers concurrently."""
+    async with create_async_session() as session:
+        logger.info(f"Starting concurrent articles pull for {len(TICKERS)} tickers...")
+        await pull_articles_for_tickers(session, as_of_date, list(TICKERS))
+
+    # scraping and summarization use synchronous sessions in worker threads
+    with create_session() as session:
+        logger.info("Starting to scrape bodies of new articles...")
+        await asyncio.to_thread(scrape_article_bodies, session, as_of_date)
+
+
+async def process_new_articles(dates: List[dt.date]):
+    """
+    Streaming ingestion step: pulls articles published since the first date, then scrapes
+    bodies and creates content summaries of new articles for every date.
+    """
+    async with create_async_session() as session:
+        await pull_articles_for_tickers(session, dates[0], list(TICKERS))
+
+    with create_session() as session:
+        for as_of_date in dates:
+            await asyncio.to_thread(scrape_article_bodies, session, as_of_date)
+            await asyncio.to_thread(create_content_summaries, session, as_of_date)
+
+
+def create_content_summaries(session, as_of_date: dt.date):
+    """Creates content summaries for articles of all tickers."""
+    for ticker in TICKERS:
+        create_content_summary(session, as_of_date, ticker)
+
+
 def create_and_save_summaries(as_of_date: dt.date, test: bool = False):
     """"""
     with create_session() as session:
@@ -1,8 +1,12 @@
 import datetime as dt
+import json
 import os
+import re
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 
 import tiktoken
 from langchain.chains.summarize import load_summarize_chain
@@ -11,13 +15,31 @@ from langchain.text_splitter import (
     RecursiveCharacterTextSplitter,
 )
 from langchain_community.chat_models import ChatOpenAI
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 
 from src.config.config import app_settings
 from src.config.logging_config import LOG_DIR
+from src.services.extractive import compress_text
+from src.services.llm_cache import CachedLlmResponse, LlmCache, get_llm_cache
+from src.services.providers import (
+    call_with_failover,
+    get_provider,
+    get_provider_names,
+)
+from src.services.rate_limiter import get_rate_limiter, get_retry_delay
 
 logger = getLogger(__name__)
 
+REDUCE_PROMPT = (
+    "You are an expert at summarizing information concisely for business users. "
+    "Refine the following summaries into one clear, concise, and readable summary:"
+)
+BATCH_SUMMARY_INSTRUCTIONS = (
+    "Several articles are given below, every article starts with a line 'ARTICLE <id>'. "
+    "Follow the instructions above for every article separately. Answer with JSON object only, "
+    'mapping id of every article to its summary: {"<id>": "<summary>", ...}'
+)
+
 
 def generate_summary(text: str, prompt: str) -> str:
     full_prompt = f"{prompt}\n\n{text}"
@@ -37,10 +59,12 @@ def generate_summary(text: str, prompt: str) -> str:
 def summarize_text(
     article_text: str,
     system_prompt: str,
+    usage: Dict = None,
 ) -> str:
     """
     Calls LLM using system prompt and article's text message.
     Language model and system prompt are specified in .env configuration file.
+    If usage dict is passed, model name and token counts of all LLM calls are accumulated in it.
     """
     if not article_text:
         logger.info("Article text is empty. SKIPPING")
@@ -50,74 +74,313 @@ def summarize_text(
     start_time = dt.datetime.now()
 
     full_prompt = f"{system_prompt}\n\n{article_text}"
-    n_tokens = num_tokens_from_string(full_prompt, model)
+    n_tokens = count_tokens(full_prompt, model)
 
-    if n_tokens > 128000:
-        # Step 1: Split the article into manageable chunks
-        chunk_size = get_chunk_size(article_text, app_settings.LANGUAGE_MODEL)
-        text_splitter = CharacterTextSplitter(
-            chunk_size=chunk_size, chunk_overlap=chunk_size // 10
-        )
-        chunks = text_splitter.split_text(article_text)
-
-        chunk_summaries = []
-
-        # Step 2: Generate summaries for each chunk
-        for chunk in chunks:
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": chunk},
-            ]
-            logger.info("Generating summary for chunk...")
-            chunk_summary = make_openai_client_api_call(messages, model)
-            if not chunk_summary:
-                message = f"Failed to create summary for chunk: '{chunk[:15] if chunk and len(chunk) > 15 else chunk}...'"
-                logger.error(message, exc_info=True)
-                raise Exception(message)
-            chunk_summaries.append(chunk_summary)
-
-        # Step 3: Combine chunk summaries into one text for final refinement
-        combined_summaries = " ".join(chunk_summaries)
-
-        # Step 4: Refine the combined summaries into a concise overall summary
-        refinement_prompt = (
-            "You are an expert at summarizing information concisely for business users. "
-            "Refine the following summaries into one clear, concise, and readable summary: "
-            f"{combined_summaries}"
+    if n_tokens > app_settings.SUMMARY_TOKEN_BUDGET:
+        logger.info(
+            f"Prompt size ({n_tokens} tokens) exceeds SUMMARY_TOKEN_BUDGET, "
+            f"so creating summary with map-reduce."
         )
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": refinement_prompt},
-        ]
-
-        try:
-            logger.info("Refining overall summary...")
-            output = make_openai_client_api_call(messages, model)
-
-        except Exception as e:
-            logger.error(f"Error during refinement: {e}", exc_info=True)
-            return ""
+        output = map_reduce_summarize([article_text], system_prompt, usage)
     else:
         logger.info(
             f"Prompt size is less than number of allowed tokens, "
             f"so creating summary without breaking into chunks."
         )
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": article_text},
-        ]
-        output = make_openai_client_api_call(messages, model)
+        article_text = compress_for_summary(article_text)
+        messages = get_summary_messages(article_text, system_prompt)
+        output = make_openai_client_api_call(messages, model, usage)
 
     running_secs = (dt.datetime.now() - start_time).microseconds
     logger.info(f"Answer generation took {running_secs / 100000:.2f} seconds.")
     return output
 
 
+def summarize_texts_batch(
+    texts: Dict[int, str], system_prompt: str, usage: Dict = None
+) -> Dict[int, str]:
+    """
+    Summarizes several short texts with one LLM call, the model answers with JSON object
+    of summaries keyed by text's id. Texts missing in the answer (all texts if the answer
+    is not valid JSON) are summarized one by one.
+    """
+    messages = get_batch_summary_messages(texts, system_prompt)
+    logger.info(f"Generating summaries of {len(texts)} texts with one request...")
+    output = make_openai_client_api_call(messages, app_settings.LANGUAGE_MODEL, usage)
+    summaries = parse_batch_summaries(output, list(texts))
+
+    missing_keys = [key for key in texts if key not in summaries]
+    if missing_keys:
+        logger.warning(
+            f"Batch answer has no summaries of {len(missing_keys)} of {len(texts)} texts, "
+            f"summarizing them one by one."
+        )
+        for key in missing_keys:
+            summaries[key] = summarize_text(texts[key], system_prompt, usage)
+    return summaries
+
+
+def get_summary_messages(text: str, system_prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": text},
+    ]
+
+
+def get_batch_summary_messages(
+    texts: Dict[int, str], system_prompt: str
+) -> List[Dict[str, str]]:
+    """Returns messages asking to summarize several texts and answer with JSON object."""
+    return get_summary_messages(
+        "\n\n".join(f"ARTICLE {key}\n{text}" for key, text in texts.items()),
+        f"{system_prompt}\n\n{BATCH_SUMMARY_INSTRUCTIONS}",
+    )
+
+
+def parse_batch_summaries(output: str, keys: List[int]) -> Dict[int, str]:
+    """Returns not empty summaries of requested keys found in JSON answer of batch request."""
+    # models tend to wrap JSON into markdown code block
+    match = re.search(r"\{.*\}", output or "", re.DOTALL)
+    try:
+        answer = json.loads(match.group(0)) if match else None
+    except ValueError as e:
+        logger.error(f"Failed to parse answer of batch request: {e}")
+        answer = None
+    if not isinstance(answer, dict):
+        return {}
+
+    summaries = {}
+    for key in keys:
+        summary = answer.get(str(key))
+        if isinstance(summary, str) and summary.strip():
+            summaries[key] = summary.strip()
+    return summaries
+
+
+def compress_for_summary(text: str) -> str:
+    """
+    Shrinks text to EXTRACTIVE_TOKEN_BUDGET tokens by keeping its most important sentences.
+    Only texts summarized with a single request are compressed, texts exceeding
+    SUMMARY_TOKEN_BUDGET are summarized with map-reduce over all of their content.
+    """
+    if not app_settings.EXTRACTIVE_TOKEN_BUDGET:
+        return text
+    model = app_settings.LANGUAGE_MODEL
+    result = compress_text(
+        text,
+        app_settings.EXTRACTIVE_TOKEN_BUDGET,
+        lambda sentence: count_tokens(sentence, model),
+    )
+    if result.saved_tokens:
+        logger.info(
+            f"Extractive compression: {result.original_tokens} -> {result.compressed_tokens} tokens "
+            f"(ratio {result.ratio:.2f}, {result.saved_tokens} tokens saved)."
+        )
+    return result.text
+
+
+def stream_summary(article_text: str, system_prompt: str) -> Iterator[str]:
+    """
+    Yields parts of article's summary as soon as LLM generates them.
+    Cached summaries and summaries of texts which need map-reduce are yielded at once.
+    """
+    if not article_text:
+        logger.info("Article text is empty. SKIPPING")
+        return
+
+    model = app_settings.LANGUAGE_MODEL
+    if (
+        count_tokens(f"{system_prompt}\n\n{article_text}", model)
+        > app_settings.SUMMARY_TOKEN_BUDGET
+    ):
+        yield summarize_text(article_text, system_prompt)
+        return
+
+    article_text = compress_for_summary(article_text)
+    messages = get_summary_messages(article_text, system_prompt)
+    cache = get_llm_cache()
+    if cache and not app_settings.LLM_CACHE_BYPASS:
+        cached = cache.get(get_llm_cache_key(get_provider_names()[0], model, messages))
+        if cached:
+            logger.info("LLM response is loaded from cache.")
+            yield cached.output
+            return
+
+    estimated_tokens = estimate_request_tokens(messages, model)
+    provider, stream = call_with_failover(
+        lambda provider: (
+            provider,
+            create_chat_completion(
+                provider,
+                get_provider_model(provider, model),
+                messages,
+                estimated_tokens,
+                stream=True,
+            ),
+        )
+    )
+    logger.info(f"Streaming LLM response from '{provider}'...")
+
+    parts, response_model, response_usage = [], model, None
+    with stream:
+        for chunk in stream:
+            response_model = chunk.model or response_model
+            if chunk.usage:
+                response_usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+
+    output = "".join(parts)
+    if response_usage:
+        logger.info(
+            f"NUMBER OF TOKENS used per streamed request: {response_usage.total_tokens}."
+        )
+        # correct estimate by the number of tokens actually used
+        get_rate_limiter(provider).tokens.adjust(
+            response_usage.total_tokens - estimated_tokens
+        )
+    if cache and output:
+        cache.put(
+            get_llm_cache_key(provider, model, messages),
+            CachedLlmResponse(
+                output,
+                response_model,
+                response_usage.prompt_tokens if response_usage else 0,
+                response_usage.completion_tokens if response_usage else 0,
+            ),
+        )
+
+
+def map_reduce_summarize(
+    texts: List[str], system_prompt: str, usage: Dict = None
+) -> str:
+    """
+    Summarizes texts of any total size with bounded prompts.
+    Map: texts are split and packed into chunks of at most SUMMARY_TOKEN_BUDGET tokens,
+    chunks are summarized concurrently. Reduce: summaries are merged in groups of at most
+    SUMMARY_REDUCE_FAN_IN summaries (and SUMMARY_TOKEN_BUDGET tokens), groups of a level
+    concurrently, until a single summary remains. Texts which fit into one chunk take one call.
+    """
+    # level merging one summary at a time would never shrink, it would call LLM forever
+    if app_settings.SUMMARY_REDUCE_FAN_IN < 2:
+        raise ValueError(
+            f"SUMMARY_REDUCE_FAN_IN must be at least 2, got {app_settings.SUMMARY_REDUCE_FAN_IN}."
+        )
+    model = app_settings.LANGUAGE_MODEL
+    budget = app_settings.SUMMARY_TOKEN_BUDGET - count_tokens(
+        f"{system_prompt}\n\n{REDUCE_PROMPT}", model
+    )
+    pieces = [
+        piece for text in texts for piece in split_text_to_token_budget(text, budget)
+    ]
+    groups = pack_texts(pieces, budget)
+    logger.info(f"Map: summarizing {len(pieces)} texts in {len(groups)} chunks...")
+
+    level = 0
+    while True:
+        summaries = summarize_groups(groups, system_prompt, level > 0, usage)
+        if len(summaries) == 1:
+            logger.info(f"Map-reduce summary is created after {level} reduce levels.")
+            return summaries[0]
+        level += 1
+        groups = pack_texts(
+            summaries, budget, app_settings.SUMMARY_REDUCE_FAN_IN, min_group_size=2
+        )
+        logger.info(
+            f"Reduce level {level}: merging {len(summaries)} summaries in {len(groups)} groups..."
+        )
+
+
+def split_text_to_token_budget(text: str, budget: int) -> List[str]:
+    """Splits text into chunks of at most budget tokens (with 10% overlap)."""
+    n_tokens = count_tokens(text, app_settings.LANGUAGE_MODEL)
+    if n_tokens <= budget:
+        return [text]
+    # splitter counts characters, chunk size is scaled by characters per token of the text
+    chunk_size = max(1, int(len(text) * budget / n_tokens * 0.9))
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_size // 10
+    )
+    return text_splitter.split_text(text)
+
+
+def pack_texts(
+    texts: List[str],
+    budget: int,
+    max_group_size: int = None,
+    min_group_size: int = 1,
+) -> List[List[str]]:
+    """
+    Packs consecutive texts into groups of at most budget tokens and max_group_size texts.
+    Group is closed over budget only if it has min_group_size texts, so reduce always progresses.
+    """
+    groups = []
+    group, group_tokens = [], 0
+    for text in texts:
+        n_tokens = count_tokens(text, app_settings.LANGUAGE_MODEL)
+        if group and (
+            len(group) == max_group_size
+            or (group_tokens + n_tokens > budget and len(group) >= min_group_size)
+        ):
+            groups.append(group)
+            group, group_tokens = [], 0
+        group.append(text)
+        group_tokens += n_tokens
+    if group:
+        groups.append(group)
+    return groups
+
+
+def summarize_groups(
+    groups: List[List[str]], system_prompt: str, reduce: bool, usage: Dict = None
+) -> List[str]:
+    """Summarizes every group of texts with one LLM call, calls are made concurrently."""
+    model = app_settings.LANGUAGE_MODEL
+
+    def summarize_group(group: List[str]) -> Tuple[str, Dict]:
+        content = "\n\n".join(group)
+        if reduce:
+            content = f"{REDUCE_PROMPT}\n\n{content}"
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content},
+        ]
+        group_usage = {}
+        output = make_openai_client_api_call(messages, model, group_usage)
+        if not output:
+            message = f"Failed to create summary for chunk: '{content[:15]}...'"
+            logger.error(message)
+            raise Exception(message)
+        return output, group_usage
+
+    if len(groups) == 1:
+        results = [summarize_group(groups[0])]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(app_settings.LLM_MAX_CONCURRENT_REQUESTS, len(groups))
+        ) as executor:
+            results = list(executor.map(summarize_group, groups))
+
+    # usage dict is updated in caller's thread only
+    for _, group_usage in results:
+        if group_usage:
+            add_usage(
+                usage,
+                group_usage["model"],
+                group_usage["prompt_tokens"],
+                group_usage["completion_tokens"],
+            )
+    return [output for output, _ in results]
+
+
 def make_openai_client_api_call_stub(messages: List[Dict[str, str]], model: str):
     return "Mock summary for articles."
 
 
-def make_openai_client_api_call(messages: List[Dict[str, str]], model: str) -> str:
+def make_openai_client_api_call(
+    messages: List[Dict[str, str]], model: str, usage: Dict = None
+) -> str:
     start_time = dt.datetime.now()
 
     article_text = messages[0].get("content")
@@ -127,28 +390,30 @@ def make_openai_client_api_call(messages: List[Dict[str, str]], model: str) -> s
     logger.info(
         f"USER PROMPT (preview of article text that is going to be sent to LLM): '{article_text_preview}...'"
     )
+    cache = get_llm_cache()
+    if cache and not app_settings.LLM_CACHE_BYPASS:
+        cached = cache.get(get_llm_cache_key(get_provider_names()[0], model, messages))
+        if cached:
+            logger.info("LLM response is loaded from cache.")
+            add_usage(
+                usage, cached.model, cached.prompt_tokens, cached.completion_tokens
+            )
+            return cached.output
+
     logger.info("Generating LLM response... ")
 
-    if app_settings.DEBUG_MODE:
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=app_settings.OPENROUTER_API_KEY,
+    estimated_tokens = estimate_request_tokens(messages, model)
+    provider, response = call_with_failover(
+        lambda provider: (
+            provider,
+            create_chat_completion(
+                provider,
+                get_provider_model(provider, model),
+                messages,
+                estimated_tokens,
+            ),
         )
-        response = client.chat.completions.create(model=model, messages=messages)
-    else:
-        try:
-            client = OpenAI(api_key=app_settings.OPENAI_API_KEY)
-            model_for_openai = model.split("/")[-1]
-            response = client.chat.completions.create(
-                model=model_for_openai, messages=messages
-            )
-        except Exception as e:
-            logger.error(e, exc_info=True)
-            client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=app_settings.OPENROUTER_API_KEY,
-            )
-            response = client.chat.completions.create(model=model, messages=messages)
+    )
 
     if response.choices and len(response.choices) > 0:
         output = response.choices[0].message.content
@@ -168,18 +433,121 @@ def make_openai_client_api_call(messages: List[Dict[str, str]], model: str) -> s
         )
         return ""
 
-    usage = response.usage
+    response_usage = response.usage
     logger.info(
-        f"NUMBER OF TOKENS used per OpenAI API request: {usage.total_tokens}. "
-        f"System prompt (+ conversation history): {usage.prompt_tokens}. "
-        f"Generated response: {usage.completion_tokens}."
+        f"NUMBER OF TOKENS used per OpenAI API request: {response_usage.total_tokens}. "
+        f"System prompt (+ conversation history): {response_usage.prompt_tokens}. "
+        f"Generated response: {response_usage.completion_tokens}."
+    )
+    add_usage(
+        usage,
+        response.model or model,
+        response_usage.prompt_tokens,
+        response_usage.completion_tokens,
     )
+    if cache and output:
+        cache.put(
+            get_llm_cache_key(provider, model, messages),
+            CachedLlmResponse(
+                output,
+                response.model or model,
+                response_usage.prompt_tokens,
+                response_usage.completion_tokens,
+            ),
+        )
     running_secs = (dt.datetime.now() - start_time).microseconds
     logger.info(f"Answer generation took {running_secs / 100000:.2f} seconds.")
     logger.info(f"\nLLM'S OUTPUT: {output}\n")
     return output
 
 
+def get_llm_cache_key(provider: str, model: str, messages: List[Dict[str, str]]) -> str:
+    """
+    Responses are cached under the provider and model which produced them. Lookups use the
+    preferred provider, so an answer of a fallback provider is never replayed as its answer.
+    """
+    return LlmCache.cache_key(provider, get_provider_model(provider, model), messages)
+
+
+def get_openai_client(provider: str) -> OpenAI:
+    return get_provider(provider).client
+
+
+def get_provider_model(provider: str, model: str) -> str:
+    # OpenAI expects model name without vendor prefix
+    return model.split("/")[-1] if provider == "openai" else model
+
+
+def create_chat_completion(
+    provider: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    estimated_tokens: int,
+    stream: bool = False,
+):
+    """
+    Sends chat completion request within provider's rate limits.
+    Requests answered with 429 Too Many Requests are retried up to LLM_MAX_RETRIES times
+    after Retry-After delay (or exponential backoff), other requests to provider wait as well.
+    Outcome and latency of every request are recorded in provider's statistics.
+    With stream=True stream of answer's chunks is returned as soon as the answer starts.
+    """
+    params = (
+        {"stream": True, "stream_options": {"include_usage": True}} if stream else {}
+    )
+    client = get_openai_client(provider)
+    rate_limiter = get_rate_limiter(provider)
+    provider_stats = get_provider(provider)
+    for attempt in range(app_settings.LLM_MAX_RETRIES + 1):
+        latency = 0.0
+        try:
+            with rate_limiter.acquire(estimated_tokens):
+                start_time = time.monotonic()
+                try:
+                    response = client.chat.completions.create(
+                        model=model, messages=messages, **params
+                    )
+                finally:
+                    latency = time.monotonic() - start_time
+        except RateLimitError as e:
+            if attempt == app_settings.LLM_MAX_RETRIES:
+                provider_stats.record_failure(latency, e)
+                raise
+            delay = get_retry_delay(e.response.headers, attempt)
+            logger.warning(
+                f"'{provider}' rate limit exceeded, retrying in {delay:.1f} seconds "
+                f"(attempt #{attempt + 1})."
+            )
+            rate_limiter.pause(delay)
+            continue
+        except Exception as e:
+            provider_stats.record_failure(latency, e)
+            raise
+
+        provider_stats.record_success(latency)
+        if not stream and response.usage:
+            # correct estimate by the number of tokens actually used
+            rate_limiter.tokens.adjust(response.usage.total_tokens - estimated_tokens)
+        return response
+
+
+def estimate_request_tokens(messages: List[Dict[str, str]], model: str) -> int:
+    """Estimates number of prompt tokens plus expected completion tokens of request."""
+    prompt_tokens = count_tokens(
+        "\n".join(message.get("content") or "" for message in messages), model
+    )
+    return prompt_tokens + app_settings.LLM_EXPECTED_COMPLETION_TOKENS
+
+
+def add_usage(usage: Dict, model: str, prompt_tokens: int, completion_tokens: int):
+    """Accumulates model name and token counts of LLM call in usage dict (if it's passed)."""
+    if usage is None:
+        return
+    usage["model"] = model
+    usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + prompt_tokens
+    usage["completion_tokens"] = usage.get("completion_tokens", 0) + completion_tokens
+
+
 def get_master_summary_file_path():
     root_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(root_dir, "master_summary.txt")
@@ -198,18 +566,10 @@ def num_tokens_from_string(text: str, model_name: str) -> int | None:
     return num_tokens
 
 
-def get_chunk_size(text: str, model_name: str) -> int:
-    """
-    Returns the chunk_size based number of tokens in a text string.
-    Experiment:
-        Start with chunks sized at 25–50% of the model's token limit.
-        Include an overlap of 10–20% for smooth transitions.
-    """
-    n_tokens = num_tokens_from_string(text, model_name)
-    # if code failed to get number of tokens use default chunk_size = 3000
-    # use 50% of the model's token limit as chunk_size
-    chunk_size = n_tokens // 2 if n_tokens else 3000
-    return chunk_size
+def count_tokens(text: str, model_name: str) -> int:
+    """Returns the number of tokens in a text string, roughly estimated if tokenizer fails."""
+    num_tokens = num_tokens_from_string(text, model_name)
+    return num_tokens if num_tokens is not None else len(text) // 4
 
 
 def get_today_logs() -> List[str]:
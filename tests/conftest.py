@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database.migrations import migrate
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    """URL of a migrated SQLite database in the test's temporary directory."""
+    db_url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(db_url)
+    migrate(engine)
+    engine.dispose()
+    return db_url
+
+
+@pytest.fixture
+def engine(db_url):
+    engine = create_engine(db_url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with sessionmaker(bind=engine)() as session:
+        yield session
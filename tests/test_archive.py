@@ -0,0 +1,98 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import func, select
+
+from src.database.database import save_articles_to_db, search_articles
+from src.database.models import ArticleTicker, CryptonewsArticlesDump
+from src.services import archive
+from src.services.archive import archive_old_articles, read_archived_articles
+
+AS_OF_DATE = dt.date(2025, 1, 10)
+
+
+@pytest.fixture
+def session(session):
+    for ticker in ("BTC", "ETH"):
+        save_articles_to_db(
+            session,
+            [
+                CryptonewsArticlesDump(
+                    news_url=f"https://news.example.com/{days}",
+                    title=f"Market update {days} days ago",
+                    body="<p>Long article body</p>",
+                    content_summary="Summary",
+                    date=AS_OF_DATE - dt.timedelta(days=days),
+                    tags=ticker,
+                )
+                for days in range(0, 5)
+                if ticker == "BTC" or days % 2
+            ],
+        )
+    return session
+
+
+def test_archive_old_articles(session, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    older_than = AS_OF_DATE - dt.timedelta(days=2)
+
+    assert archive_old_articles(session, older_than, archive_dir) == 2
+    assert archive_old_articles(session, older_than, archive_dir) == 0
+    assert session.scalar(select(func.count(CryptonewsArticlesDump.id))) == 3
+    assert session.scalar(select(func.count()).select_from(ArticleTicker)) == 4
+    assert sorted(hit.title for hit in search_articles(session, "ago")) == [
+        "Market update 0 days ago",
+        "Market update 1 days ago",
+        "Market update 2 days ago",
+    ]
+
+    articles = read_archived_articles(
+        AS_OF_DATE - dt.timedelta(days=4), older_than, archive_dir=archive_dir
+    )
+    assert sorted(articles["title"]) == [
+        "Market update 3 days ago",
+        "Market update 4 days ago",
+    ]
+    assert set(articles.columns) >= {"id", "date", "body", "content_summary", "tickers"}
+
+    eth_articles = read_archived_articles(
+        AS_OF_DATE - dt.timedelta(days=4),
+        older_than,
+        ticker="ETH",
+        columns=["title", "date"],
+        archive_dir=archive_dir,
+    )
+    assert eth_articles.to_dict("records") == [
+        {"title": "Market update 3 days ago", "date": AS_OF_DATE - dt.timedelta(days=3)}
+    ]
+
+
+def test_read_archived_articles_without_archive(tmp_path):
+    articles = read_archived_articles(AS_OF_DATE, archive_dir=str(tmp_path))
+    assert articles.empty
+
+
+def test_archive_old_articles_when_retention_is_disabled(
+    session, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(archive.app_settings, "ARTICLES_RETENTION_DAYS", 0)
+    assert archive_old_articles(session, archive_dir=str(tmp_path / "archive")) == 0
+    assert session.scalar(select(func.count(CryptonewsArticlesDump.id))) == 5
+
+
+def test_archive_old_articles_retention_cutoff_is_utc_date(
+    session, tmp_path, monkeypatch
+):
+    # just after midnight UTC, local date may still be the previous day
+    utc_now = dt.datetime(2025, 1, 12, 0, 30, tzinfo=dt.timezone.utc)
+    monkeypatch.setattr(
+        archive.DatetimeUtil, "utc_now", classmethod(lambda cls: utc_now)
+    )
+    monkeypatch.setattr(archive.app_settings, "ARTICLES_RETENTION_DAYS", 2)
+
+    assert archive_old_articles(session, archive_dir=str(tmp_path / "archive")) == 4
+    assert session.scalars(select(CryptonewsArticlesDump.date)).all() == [AS_OF_DATE]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
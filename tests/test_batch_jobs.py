@@ -0,0 +1,155 @@
+import datetime as dt
+import json
+import re
+
+import pytest
+
+from src.database.database import get_daily_master_summary, iter_article_rows
+from src.database.models import ArticleTicker, CryptonewsArticlesDump
+from src.services import batch_jobs, utils
+from src.services.batch_jobs import LocalBatchBackend
+
+AS_OF_DATE = dt.date(2025, 1, 10)
+
+
+@pytest.fixture
+def session(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_jobs, "TICKERS", ["BTC"])
+    monkeypatch.setattr(batch_jobs.app_settings, "LLM_BATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(batch_jobs.app_settings, "NEAR_DUPLICATE_DETECTION", False)
+    monkeypatch.setattr(
+        batch_jobs.app_settings, "CONTENT_SUMMARY_BATCH_MAX_ARTICLES", 2
+    )
+    monkeypatch.setattr(
+        utils, "num_tokens_from_string", lambda text, model: len(text.split())
+    )
+
+    for i in range(4):
+        session.add(
+            CryptonewsArticlesDump(
+                id=i + 1,
+                news_url=f"https://news.example.com/{i}",
+                title=f"Article {i}",
+                text=f"Description {i}",
+                date=AS_OF_DATE,
+            )
+        )
+        session.add(ArticleTicker(article_id=i + 1, ticker="BTC"))
+    session.commit()
+    return session
+
+
+def complete(messages, model, usage):
+    """Answers batch requests with JSON, other requests with summary of the text."""
+    utils.add_usage(usage, "stub", 100, 10)
+    content = messages[1]["content"]
+    if utils.BATCH_SUMMARY_INSTRUCTIONS in messages[0]["content"]:
+        return json.dumps(
+            {
+                article_id: f"Summary of {text.strip()}"
+                for article_id, text in re.findall(
+                    r"ARTICLE (\d+)\n(.*)", content, re.MULTILINE
+                )
+            }
+        )
+    if content.startswith("Summary of"):
+        return "Master summary"
+    return f"Summary of {content}"
+
+
+def get_content_summaries(session):
+    return dict(
+        iter_article_rows(
+            session,
+            (CryptonewsArticlesDump.id, CryptonewsArticlesDump.content_summary),
+            AS_OF_DATE,
+            "BTC",
+        )
+    )
+
+
+def test_create_and_save_summaries_in_batch(session, monkeypatch, tmp_path):
+    monkeypatch.setattr(batch_jobs, "create_session", lambda: session)
+    monkeypatch.setattr(session, "close", lambda: None)
+    batch_jobs.create_and_save_summaries_in_batch(
+        AS_OF_DATE, LocalBatchBackend(complete)
+    )
+
+    assert get_content_summaries(session) == {
+        i + 1: f"Summary of Article {i}" for i in range(4)
+    }
+    daily_master_summary = get_daily_master_summary(session, AS_OF_DATE, "BTC")
+    assert daily_master_summary.summary == "Master summary"
+    assert daily_master_summary.article_ids == [1, 2, 3, 4]
+    assert daily_master_summary.prompt_tokens == 100
+
+    # 4 articles are summarized with 2 requests of 2 articles
+    batch_files = sorted(tmp_path.glob("content-summaries-*[0-9].jsonl"))
+    with open(batch_files[0], encoding="utf-8") as file:
+        requests = [json.loads(line) for line in file]
+    assert [request["custom_id"] for request in requests] == ["content-0", "content-1"]
+    assert requests[0]["url"] == batch_jobs.BATCH_ENDPOINT
+
+
+def test_failed_requests_are_left_without_summary(session):
+    def complete_first_request(messages, model, usage):
+        if "ARTICLE 1" not in messages[1]["content"]:
+            raise Exception("Request failed")
+        # answer has summary of one article of the batch only
+        return json.dumps({"1": "Summary of Article 0"})
+
+    updated = batch_jobs.create_content_summaries_in_batch(
+        session, AS_OF_DATE, LocalBatchBackend(complete_first_request)
+    )
+
+    assert updated == 1
+    assert get_content_summaries(session) == {
+        1: "Summary of Article 0",
+        2: None,
+        3: None,
+        4: None,
+    }
+
+
+def test_unfinished_batch_job_is_cancelled(session, monkeypatch):
+    cancelled = []
+
+    class SlowBatchBackend(LocalBatchBackend):
+        def get_status(self, job_id):
+            return "in_progress"
+
+        def cancel(self, job_id):
+            cancelled.append(job_id)
+
+    monkeypatch.setattr(batch_jobs.app_settings, "LLM_BATCH_TIMEOUT", 0)
+    updated = batch_jobs.create_content_summaries_in_batch(
+        session, AS_OF_DATE, SlowBatchBackend(complete)
+    )
+
+    assert updated == 0
+    assert len(cancelled) == 1
+
+
+def test_texts_are_compressed_as_in_interactive_run(session, monkeypatch):
+    monkeypatch.setattr(batch_jobs.app_settings, "CONTENT_SUMMARY_BATCH_TOKENS", 0)
+    monkeypatch.setattr(batch_jobs.app_settings, "EXTRACTIVE_TOKEN_BUDGET", 3)
+    session.get(CryptonewsArticlesDump, 1).body = (
+        "Bitcoin ETF approved. Bitcoin ETF inflows rise. Read also: cats."
+    )
+    session.commit()
+    texts = []
+
+    def complete_and_collect(messages, model, usage):
+        texts.append(messages[1]["content"])
+        return complete(messages, model, usage)
+
+    batch_jobs.create_content_summaries_in_batch(
+        session, AS_OF_DATE, LocalBatchBackend(complete_and_collect)
+    )
+
+    # title and description of other articles are compressed as well
+    assert texts == ["Bitcoin ETF approved.", "Article 1", "Article 2", "Article 3"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
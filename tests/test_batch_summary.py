@@ -0,0 +1,69 @@
+import pytest
+
+from src.services import utils
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls, answers = [], []
+
+    def make_openai_client_api_call(messages, model, usage=None):
+        calls.append(messages)
+        return answers.pop(0)
+
+    monkeypatch.setattr(
+        utils, "make_openai_client_api_call", make_openai_client_api_call
+    )
+    monkeypatch.setattr(
+        utils, "num_tokens_from_string", lambda text, model: len(text.split())
+    )
+    return calls, answers
+
+
+def test_parse_batch_summaries_reads_json_in_code_block():
+    output = '```json\n{"1": " First summary ", "2": "", "3": "Third summary"}\n```'
+    assert utils.parse_batch_summaries(output, [1, 2, 3, 4]) == {
+        1: "First summary",
+        3: "Third summary",
+    }
+    assert utils.parse_batch_summaries("Not a JSON", [1]) == {}
+    assert utils.parse_batch_summaries('["First summary"]', [1]) == {}
+
+
+def test_summarize_texts_batch_makes_one_call(llm_calls):
+    calls, answers = llm_calls
+    answers.append('{"1": "First summary", "2": "Second summary"}')
+
+    assert utils.summarize_texts_batch({1: "First", 2: "Second"}, "prompt") == {
+        1: "First summary",
+        2: "Second summary",
+    }
+    assert len(calls) == 1
+    assert calls[0][1]["content"] == "ARTICLE 1\nFirst\n\nARTICLE 2\nSecond"
+
+
+def test_summarize_texts_batch_falls_back_to_single_calls(llm_calls):
+    calls, answers = llm_calls
+    # truncated JSON answer
+    answers.extend(['{"1": "First summary", "2": "Sec', "First", "Second"])
+
+    assert utils.summarize_texts_batch({1: "First", 2: "Second"}, "prompt") == {
+        1: "First",
+        2: "Second",
+    }
+    assert [messages[1]["content"] for messages in calls[1:]] == ["First", "Second"]
+
+
+def test_summarize_texts_batch_summarizes_only_missing_texts(llm_calls):
+    calls, answers = llm_calls
+    answers.extend(['{"1": "First summary"}', "Second summary"])
+
+    assert utils.summarize_texts_batch({1: "First", 2: "Second"}, "prompt") == {
+        1: "First summary",
+        2: "Second summary",
+    }
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
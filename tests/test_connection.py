@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import func, inspect, select
+
+from src.database import connection
+from src.database.migrations import MIGRATIONS, migrate, schema_migrations
+
+
+@pytest.fixture
+def db_urls(tmp_path):
+    yield [f"sqlite:///{tmp_path / name}" for name in ("first.db", "second.db")]
+    connection.dispose_engines()
+    connection._bootstrapped_urls.clear()
+
+
+def test_engine_is_reused_per_url(db_urls):
+    first_url, second_url = db_urls
+    engine = connection.get_engine(first_url)
+    assert connection.get_engine(first_url) is engine
+    assert connection.get_engine(second_url) is not engine
+
+    with connection.create_session(first_url) as session:
+        assert session.get_bind() is engine
+
+    connection.dispose_engines()
+    assert connection.get_engine(first_url) is not engine
+
+
+def test_migrate_is_idempotent(db_urls, monkeypatch):
+    db_url = db_urls[0]
+    connection.bootstrap_schema(db_url=db_url)
+    engine = connection.get_engine(db_url)
+    tables = set(inspect(engine).get_table_names())
+
+    # second application start in the same process doesn't touch the database
+    monkeypatch.setattr(
+        connection, "migrate", lambda engine: pytest.fail("Migrated twice")
+    )
+    connection.bootstrap_schema(db_url=db_url)
+
+    # new process re-runs migrate on already migrated database
+    migrate(engine)
+    assert set(inspect(engine).get_table_names()) == tables
+    with engine.connect() as db_connection:
+        assert db_connection.scalar(
+            select(func.count()).select_from(schema_migrations)
+        ) == len(MIGRATIONS)
+
+    # every migration can be applied again, e.g. after create_all of the first one
+    with engine.begin() as db_connection:
+        db_connection.execute(schema_migrations.delete())
+    migrate(engine)
+    assert set(inspect(engine).get_table_names()) == tables
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
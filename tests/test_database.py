@@ -0,0 +1,230 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from src.database.database import (
+    bulk_update_articles,
+    iter_article_batches,
+    iter_article_rows,
+    save_articles_to_db,
+)
+from src.database.models import ArticleTicker, CryptonewsArticlesDump
+from src.services import summarizer
+
+AS_OF_DATE = dt.date(2025, 1, 10)
+
+
+@pytest.fixture
+def session(session):
+    for i in range(10):
+        session.add(
+            CryptonewsArticlesDump(
+                id=i + 1,
+                news_url=f"https://news.example.com/{i}",
+                title=f"Article {i}",
+                text=f"Description {i}",
+                date=AS_OF_DATE if i < 8 else AS_OF_DATE - dt.timedelta(days=1),
+                content_summary="Summary" if i % 2 else None,
+            )
+        )
+        session.add(ArticleTicker(article_id=i + 1, ticker="BTC" if i < 6 else "ETH"))
+    session.commit()
+    return session
+
+
+def test_iter_article_rows_returns_only_requested_columns(session):
+    rows = list(
+        iter_article_rows(
+            session,
+            (CryptonewsArticlesDump.id, CryptonewsArticlesDump.title),
+            AS_OF_DATE,
+            "BTC",
+            empty_content_summary=True,
+            batch_size=2,
+        )
+    )
+    assert rows == [(1, "Article 0"), (3, "Article 2"), (5, "Article 4")]
+    assert rows[0]._fields == ("id", "title")
+    assert not session.identity_map
+
+
+def test_iter_article_batches_allows_updates_between_batches(session):
+    batches = []
+    for rows in iter_article_batches(
+        session,
+        (CryptonewsArticlesDump.id,),
+        AS_OF_DATE,
+        empty_content_summary=True,
+        batch_size=2,
+    ):
+        batches.append([row.id for row in rows])
+        bulk_update_articles(
+            session, [{"id": row.id, "content_summary": "New"} for row in rows]
+        )
+    assert batches == [[1, 3], [5, 7]]
+
+
+def test_create_content_summary_updates_articles(session, monkeypatch):
+    monkeypatch.setattr(
+        summarizer, "summarize_text", lambda text, prompt: f"Summary of {text[:9]}"
+    )
+    monkeypatch.setattr(summarizer.app_settings, "CONTENT_SUMMARY_BATCH_TOKENS", 0)
+    summarizer.create_content_summary(session, AS_OF_DATE, "BTC")
+
+    content_summaries = dict(
+        iter_article_rows(
+            session,
+            (CryptonewsArticlesDump.id, CryptonewsArticlesDump.content_summary),
+            AS_OF_DATE,
+            "BTC",
+        )
+    )
+    assert content_summaries == {
+        1: "Summary of Article 0",
+        2: "Summary",
+        3: "Summary of Article 2",
+        4: "Summary",
+        5: "Summary of Article 4",
+        6: "Summary",
+    }
+
+
+def test_create_content_summary_keeps_summaries_of_failed_run(session, monkeypatch):
+    def summarize_text(text, prompt):
+        if text.startswith("Article 4"):
+            raise Exception("LLM is unavailable")
+        return f"Summary of {text[:9]}"
+
+    monkeypatch.setattr(summarizer, "summarize_text", summarize_text)
+    monkeypatch.setattr(summarizer.app_settings, "CONTENT_SUMMARY_WRITE_BATCH_SIZE", 10)
+    monkeypatch.setattr(summarizer.app_settings, "CONTENT_SUMMARY_BATCH_TOKENS", 0)
+    with pytest.raises(Exception):
+        summarizer.create_content_summary(session, AS_OF_DATE, "BTC")
+
+    calls = []
+    monkeypatch.setattr(
+        summarizer, "summarize_text", lambda text, prompt: calls.append(text) or "New"
+    )
+    summarizer.create_content_summary(session, AS_OF_DATE, "BTC")
+    assert [text[:9] for text in calls] == ["Article 4"]
+
+
+def test_create_content_summary_batches_short_articles(session, monkeypatch):
+    batches = []
+
+    def summarize_texts_batch(texts, prompt):
+        batches.append(sorted(texts))
+        return {key: f"Batch summary of {text[:9]}" for key, text in texts.items()}
+
+    monkeypatch.setattr(summarizer, "summarize_texts_batch", summarize_texts_batch)
+    monkeypatch.setattr(
+        summarizer, "summarize_text", lambda text, prompt: f"Summary of {text[:9]}"
+    )
+    monkeypatch.setattr(summarizer.app_settings, "CONTENT_SUMMARY_BATCH_TOKENS", 6000)
+    monkeypatch.setattr(
+        summarizer.app_settings, "CONTENT_SUMMARY_BATCH_MAX_ARTICLES", 2
+    )
+    summarizer.create_content_summary(session, AS_OF_DATE, "BTC")
+
+    assert batches == [[1, 3]]
+    content_summaries = dict(
+        iter_article_rows(
+            session,
+            (CryptonewsArticlesDump.id, CryptonewsArticlesDump.content_summary),
+            AS_OF_DATE,
+            "BTC",
+        )
+    )
+    assert content_summaries[1] == "Batch summary of Article 0"
+    assert content_summaries[3] == "Batch summary of Article 2"
+    # last article is left alone in its batch and summarized by itself
+    assert content_summaries[5] == "Summary of Article 4"
+
+
+def new_article(i: int, ticker: str = "BTC") -> CryptonewsArticlesDump:
+    return CryptonewsArticlesDump(
+        news_url=f"https://news.example.com/{i}",
+        title=f"New article {i}",
+        date=AS_OF_DATE,
+        tags=ticker,
+    )
+
+
+def test_save_articles_to_db_skips_stored_and_repeated_urls(session):
+    # 8 and 9 are already stored, 10 is repeated within the batch
+    articles = [new_article(i) for i in (8, 9, 10, 10, 11)]
+    assert save_articles_to_db(session, articles, batch_size=2) == (2, 3)
+
+    assert session.scalar(select(func.count(CryptonewsArticlesDump.id))) == 12
+    assert (
+        session.scalar(
+            select(CryptonewsArticlesDump.title).where(
+                CryptonewsArticlesDump.news_url == "https://news.example.com/8"
+            )
+        )
+        == "Article 8"
+    )
+    assert save_articles_to_db(session, [new_article(11)]) == (0, 1)
+
+
+def test_article_shared_by_two_tickers_is_stored_once(session):
+    articles = [new_article(20, "BTC"), new_article(20, "ETH")]
+    assert save_articles_to_db(session, articles) == (1, 1)
+    # rerun of both tickers' pulls neither duplicates nor loses links
+    assert save_articles_to_db(session, [new_article(20, "ETH")]) == (0, 1)
+    assert save_articles_to_db(session, [new_article(20, "BTC")]) == (0, 1)
+
+    article_ids = session.scalars(
+        select(CryptonewsArticlesDump.id).where(
+            CryptonewsArticlesDump.news_url == "https://news.example.com/20"
+        )
+    ).all()
+    assert len(article_ids) == 1
+    assert session.execute(
+        select(ArticleTicker.article_id, ArticleTicker.ticker)
+        .where(ArticleTicker.article_id == article_ids[0])
+        .order_by(ArticleTicker.ticker)
+    ).all() == [(article_ids[0], "BTC"), (article_ids[0], "ETH")]
+
+
+def test_save_articles_to_db_ignores_conflicting_concurrent_insert(
+    session, monkeypatch
+):
+    execute = session.execute
+
+    def execute_after_concurrent_insert(statement, *args, **kwargs):
+        # other process inserts the article between the IN (...) lookup and the insert
+        if str(statement).startswith("INSERT INTO cryptonews_articles_dump"):
+            monkeypatch.setattr(session, "execute", execute)
+            execute(
+                insert(CryptonewsArticlesDump),
+                {"news_url": "https://news.example.com/10", "title": "Other process"},
+            )
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(session, "execute", execute_after_concurrent_insert)
+    assert save_articles_to_db(session, [new_article(10), new_article(11)]) == (1, 1)
+    assert session.scalar(select(func.count(CryptonewsArticlesDump.id))) == 12
+    assert (
+        session.scalar(
+            select(CryptonewsArticlesDump.title).where(
+                CryptonewsArticlesDump.news_url == "https://news.example.com/10"
+            )
+        )
+        == "Other process"
+    )
+    # the concurrently inserted article is linked with the ticker right away
+    assert session.execute(
+        select(CryptonewsArticlesDump.news_url, ArticleTicker.ticker)
+        .join(ArticleTicker, ArticleTicker.article_id == CryptonewsArticlesDump.id)
+        .where(CryptonewsArticlesDump.id > 10)
+        .order_by(CryptonewsArticlesDump.id)
+    ).all() == [
+        ("https://news.example.com/10", "BTC"),
+        ("https://news.example.com/11", "BTC"),
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
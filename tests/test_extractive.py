@@ -0,0 +1,124 @@
+import random
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.services import utils
+from src.services.extractive import (
+    compress_text,
+    get_textrank_scores,
+    get_tfidf_features,
+)
+
+ARTICLE = (
+    "Bitcoin ETF was approved by the SEC on Wednesday. "
+    "Subscribe to our newsletter. "
+    "The price of bitcoin rallied after the ETF approval. "
+    '"Bitcoin is the future of money," said the CEO. '
+    "Analysts expect record ETF inflows into bitcoin funds. "
+    "Subscribe to our newsletter. "
+    '"Bitcoin is the future of money," said the CEO. '
+    "Read also: ten cats who love boxes."
+)
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_compress_text_keeps_short_text():
+    result = compress_text("Bitcoin is up. ETH is down.", 100, count_words)
+    assert result.text == "Bitcoin is up. ETH is down."
+    assert result.ratio == 1.0
+    assert result.saved_tokens == 0
+
+
+def test_compress_text_fits_budget_and_drops_repeated_sentences():
+    result = compress_text(ARTICLE, 30, count_words)
+
+    assert result.compressed_tokens <= 30
+    assert result.original_tokens == count_words(ARTICLE)
+    assert result.saved_tokens == result.original_tokens - result.compressed_tokens
+    assert result.text.count("future of money") <= 1
+    assert "Subscribe" not in result.text
+    assert "cats" not in result.text
+    # selected sentences keep their order
+    assert result.text.startswith("Bitcoin ETF was approved")
+
+
+def test_compress_text_without_sentence_breaks_is_truncated():
+    text = "word " * 10000
+    result = compress_text(text, 6000, count_words)
+
+    assert result.text == " ".join(["word"] * 6000)
+    assert result.compressed_tokens == 6000
+    assert result.ratio == 0.6
+
+
+def test_compress_text_of_large_text_uses_bounded_memory():
+    # 150k words with vocabulary of 20k words, dense TF-IDF matrix would take about 800 MB
+    rng = random.Random(42)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    text = " ".join(" ".join(rng.choices(vocabulary, k=15)) + "." for _ in range(10000))
+
+    tracemalloc.start()
+    try:
+        result = compress_text(text, 2000, count_words)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert result.compressed_tokens <= 2000
+    assert peak_memory < 64 * 1024 * 1024
+
+
+def test_textrank_scores_central_sentence_highest():
+    sentences = [
+        "bitcoin etf approval",
+        "bitcoin price",
+        "etf inflows",
+        "approval date",
+        "cats love boxes",
+    ]
+    scores = get_textrank_scores(get_tfidf_features(sentences))
+    assert int(np.argmax(scores)) == 0
+    assert int(np.argmin(scores)) == 4
+    assert scores.sum() == pytest.approx(1, abs=1e-3)
+
+
+def test_summarize_text_sends_compressed_text(monkeypatch):
+    requests = []
+    monkeypatch.setattr(
+        utils,
+        "make_openai_client_api_call",
+        lambda messages, model, usage=None: requests.append(messages) or "Summary",
+    )
+    monkeypatch.setattr(
+        utils, "num_tokens_from_string", lambda text, model: count_words(text)
+    )
+    monkeypatch.setattr(utils.app_settings, "EXTRACTIVE_TOKEN_BUDGET", 30)
+
+    assert utils.summarize_text(ARTICLE, "prompt") == "Summary"
+    assert count_words(requests[0][1]["content"]) <= 30
+
+
+def test_summarize_text_leaves_text_exceeding_budget_to_map_reduce(monkeypatch):
+    map_reduce_texts = []
+    monkeypatch.setattr(
+        utils,
+        "map_reduce_summarize",
+        lambda texts, prompt, usage=None: map_reduce_texts.extend(texts) or "Summary",
+    )
+    monkeypatch.setattr(
+        utils, "num_tokens_from_string", lambda text, model: count_words(text)
+    )
+    monkeypatch.setattr(utils.app_settings, "EXTRACTIVE_TOKEN_BUDGET", 30)
+    monkeypatch.setattr(utils.app_settings, "SUMMARY_TOKEN_BUDGET", 40)
+
+    assert utils.summarize_text(ARTICLE, "prompt") == "Summary"
+    assert map_reduce_texts == [ARTICLE]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
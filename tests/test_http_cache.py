@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.services import http_cache
+from src.services.http_cache import HttpCache, async_cached_get, cached_get
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    requests_count = {}
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        FixtureHandler.requests_count[path] = (
+            FixtureHandler.requests_count.get(path, 0) + 1
+        )
+
+        if path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send_body(b"etag body", {"ETag": '"v1"'})
+        elif path == "/max-age":
+            self._send_body(b"max-age body", {"Cache-Control": "max-age=60"})
+        elif path == "/no-store":
+            self._send_body(b"no-store body", {"Cache-Control": "no-store"})
+        else:
+            self._send_body(b"x" * 100, {})
+
+    def _send_body(self, body: bytes, headers: dict):
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    FixtureHandler.requests_count.clear()
+    return HttpCache(str(tmp_path), max_bytes=1024 * 1024)
+
+
+def test_cache_key_ignores_token():
+    assert HttpCache.cache_key("http://a/api?page=1&token=one") == HttpCache.cache_key(
+        "http://a/api?token=two&page=1"
+    )
+    assert HttpCache.cache_key("http://a/api?page=1") != HttpCache.cache_key(
+        "http://a/api?page=2"
+    )
+
+
+def test_fresh_response_is_served_without_request(fixture_server, cache):
+    first = cached_get(f"{fixture_server}/max-age?token=1", cache=cache)
+    second = cached_get(f"{fixture_server}/max-age?token=2", cache=cache)
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.content == b"max-age body"
+    assert FixtureHandler.requests_count["/max-age"] == 1
+
+
+def test_stale_response_is_revalidated_with_etag(fixture_server, cache):
+    cached_get(f"{fixture_server}/etag", cache=cache)
+    second = cached_get(f"{fixture_server}/etag", cache=cache)
+
+    assert second.from_cache
+    assert second.content == b"etag body"
+    assert FixtureHandler.requests_count["/etag"] == 2
+
+
+def test_no_store_response_is_not_cached(fixture_server, cache):
+    cached_get(f"{fixture_server}/no-store", cache=cache, default_ttl=60)
+    second = cached_get(f"{fixture_server}/no-store", cache=cache, default_ttl=60)
+
+    assert not second.from_cache
+    assert FixtureHandler.requests_count["/no-store"] == 2
+
+
+def test_least_recently_used_entries_are_evicted(fixture_server, tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=250)
+    for page in range(3):
+        cached_get(f"{fixture_server}/page?n={page}", cache=cache, default_ttl=60)
+        time.sleep(0.01)
+
+    assert cache.get(f"{fixture_server}/page?n=0") is None
+    assert cache.get(f"{fixture_server}/page?n=2") is not None
+
+
+def test_response_is_truncated_to_max_bytes(fixture_server, cache):
+    response = cached_get(f"{fixture_server}/page", cache=cache, max_bytes=10)
+    assert response.content == b"x" * 10
+    assert cache.get(f"{fixture_server}/page") is None
+
+    # body of exactly max_bytes is complete
+    cached_get(f"{fixture_server}/page", cache=cache, max_bytes=100)
+    assert cache.get(f"{fixture_server}/page") is not None
+
+
+def test_async_stale_response_is_revalidated_with_etag(fixture_server, cache):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            await async_cached_get(client, f"{fixture_server}/etag", cache=cache)
+            return await async_cached_get(client, f"{fixture_server}/etag", cache=cache)
+
+    second = asyncio.run(run())
+    assert second.from_cache
+    assert second.content == b"etag body"
+    assert FixtureHandler.requests_count["/etag"] == 2
+
+
+def test_default_cache_is_created_lazily(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "http"
+    monkeypatch.setattr(http_cache, "_default_http_cache", None)
+    monkeypatch.setattr(http_cache.app_settings, "HTTP_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(http_cache.app_settings, "HTTP_CACHE_ENABLED", False)
+    assert http_cache.get_http_cache() is None
+    assert not cache_dir.exists()
+
+    monkeypatch.setattr(http_cache.app_settings, "HTTP_CACHE_ENABLED", True)
+    cache = http_cache.get_http_cache()
+    assert cache.cache_dir == str(cache_dir)
+    assert cache_dir.exists()
+    assert http_cache.get_http_cache() is cache
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,156 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services import providers, utils
+from src.services.llm_cache import CachedLlmResponse, LlmCache
+
+MESSAGES = [
+    {"role": "system", "content": "Summarize the article."},
+    {"role": "user", "content": "Bitcoin price is up."},
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LlmCache(str(tmp_path / "llm.sqlite3"), max_bytes=1000, ttl=3600)
+    yield cache
+    cache.close()
+
+
+def response(output: str) -> CachedLlmResponse:
+    return CachedLlmResponse(output, "gpt-4o-mini", 100, 20)
+
+
+def test_cache_key_depends_on_request():
+    key = LlmCache.cache_key("openai", "gpt-4o-mini", MESSAGES)
+    assert key == LlmCache.cache_key(
+        "openai", "gpt-4o-mini", [dict(m) for m in MESSAGES]
+    )
+    assert key != LlmCache.cache_key("openrouter", "gpt-4o-mini", MESSAGES)
+    assert key != LlmCache.cache_key("openai", "gpt-4o", MESSAGES)
+    assert key != LlmCache.cache_key("openai", "gpt-4o-mini", MESSAGES, temperature=0)
+
+
+def test_get_and_put(cache):
+    assert cache.get("key") is None
+    cache.put("key", response("Summary"))
+    assert cache.get("key") == response("Summary")
+    assert cache.stats() == {
+        "entries": 1,
+        "bytes": 7,
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+    }
+
+
+def test_expired_entry_is_miss(cache):
+    cache.ttl = 0.05
+    cache.put("key", response("Summary"))
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for i in range(4):
+        cache.put(f"key{i}", response(str(i) * 300))
+        time.sleep(0.01)
+        if i == 2:
+            # key0 becomes more recently used than key1 and key2
+            cache.get("key0")
+            time.sleep(0.01)
+
+    assert cache.get("key0") is not None
+    assert cache.get("key1") is None
+    assert cache.get("key3") is not None
+    assert cache.stats()["bytes"] <= 900
+
+
+def test_make_openai_client_api_call_uses_cache(cache, monkeypatch):
+    calls = []
+
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+        @staticmethod
+        def create(model, messages):
+            calls.append(model)
+            return SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(message=SimpleNamespace(content="Summary"))],
+                usage=SimpleNamespace(
+                    total_tokens=120, prompt_tokens=100, completion_tokens=20
+                ),
+            )
+
+    monkeypatch.setattr(providers, "OpenAI", FakeOpenAI)
+    monkeypatch.setattr(providers, "_providers", {})
+    monkeypatch.setattr(utils, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(utils.app_settings, "DEBUG_MODE", False)
+
+    usage = {}
+    assert utils.make_openai_client_api_call(MESSAGES, "gpt-4o-mini") == "Summary"
+    assert (
+        utils.make_openai_client_api_call(MESSAGES, "gpt-4o-mini", usage) == "Summary"
+    )
+    assert len(calls) == 1
+    assert usage == {
+        "model": "gpt-4o-mini",
+        "prompt_tokens": 100,
+        "completion_tokens": 20,
+    }
+
+    monkeypatch.setattr(utils.app_settings, "LLM_CACHE_BYPASS", True)
+    utils.make_openai_client_api_call(MESSAGES, "gpt-4o-mini")
+    assert len(calls) == 2
+
+
+def test_answer_of_fallback_provider_is_not_replayed_as_primary(cache, monkeypatch):
+    calls = []
+    openai_is_down = True
+
+    class FakeOpenAI:
+        def __init__(self, base_url=None, **kwargs):
+            self.provider = "openrouter" if base_url else "openai"
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+        def create(self, model, messages):
+            calls.append(self.provider)
+            if self.provider == "openai" and openai_is_down:
+                raise ConnectionError("OpenAI is unavailable")
+            return SimpleNamespace(
+                model=model,
+                choices=[
+                    SimpleNamespace(
+                        message=SimpleNamespace(content=f"{self.provider} summary")
+                    )
+                ],
+                usage=SimpleNamespace(
+                    total_tokens=120, prompt_tokens=100, completion_tokens=20
+                ),
+            )
+
+    monkeypatch.setattr(providers, "OpenAI", FakeOpenAI)
+    monkeypatch.setattr(providers, "_providers", {})
+    monkeypatch.setattr(utils, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(utils.app_settings, "DEBUG_MODE", False)
+    monkeypatch.setattr(utils.app_settings, "LLM_MAX_RETRIES", 0)
+
+    model = "openai/gpt-4o-mini"
+    assert utils.make_openai_client_api_call(MESSAGES, model) == "openrouter summary"
+    assert calls == ["openai", "openrouter"]
+
+    openai_is_down = False
+    assert utils.make_openai_client_api_call(MESSAGES, model) == "openai summary"
+    assert utils.make_openai_client_api_call(MESSAGES, model) == "openai summary"
+    assert calls == ["openai", "openrouter", "openai"]
+    fallback_answer = cache.get(utils.get_llm_cache_key("openrouter", model, MESSAGES))
+    assert fallback_answer.output == "openrouter summary"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from src.services import utils
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def make_openai_client_api_call(messages, model, usage=None):
+        with lock:
+            calls.append(messages[1]["content"])
+            number = len(calls)
+        utils.add_usage(usage, "stub", 10, 2)
+        return f"summary {number}"
+
+    monkeypatch.setattr(
+        utils, "make_openai_client_api_call", make_openai_client_api_call
+    )
+    # one token per word
+    monkeypatch.setattr(
+        utils, "num_tokens_from_string", lambda text, model: len(text.split())
+    )
+    monkeypatch.setattr(utils.app_settings, "SUMMARY_TOKEN_BUDGET", 60)
+    monkeypatch.setattr(utils.app_settings, "SUMMARY_REDUCE_FAN_IN", 3)
+    return calls
+
+
+def test_map_reduce_summarize_makes_one_call_for_short_texts(llm_calls):
+    usage = {}
+    assert utils.map_reduce_summarize(["first", "second"], "prompt", usage) == (
+        "summary 1"
+    )
+    assert llm_calls == ["first\n\nsecond"]
+    assert usage == {"model": "stub", "prompt_tokens": 10, "completion_tokens": 2}
+
+
+def test_map_reduce_summarize_reduces_summaries_in_tree(llm_calls):
+    texts = [f"article {i} " + "word " * 20 for i in range(20)]
+    usage = {}
+    summary = utils.map_reduce_summarize(texts, "prompt", usage)
+
+    budget = 60 - len(f"prompt\n\n{utils.REDUCE_PROMPT}".split())
+    assert all(len(content.split()) <= budget for content in llm_calls[:20])
+    # every article is a chunk, 20 summaries -> 7 -> 3 -> 1
+    assert len(llm_calls) == 20 + 7 + 3 + 1
+    assert summary == f"summary {len(llm_calls)}"
+    assert llm_calls[-1].startswith(utils.REDUCE_PROMPT)
+    assert usage["prompt_tokens"] == 10 * len(llm_calls)
+
+
+def test_map_reduce_summarize_rejects_fan_in_below_two(llm_calls, monkeypatch):
+    monkeypatch.setattr(utils.app_settings, "SUMMARY_REDUCE_FAN_IN", 1)
+    with pytest.raises(ValueError, match="SUMMARY_REDUCE_FAN_IN"):
+        utils.map_reduce_summarize(["first", "second"], "prompt")
+    assert llm_calls == []
+
+
+def test_summarize_text_splits_long_text(llm_calls):
+    text = " ".join(f"word{i}" for i in range(500))
+    summary = utils.summarize_text(text, "prompt")
+
+    map_calls = [call for call in llm_calls if not call.startswith(utils.REDUCE_PROMPT)]
+    assert len(map_calls) > 1
+    assert all(len(call.split()) <= 60 for call in map_calls)
+    assert summary == f"summary {len(llm_calls)}"
+
+
+def test_pack_texts_respects_fan_in_and_budget(llm_calls):
+    assert utils.pack_texts(["a b", "c d", "e f", "g"], budget=4) == [
+        ["a b", "c d"],
+        ["e f", "g"],
+    ]
+    assert utils.pack_texts(["a", "b", "c"], budget=10, max_group_size=2) == [
+        ["a", "b"],
+        ["c"],
+    ]
+    # reduce groups never contain a single summary, even over budget
+    assert utils.pack_texts(["a b c", "d e f"], budget=4, min_group_size=2) == [
+        ["a b c", "d e f"]
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,126 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine, insert, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from src.database.database import (
+    get_daily_master_summary,
+    get_master_summary,
+    save_master_summary,
+)
+from src.database.migrations import MIGRATIONS, migrate, schema_migrations
+from src.database.models import ArticleTicker, CryptonewsArticlesDump
+from src.services import summarizer
+
+AS_OF_DATE = dt.date(2025, 1, 10)
+
+
+def add_articles(session, content_summaries):
+    articles = [
+        CryptonewsArticlesDump(
+            news_url=f"https://news.example.com/{i}",
+            title=f"Article {i}",
+            date=AS_OF_DATE,
+            content_summary=content_summary,
+        )
+        for i, content_summary in enumerate(content_summaries)
+    ]
+    session.add_all(articles)
+    session.flush()
+    session.add_all(
+        ArticleTicker(article_id=article.id, ticker="BTC") for article in articles
+    )
+    session.commit()
+    return [article.id for article in articles]
+
+
+def test_save_master_summary_replaces_daily_row(session):
+    save_master_summary(session, AS_OF_DATE, "BTC", "First", [2, 1])
+    save_master_summary(
+        session,
+        AS_OF_DATE,
+        "BTC",
+        "Second",
+        [1, 2, 3],
+        {"model": "gpt-4o-mini", "prompt_tokens": 120, "completion_tokens": 30},
+    )
+
+    master_summary = get_daily_master_summary(session, AS_OF_DATE, "BTC")
+    assert master_summary.summary == "Second"
+    assert master_summary.article_ids == [1, 2, 3]
+    assert master_summary.prompt_tokens == 120
+    assert get_master_summary(session, AS_OF_DATE, "ETH") is None
+
+
+def test_create_master_summary_skips_up_to_date_summary(session, monkeypatch):
+    calls = []
+
+    def map_reduce_summarize(texts, prompt, usage=None):
+        calls.append("\n\n".join(texts))
+        usage.update(model="stub", prompt_tokens=10, completion_tokens=5)
+        return f"Master summary #{len(calls)}"
+
+    monkeypatch.setattr(summarizer, "map_reduce_summarize", map_reduce_summarize)
+    article_ids = add_articles(session, ["First summary", "Second summary", None])
+
+    summarizer.create_master_summary(session, AS_OF_DATE, "BTC")
+    summarizer.create_master_summary(session, AS_OF_DATE, "BTC")
+    assert calls == ["First summary\n\nSecond summary"]
+    assert get_daily_master_summary(session, AS_OF_DATE, "BTC").article_ids == (
+        article_ids[:2]
+    )
+
+    session.get(CryptonewsArticlesDump, article_ids[2]).content_summary = "Third"
+    session.commit()
+    summarizer.create_master_summary(session, AS_OF_DATE, "BTC")
+    assert len(calls) == 2
+    assert get_master_summary(session, AS_OF_DATE, "BTC") == "Master summary #2"
+
+
+def test_migration_moves_master_summaries_out_of_article_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        for version, name, migration in MIGRATIONS[:4]:
+            migration(connection)
+        connection.execute(
+            text("ALTER TABLE article_tickers ADD COLUMN master_summary VARCHAR")
+        )
+        schema_migrations.create(connection)
+        connection.execute(
+            insert(schema_migrations),
+            [
+                {"version": version, "name": name, "applied_at": dt.datetime.now()}
+                for version, name, _ in MIGRATIONS[:4]
+            ],
+        )
+        connection.execute(
+            insert(CryptonewsArticlesDump),
+            [
+                {"id": i, "news_url": f"u{i}", "title": "t", "date": AS_OF_DATE}
+                for i in (1, 2, 3)
+            ],
+        )
+        connection.execute(
+            text(
+                "INSERT INTO article_tickers (article_id, ticker, master_summary) VALUES "
+                "(1, 'BTC', 'Bitcoin day'), (2, 'BTC', 'Bitcoin day'), (3, 'ETH', NULL)"
+            )
+        )
+
+    migrate(engine)
+
+    columns = {
+        column["name"] for column in inspect(engine).get_columns("article_tickers")
+    }
+    assert "master_summary" not in columns
+    with sessionmaker(bind=engine)() as session:
+        master_summary = get_daily_master_summary(session, AS_OF_DATE, "BTC")
+        assert master_summary.summary == "Bitcoin day"
+        assert master_summary.article_ids == [1, 2]
+        assert get_master_summary(session, AS_OF_DATE, "ETH") is None
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
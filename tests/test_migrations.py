@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from src.database.migrations import migrate
+from src.database.models import (
+    ArticleFingerprint,
+    ArticleLshBand,
+    ArticleTicker,
+    Base,
+    CryptonewsArticlesDump,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Legacy database without unique news_url and with (date, tags) index, an article is stored three times."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ux_cryptonews_articles_dump_news_url"))
+        connection.execute(text("DROP INDEX ix_cryptonews_articles_dump_date"))
+        connection.execute(
+            text(
+                "CREATE INDEX ix_cryptonews_articles_dump_date_tags "
+                "ON cryptonews_articles_dump (date, tags)"
+            )
+        )
+
+    def article(article_id, news_url, **values):
+        return CryptonewsArticlesDump(
+            id=article_id, news_url=news_url, title=f"Article {article_id}", **values
+        )
+
+    with sessionmaker(bind=engine)() as session:
+        session.add_all(
+            [
+                article(1, "https://news.example.com/a", tags="BTC"),
+                article(2, "https://news.example.com/a", tags="ETH", body="Body"),
+                article(
+                    3,
+                    "https://news.example.com/a",
+                    tags="BTC",
+                    body="Other body",
+                    content_summary="Summary",
+                ),
+                article(4, "https://news.example.com/b"),
+            ]
+        )
+        session.flush()
+        session.add_all(
+            [
+                ArticleTicker(article_id=1, ticker="BTC"),
+                ArticleTicker(article_id=2, ticker="ETH"),
+                ArticleTicker(article_id=3, ticker="BTC"),
+                ArticleFingerprint(article_id=1, simhash=1, cluster_id=1),
+                ArticleFingerprint(article_id=2, simhash=2, cluster_id=2),
+                # near-duplicate of the duplicate
+                ArticleFingerprint(article_id=4, simhash=3, cluster_id=2),
+                ArticleLshBand(band=0, value=2, article_id=2),
+            ]
+        )
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+def test_deduplicate_news_urls_merges_duplicates_into_oldest_article(engine):
+    migrate(engine)
+
+    with sessionmaker(bind=engine)() as session:
+        articles = session.execute(
+            select(
+                CryptonewsArticlesDump.id,
+                CryptonewsArticlesDump.title,
+                CryptonewsArticlesDump.body,
+                CryptonewsArticlesDump.content_summary,
+            ).order_by(CryptonewsArticlesDump.id)
+        ).all()
+        assert articles == [
+            (1, "Article 1", "Body", "Summary"),
+            (4, "Article 4", None, None),
+        ]
+        assert set(
+            session.execute(select(ArticleTicker.article_id, ArticleTicker.ticker))
+        ) == {(1, "BTC"), (1, "ETH")}
+        assert dict(
+            session.execute(
+                select(ArticleFingerprint.article_id, ArticleFingerprint.cluster_id)
+            ).all()
+        ) == {1: 1, 4: 1}
+        assert not session.execute(select(ArticleLshBand)).all()
+
+        session.add(
+            CryptonewsArticlesDump(news_url="https://news.example.com/a", title="Copy")
+        )
+        with pytest.raises(IntegrityError):
+            session.commit()
+
+    indexes = {
+        index["name"]: index
+        for index in inspect(engine).get_indexes("cryptonews_articles_dump")
+    }
+    assert indexes["ux_cryptonews_articles_dump_news_url"]["unique"]
+    assert indexes["ix_cryptonews_articles_dump_date"]["column_names"] == ["date"]
+    assert "ix_cryptonews_articles_dump_date_tags" not in indexes
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,133 @@
+import datetime as dt
+import json
+import os
+
+import pytest
+
+from src.database.database import ArticleWriter, iter_article_rows
+from src.database.models import ArticleTicker, CryptonewsArticlesDump
+from src.services import summarizer
+from src.services.near_duplicates import (
+    LSH_BANDS,
+    assign_near_duplicate_clusters,
+    compute_simhash,
+    hamming_distance,
+    split_into_bands,
+    to_signed,
+    to_unsigned,
+)
+
+with open(os.path.join(os.path.dirname(__file__), "../data/sample.json")) as f:
+    ARTICLE = json.load(f)[0]["body"]
+
+AS_OF_DATE = dt.date(2025, 1, 10)
+OTHER_ARTICLE = (
+    "Krafton, the South Korean video game giant best known for hits like PUBG: Battlegrounds, "
+    "is stepping into the blockchain arena with Settlus, a platform that aims to give content "
+    "creators a transparent way to get paid for their work across games and social media."
+)
+
+
+@pytest.fixture
+def session(session):
+    bodies = [
+        ARTICLE,
+        "Related: Bitcoin fees explained. " + ARTICLE.replace("Friday", "Saturday"),
+        OTHER_ARTICLE,
+    ]
+    for i, body in enumerate(bodies):
+        session.add(
+            CryptonewsArticlesDump(
+                id=i + 1,
+                news_url=f"https://news.example.com/{i}",
+                title="",
+                body=body,
+                date=AS_OF_DATE,
+            )
+        )
+        session.add(ArticleTicker(article_id=i + 1, ticker="BTC"))
+    session.commit()
+    return session
+
+
+def load_articles(session):
+    return list(
+        iter_article_rows(session, summarizer.ARTICLE_TEXT_COLUMNS, AS_OF_DATE, "BTC")
+    )
+
+
+def test_compute_simhash_of_republished_article_is_close():
+    republished = "Related: Bitcoin fees explained. " + ARTICLE.replace(
+        "Friday", "Saturday"
+    )
+    distance = hamming_distance(compute_simhash(ARTICLE), compute_simhash(republished))
+    assert distance <= 6
+
+
+def test_compute_simhash_of_different_articles_is_far():
+    assert (
+        hamming_distance(compute_simhash(ARTICLE), compute_simhash(OTHER_ARTICLE)) > 10
+    )
+
+
+def test_compute_simhash_of_short_text():
+    assert compute_simhash("Bitcoin price is up") is None
+
+
+def test_close_fingerprints_share_band():
+    simhash = compute_simhash(ARTICLE)
+    close_simhash = simhash ^ 0b1001 ^ (1 << 20) ^ (1 << 33) ^ (1 << 40) ^ (1 << 63)
+    assert len(split_into_bands(simhash)) == LSH_BANDS
+    assert set(enumerate(split_into_bands(simhash))) & set(
+        enumerate(split_into_bands(close_simhash))
+    )
+
+
+def test_signed_conversion_round_trip():
+    for simhash in (0, 1, 2**63 - 1, 2**63, 2**64 - 1):
+        signed = to_signed(simhash)
+        assert -(2**63) <= signed < 2**63
+        assert to_unsigned(signed) == simhash
+
+
+def test_near_duplicate_articles_share_cluster(session):
+    articles = load_articles(session)
+    assert assign_near_duplicate_clusters(session, articles) == {1: 1, 2: 1, 3: 3}
+    # stored fingerprints are reused on the next run
+    assert assign_near_duplicate_clusters(session, articles[1:]) == {2: 1, 3: 3}
+
+
+def test_cluster_is_summarized_once(session, monkeypatch):
+    pending_articles, cluster_texts = {}, {}
+    with ArticleWriter(session, batch_size=10) as writer:
+        summarizer.add_pending_clusters(
+            session, load_articles(session), {}, writer, pending_articles, cluster_texts
+        )
+    assert pending_articles == {1: [1, 2], 3: [3]}
+    assert sorted(cluster_texts) == [1, 3]
+
+    calls = []
+    monkeypatch.setattr(
+        summarizer,
+        "summarize_text",
+        lambda text, prompt: calls.append(text) or f"Summary {len(calls)}",
+    )
+    monkeypatch.setattr(summarizer.app_settings, "CONTENT_SUMMARY_BATCH_TOKENS", 0)
+    monkeypatch.setattr(summarizer.app_settings, "LLM_MAX_CONCURRENT_REQUESTS", 1)
+    summarizer.create_content_summary(session, AS_OF_DATE, "BTC")
+
+    assert len(calls) == 2
+    content_summaries = dict(
+        iter_article_rows(
+            session,
+            (CryptonewsArticlesDump.id, CryptonewsArticlesDump.content_summary),
+            AS_OF_DATE,
+            "BTC",
+        )
+    )
+    assert content_summaries[1] == content_summaries[2]
+    assert content_summaries[1] != content_summaries[3]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
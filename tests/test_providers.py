@@ -0,0 +1,148 @@
+import time
+
+import httpx
+import pytest
+from openai import BadRequestError, InternalServerError
+
+from src.services import providers
+from src.services.providers import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    LlmProvider,
+    ProvidersUnavailableError,
+    call_with_failover,
+    is_transient_error,
+)
+
+
+def api_error(error_class, status_code: int):
+    return error_class(
+        f"Error {status_code}",
+        response=httpx.Response(
+            status_code, request=httpx.Request("POST", "https://api.openai.com")
+        ),
+        body=None,
+    )
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = {
+        name: LlmProvider(name, None, "key", failure_threshold=2, reset_seconds=0.05)
+        for name in ("openai", "openrouter")
+    }
+    monkeypatch.setattr(providers, "_providers", registry)
+    monkeypatch.setattr(providers.app_settings, "DEBUG_MODE", False)
+    return registry
+
+
+def test_circuit_opens_after_consecutive_failures_and_closes_after_trial():
+    provider = LlmProvider(
+        "openai", None, "key", failure_threshold=2, reset_seconds=0.05
+    )
+    provider.record_failure(0.1, TimeoutError("timeout"))
+    assert provider.allow_request()
+    provider.record_failure(0.1, TimeoutError("timeout"))
+    assert provider.state == OPEN
+    assert not provider.allow_request()
+
+    time.sleep(0.06)
+    # only a single trial request is let through
+    assert provider.allow_request()
+    assert provider.state == HALF_OPEN
+    assert not provider.allow_request()
+
+    provider.record_success(0.2)
+    assert provider.state == CLOSED
+    stats = provider.stats()
+    assert stats["requests"] == 3
+    assert stats["error_rate"] == pytest.approx(2 / 3)
+    assert stats["last_error"] == "TimeoutError: timeout"
+
+
+def test_failed_trial_request_opens_circuit_again():
+    provider = LlmProvider(
+        "openai", None, "key", failure_threshold=1, reset_seconds=0.05
+    )
+    provider.record_failure(0.1, TimeoutError("timeout"))
+    time.sleep(0.06)
+    assert provider.allow_request()
+    provider.record_failure(0.1, TimeoutError("timeout"))
+    assert provider.state == OPEN
+    assert not provider.allow_request()
+
+
+def test_call_with_failover_falls_back_to_next_provider(registry):
+    def request(name):
+        if name == "openai":
+            raise ConnectionError("openai is down")
+        return name
+
+    assert call_with_failover(request) == "openrouter"
+
+
+def test_call_with_failover_skips_provider_with_open_circuit(registry):
+    registry["openai"].record_failure(1.0, TimeoutError("timeout"))
+    registry["openai"].record_failure(1.0, TimeoutError("timeout"))
+    calls = []
+
+    assert call_with_failover(lambda name: calls.append(name) or name) == "openrouter"
+    assert calls == ["openrouter"]
+
+
+def test_call_with_failover_raises_when_all_circuits_are_open(registry):
+    for provider in registry.values():
+        provider.record_failure(1.0, TimeoutError("timeout"))
+        provider.record_failure(1.0, TimeoutError("timeout"))
+
+    with pytest.raises(ProvidersUnavailableError):
+        call_with_failover(lambda name: name)
+
+
+def test_is_transient_error():
+    assert is_transient_error(api_error(InternalServerError, 503))
+    assert is_transient_error(httpx.ReadTimeout("timeout"))
+    assert not is_transient_error(api_error(BadRequestError, 400))
+    assert not is_transient_error(ValueError("invalid messages"))
+
+
+def test_client_errors_do_not_open_circuit():
+    provider = LlmProvider(
+        "openai", None, "key", failure_threshold=2, reset_seconds=0.05
+    )
+    for _ in range(3):
+        provider.record_failure(0.1, api_error(BadRequestError, 400))
+    assert provider.state == CLOSED
+    assert provider.stats()["failures"] == 0
+    assert provider.stats()["last_error"] == "BadRequestError: Error 400"
+
+
+def test_call_with_failover_raises_client_error_without_failover(registry):
+    calls = []
+
+    def request(name):
+        calls.append(name)
+        raise api_error(BadRequestError, 400)
+
+    with pytest.raises(BadRequestError):
+        call_with_failover(request)
+    assert calls == ["openai"]
+
+
+def test_trial_request_failed_before_outcome_does_not_block_circuit(registry):
+    registry["openai"].record_failure(1.0, TimeoutError("timeout"))
+    registry["openai"].record_failure(1.0, TimeoutError("timeout"))
+    time.sleep(0.06)
+
+    def request(name):
+        raise ValueError("Failed before request was sent")
+
+    with pytest.raises(ValueError):
+        call_with_failover(request)
+    assert registry["openai"].state == HALF_OPEN
+    assert call_with_failover(lambda name: name) == "openai"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,197 @@
+import asyncio
+import datetime as dt
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from src.database.async_connection import create_async_session, dispose_async_engines
+from src.database.database import get_watermark, update_watermark
+from src.database.models import ArticleTicker
+from src.services import pull_articles
+from src.services.cryptonews_stub_server import CryptonewsStubServer, generate_corpus
+
+AS_OF_DATE = dt.date(2025, 1, 10)
+TICKERS = ["BTC", "ETH", "SOL"]
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """Local cryptonews API with three days of articles, pull_articles is pointed to it."""
+    server = CryptonewsStubServer(generate_corpus(90, AS_OF_DATE, tickers=TICKERS))
+    server.start()
+    monkeypatch.setattr(pull_articles.app_settings, "CRYPTONEWS_API_URL", server.url)
+    monkeypatch.setattr(pull_articles.app_settings, "HTTP_CACHE_ENABLED", False)
+    yield server
+    server.stop()
+
+
+def pull_for_tickers(db_url: str, tickers: list):
+    async def run():
+        try:
+            async with create_async_session(db_url) as session:
+                await pull_articles.pull_articles_for_tickers(
+                    session, AS_OF_DATE, tickers
+                )
+        finally:
+            await dispose_async_engines()
+
+    asyncio.run(run())
+
+
+def get_ticker_counts(db_url: str) -> dict:
+    engine = create_engine(db_url)
+    with engine.connect() as connection:
+        counts = dict(
+            connection.execute(
+                select(ArticleTicker.ticker, func.count()).group_by(
+                    ArticleTicker.ticker
+                )
+            ).all()
+        )
+    engine.dispose()
+    return counts
+
+
+def get_new_articles(server: CryptonewsStubServer, ticker: str) -> list:
+    """Articles of ticker's feed published on or after AS_OF_DATE."""
+    return [
+        article
+        for article in server.by_ticker[ticker]
+        if not pull_articles.is_older_than(article, AS_OF_DATE)
+    ]
+
+
+def track_requests(monkeypatch) -> dict:
+    """Records (ticker, page) of API requests and max number of requests in flight."""
+    state = {"requests": [], "in_flight": 0, "max_in_flight": 0}
+    get_response = pull_articles.get_cryptonews_response_async
+
+    async def get_response_tracked(client, ticker, items, page):
+        state["requests"].append((ticker, page))
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            return await get_response(client, ticker, items, page)
+        finally:
+            state["in_flight"] -= 1
+
+    monkeypatch.setattr(
+        pull_articles, "get_cryptonews_response_async", get_response_tracked
+    )
+    return state
+
+
+def test_stub_server_serves_ticker_feed_newest_first(stub_server):
+    stub_server.failing_tickers = {"ETH"}
+    url = pull_articles.build_cryptonews_url("BTC", 10, 1)
+    response = httpx.get(url).json()
+
+    articles = stub_server.by_ticker["BTC"]
+    assert response["total_pages"] == (len(articles) + 9) // 10
+    assert [article["title"] for article in response["data"]] == [
+        article["title"] for article in articles[:10]
+    ]
+    assert response["data"][0]["news_url"] == (
+        f"{stub_server.url}/articles/{articles[0]['id']}"
+    )
+    dates = [
+        pull_articles.DatetimeUtil.parse_and_convert_to_utc(article["date"])
+        for article in response["data"]
+    ]
+    assert dates == sorted(dates, reverse=True)
+
+    failed = httpx.get(pull_articles.build_cryptonews_url("ETH", 10, 1))
+    assert failed.status_code == 500
+
+
+def test_pull_articles_for_tickers_concurrently(stub_server, db_url, monkeypatch):
+    stub_server.latency = 0.05
+    monkeypatch.setattr(pull_articles, "ITEMS_PER_PAGE", 5)
+    monkeypatch.setattr(
+        pull_articles.app_settings, "CRYPTONEWS_MAX_CONCURRENT_REQUESTS", 2
+    )
+    state = track_requests(monkeypatch)
+    pull_for_tickers(db_url, TICKERS)
+
+    assert state["max_in_flight"] == 2
+    assert get_ticker_counts(db_url) == {
+        ticker: len(get_new_articles(stub_server, ticker)) for ticker in TICKERS
+    }
+    for ticker in TICKERS:
+        # paging stops at the page with the first article older than AS_OF_DATE
+        last_page = len(get_new_articles(stub_server, ticker)) // 5 + 1
+        pages = [page for name, page in state["requests"] if name == ticker]
+        assert pages == list(range(1, last_page + 1))
+
+
+def test_pull_articles_for_tickers_stops_after_last_page(
+    stub_server, db_url, monkeypatch
+):
+    stub_server.by_ticker["SOL"] = get_new_articles(stub_server, "SOL")[:7]
+    monkeypatch.setattr(pull_articles, "ITEMS_PER_PAGE", 5)
+    state = track_requests(monkeypatch)
+    pull_for_tickers(db_url, ["SOL"])
+
+    assert state["requests"] == [("SOL", 1), ("SOL", 2), ("SOL", 3)]
+    assert get_ticker_counts(db_url) == {"SOL": 7}
+
+
+def test_failed_ticker_does_not_abort_other_tickers(stub_server, db_url, session):
+    stub_server.failing_tickers = {"ETH"}
+    with pytest.raises(Exception, match="ETH"):
+        pull_for_tickers(db_url, TICKERS)
+
+    assert get_ticker_counts(db_url) == {
+        ticker: len(get_new_articles(stub_server, ticker)) for ticker in ("BTC", "SOL")
+    }
+    assert get_watermark(session, "ETH", "cryptonews") is None
+    assert get_watermark(session, "BTC", "cryptonews") is not None
+
+
+def test_pull_articles_from_api_stops_at_watermark(
+    stub_server, db_url, session, monkeypatch
+):
+    articles = stub_server.by_ticker["BTC"]
+    update_watermark(
+        session,
+        "BTC",
+        "cryptonews",
+        pull_articles.DatetimeUtil.to_naive_utc(
+            pull_articles.DatetimeUtil.parse_and_convert_to_utc(articles[3]["date"])
+        ),
+        f"{stub_server.url}{articles[3]['news_url']}",
+    )
+    monkeypatch.setattr(pull_articles, "ITEMS_PER_PAGE", 2)
+    pull_articles.pull_articles_from_api(session, AS_OF_DATE, "BTC")
+
+    # articles 0-2 are new, page #2 reaches the article of the watermark
+    assert stub_server.requests_count == 2
+    assert get_ticker_counts(db_url) == {"BTC": 3}
+    watermark = get_watermark(session, "BTC", "cryptonews")
+    assert watermark.newest_news_url == f"{stub_server.url}{articles[0]['news_url']}"
+
+
+def test_watermark_is_moved_only_after_articles_are_saved(
+    stub_server, db_url, session, monkeypatch
+):
+    def save_articles_to_db(session, db_entities):
+        raise Exception("Database is unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pull_articles, "save_articles_to_db", save_articles_to_db)
+        with pytest.raises(Exception, match="Database is unavailable"):
+            pull_articles.pull_articles_from_api(session, AS_OF_DATE, "BTC")
+    assert get_watermark(session, "BTC", "cryptonews") is None
+
+    pull_articles.pull_articles_from_api(session, AS_OF_DATE, "BTC")
+    new_articles = get_new_articles(stub_server, "BTC")
+    assert get_ticker_counts(db_url) == {"BTC": len(new_articles)}
+    watermark = get_watermark(session, "BTC", "cryptonews")
+    assert watermark.newest_news_url == (
+        f"{stub_server.url}{new_articles[0]['news_url']}"
+    )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
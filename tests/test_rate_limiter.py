@@ -0,0 +1,109 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+from src.services import providers, summarizer, utils
+from src.services.rate_limiter import (
+    ProviderRateLimiter,
+    TokenBucket,
+    get_retry_delay,
+)
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(capacity=2, refill_per_second=20)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # 2 tokens are available at once, 2 more are refilled in 0.1 second
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_limiter_caps_concurrent_requests():
+    rate_limiter = ProviderRateLimiter(
+        requests_per_minute=6000, tokens_per_minute=600_000, max_concurrent_requests=2
+    )
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def request():
+        with rate_limiter.acquire(10):
+            with lock:
+                running.append(1)
+                max_running.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(max_running) == 2
+
+
+def test_get_retry_delay_prefers_retry_after_header():
+    assert get_retry_delay({"retry-after-ms": "250"}, attempt=3) == 0.25
+    assert get_retry_delay({"retry-after": "2"}, attempt=3) == 2
+    assert 0 < get_retry_delay({}, attempt=0) <= 1.5
+
+
+def test_create_chat_completion_retries_rate_limited_request(monkeypatch):
+    calls = []
+    response = SimpleNamespace(usage=SimpleNamespace(total_tokens=5))
+
+    def create(model, messages):
+        calls.append(model)
+        if len(calls) == 1:
+            raise RateLimitError(
+                "Rate limit exceeded",
+                response=httpx.Response(
+                    429,
+                    request=httpx.Request("POST", "https://api.openai.com"),
+                    headers={"retry-after": "0.01"},
+                ),
+                body=None,
+            )
+        return response
+
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    monkeypatch.setattr(utils, "get_openai_client", lambda provider: client)
+    monkeypatch.setattr(providers, "_providers", {})
+    monkeypatch.setattr(
+        utils,
+        "get_rate_limiter",
+        lambda provider: ProviderRateLimiter(6000, 600_000, 2),
+    )
+
+    assert utils.create_chat_completion("openai", "gpt", [], 10) is response
+    assert calls == ["gpt", "gpt"]
+    # rate limited attempt is not a failure of provider
+    assert providers.get_provider("openai").stats()["failures"] == 0
+
+
+def test_summarize_concurrently_runs_requests_in_parallel(monkeypatch):
+    def summarize_text(text, prompt):
+        time.sleep(0.1)
+        return text.upper()
+
+    monkeypatch.setattr(summarizer, "summarize_text", summarize_text)
+    monkeypatch.setattr(summarizer.app_settings, "LLM_MAX_CONCURRENT_REQUESTS", 4)
+    monkeypatch.setattr(summarizer.app_settings, "CONTENT_SUMMARY_BATCH_TOKENS", 0)
+    start = time.monotonic()
+    summaries = dict(
+        summarizer.summarize_concurrently({i: f"text {i}" for i in range(4)}, "")
+    )
+    assert summaries == {i: f"TEXT {i}" for i in range(4)}
+    assert time.monotonic() - start < 0.3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,40 @@
+import pytest
+
+from src.services.scrape_articles import (
+    extract_article_text,
+    extract_article_text_with_bs4,
+)
+
+
+def test_extract_article_text_prefers_article_content_id():
+    page = (
+        b"<html><body>"
+        b"<div class='entry-content'>Entry content</div>"
+        b"<div id='articleContent'><p>Main</p><p>text</p></div>"
+        b"</body></html>"
+    )
+    assert extract_article_text(page) == "Maintext"
+
+
+def test_extract_article_text_matches_whole_class_name():
+    page = (
+        b"<html><body>"
+        b"<div class='post-box-header'>Header</div>"
+        b"<div class='wide post-box'>Post box text</div>"
+        b"</body></html>"
+    )
+    assert extract_article_text(page) == "Post box text"
+
+
+def test_extract_article_text_same_as_bs4():
+    page = b"<html><body><article class='entry-content'>Some <b>bold</b> news</article></body></html>"
+    assert extract_article_text(page) == extract_article_text_with_bs4(page)
+
+
+def test_extract_article_text_without_container():
+    assert extract_article_text(b"<html><body><p>Nothing</p></body></html>") == ""
+    assert extract_article_text(b"") == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,90 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import delete
+
+from src.bot.utils import parse_search_args
+from src.database.database import (
+    bulk_update_articles,
+    save_articles_to_db,
+    search_articles,
+)
+from src.database.models import CryptonewsArticlesDump
+
+AS_OF_DATE = dt.date(2025, 1, 10)
+
+
+@pytest.fixture
+def session(session):
+    save_articles_to_db(
+        session,
+        [
+            CryptonewsArticlesDump(
+                news_url="https://news.example.com/etf",
+                title="Spot Bitcoin ETF inflows hit record",
+                text="Funds bought more bitcoin.",
+                date=AS_OF_DATE,
+                tags="BTC",
+            ),
+            CryptonewsArticlesDump(
+                news_url="https://news.example.com/staking",
+                title="Ethereum staking grows",
+                text="Validators keep joining the network.",
+                date=AS_OF_DATE - dt.timedelta(days=40),
+                tags="ETH",
+            ),
+            CryptonewsArticlesDump(
+                news_url="https://news.example.com/upgrade",
+                title="Network upgrade scheduled",
+                body="Developers of Ethereum confirmed the date of the upgrade.",
+                date=AS_OF_DATE,
+                tags="ETH",
+            ),
+        ],
+    )
+    return session
+
+
+def search_titles(session, query, ticker=None, since_date=None):
+    return [hit.title for hit in search_articles(session, query, ticker, since_date)]
+
+
+def test_search_articles_ranks_title_matches_first(session):
+    assert search_titles(session, "ethereum") == [
+        "Ethereum staking grows",
+        "Network upgrade scheduled",
+    ]
+    assert search_titles(session, "ethereum", since_date=AS_OF_DATE) == [
+        "Network upgrade scheduled"
+    ]
+    assert search_titles(session, "bitcoin", ticker="ETH") == []
+    assert search_titles(session, 'inflow" (:*') == [
+        "Spot Bitcoin ETF inflows hit record"
+    ]
+
+
+def test_search_index_is_updated_incrementally(session):
+    bulk_update_articles(
+        session, [{"id": 1, "content_summary": "Institutional demand for bitcoin."}]
+    )
+    assert search_titles(session, "institutional") == [
+        "Spot Bitcoin ETF inflows hit record"
+    ]
+
+    session.execute(
+        delete(CryptonewsArticlesDump).where(CryptonewsArticlesDump.id == 1)
+    )
+    session.commit()
+    assert search_titles(session, "bitcoin") == []
+
+
+def test_parse_search_args():
+    assert parse_search_args(["bitcoin", "etf"]) == ("bitcoin etf", None, None)
+    assert parse_search_args(["etf", "btc", "30"]) == ("etf", "BTC", 30)
+    assert parse_search_args(["staking", "7"]) == ("staking", None, 7)
+    assert parse_search_args(["eth"]) == ("eth", None, None)
+    assert parse_search_args([]) == ("", None, None)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.bot.utils import StreamingReply, iterate_in_thread, split_message
+from src.services import providers, utils
+
+
+class FakeMessage:
+    def __init__(self, chat, text=""):
+        self.chat = chat
+        self.text = text
+
+    async def reply_text(self, text):
+        message = FakeMessage(self.chat, text)
+        self.chat.append(message)
+        return message
+
+    async def edit_text(self, text):
+        self.text = text
+        self.chat.edits += 1
+
+
+class FakeChat(list):
+    edits = 0
+
+
+def test_split_message_splits_long_lines():
+    chunks = split_message("a" * 10 + "\nb\n" + "c" * 25, max_length=10)
+    assert chunks == ["a" * 10, "b", "c" * 10, "c" * 10, "c" * 5]
+
+
+def test_streaming_reply_throttles_edits():
+    chat = FakeChat()
+
+    async def run():
+        reply = StreamingReply(FakeMessage(chat), edit_interval=60)
+        await reply.start("Summarizing...")
+        for word in ["Bitcoin ", "is ", "up"]:
+            await reply.append(word)
+        await reply.finish()
+
+    asyncio.run(run())
+    # first part is shown at once, the rest only when the answer is finished
+    assert chat.edits == 2
+    assert [message.text for message in chat] == ["Bitcoin is up"]
+
+
+def test_streaming_reply_replaces_placeholder_of_empty_text():
+    chat = FakeChat()
+
+    async def run():
+        reply = StreamingReply(FakeMessage(chat), edit_interval=0)
+        await reply.start("Summarizing...")
+        await reply.append("  \n")
+        await reply.finish("Summary is empty.")
+
+    asyncio.run(run())
+    assert [message.text for message in chat] == ["Summary is empty."]
+
+
+def test_streaming_reply_continues_in_new_message():
+    chat = FakeChat()
+
+    async def run():
+        reply = StreamingReply(FakeMessage(chat), edit_interval=0)
+        await reply.start("Summarizing...")
+        for _ in range(10):
+            await reply.append("x" * 999 + "\n")
+        await reply.finish()
+
+    asyncio.run(run())
+    assert [len(message.text) for message in chat] == [3999, 3999, 1999]
+    assert all(len(message.text) <= 4096 for message in chat)
+
+
+def test_stream_summary_yields_parts_of_answer(monkeypatch):
+    def chunk(content=None, usage=None):
+        return SimpleNamespace(
+            model="stub",
+            usage=usage,
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=content))],
+        )
+
+    class FakeStream(list):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+    requests = []
+
+    def create(model, messages, **params):
+        requests.append(params)
+        return FakeStream(
+            [
+                chunk("Bitcoin "),
+                chunk("is up"),
+                chunk(usage=SimpleNamespace(total_tokens=20, prompt_tokens=15)),
+            ]
+        )
+
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    monkeypatch.setattr(utils, "get_openai_client", lambda provider: client)
+    monkeypatch.setattr(utils, "get_llm_cache", lambda: None)
+    monkeypatch.setattr(providers, "_providers", {})
+
+    async def collect():
+        return [
+            part
+            async for part in iterate_in_thread(
+                utils.stream_summary("Article text", "prompt")
+            )
+        ]
+
+    assert asyncio.run(collect()) == ["Bitcoin ", "is up"]
+    assert requests[0]["stream"] is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])